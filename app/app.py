@@ -1,15 +1,30 @@
+from contextlib import asynccontextmanager
+
+from app.lazyload import lazyload
+
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.middleware.gzip import GZipMiddleware
 import gradio as gr
+lazyload.mark("fastapi+gradio")
 
 from app.router.router import router
+lazyload.mark("router")
 from app.gradio_ui import create_interface
+from app.scheduler import scheduler
 
 # -------------------------------------------------------
 # FastAPI app
 # -------------------------------------------------------
-app = FastAPI(title="Stock / Index Backend")
+@asynccontextmanager
+async def lifespan(app):
+    # Prewarm hot pages in market hours (PREWARM=0 disables); started on the
+    # event loop so its builds go through the same bulkheads as requests
+    scheduler.start()
+    yield
+    scheduler.stop()
+
+app = FastAPI(title="Stock / Index Backend", lifespan=lifespan)
 
 # -------------------------------------------------------
 # Middleware
@@ -31,4 +46,7 @@ app.include_router(router)
 # Gradio UI
 # -------------------------------------------------------
 demo = create_interface()
-app = gr.mount_gradio_app(app, demo, path="/")
\ No newline at end of file
+app = gr.mount_gradio_app(app, demo, path="/")
+lazyload.mark("gradio ui")
+
+print(lazyload.summary_line())
@@ -0,0 +1,336 @@
+# bench.py — offline end-to-end benchmarks for the page builders
+#
+#   python -m app.bench.bench record                  hit the real upstreams once, save fixtures
+#   python -m app.bench.bench run                     replay fixtures, print timings
+#   python -m app.bench.bench run --save-baseline     ... and store them as the baseline
+#   python -m app.bench.bench run --check             exit 1 if slower / bigger than the baseline
+#   python -m app.bench.bench parity                  exit 1 if tablewriter cells differ from pandas
+#
+# Every case runs cold: TTL caches emptied and persist / OHLCV stores pointed
+# at a fresh temp directory. Timings are the median of --repeat runs with
+# per-stage splits from app.metrics; the memory peak comes from one extra
+# tracemalloc run so tracing overhead stays out of the timings.
+
+import argparse
+import json
+import os
+import re
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+from collections.abc import Iterator
+from datetime import date, timedelta
+from datetime import datetime as dt
+
+import numpy as np
+import pandas as pd
+
+from app.bench import fixtures
+from app.cache import cache
+from app.metrics import metrics
+from app.tablewriter import tablewriter as tw
+from app.upstream import upstream
+
+# ==============================
+# Configuration
+# ==============================
+BENCH_DIR = "./data/bench"
+REPEAT = 3
+TOLERANCE = 0.25               # allowed relative slowdown / growth vs baseline
+SLACK_SEC = 0.005              # absolute slack so sub-10ms cases don't flap
+SLACK_MB = 1.0
+CHART_BARS = 2500              # synthetic history for the svg_charts cases
+
+
+def _last_weekday(d):
+    while d.weekday() >= 5:
+        d -= timedelta(days=1)
+    return d
+
+
+def default_args():
+    """Case arguments fixed at record time, so replays ask for the same resources."""
+    today = date.today()
+    eod = _last_weekday(today - timedelta(days=1))
+    return {
+        "symbol": "ITC",
+        "index": "NIFTY 50",
+        "preopen": "NIFTY",
+        "fno_symbol": "NIFTY",
+        "eod": eod.strftime("%d-%m-%Y"),
+        "daily_end": today.strftime("%d-%m-%Y"),
+        "daily_start": (today - timedelta(days=365)).strftime("%d-%m-%Y"),
+    }
+
+# ==============================
+# Cases
+# ==============================
+def _chart_frame(n=CHART_BARS, seed=7):
+    """Deterministic random-walk OHLCV with the daily page's indicators."""
+    from app.yohoofinance import daily
+
+    rng = np.random.default_rng(seed)
+    close = 1000 * np.exp(np.cumsum(rng.normal(0, 0.012, n)))
+    open_ = close * (1 + rng.normal(0, 0.004, n))
+    df = pd.DataFrame({
+        "Date": pd.bdate_range(end="2024-12-31", periods=n),
+        "Open": open_,
+        "High": np.maximum(open_, close) * (1 + rng.uniform(0, 0.01, n)),
+        "Low": np.minimum(open_, close) * (1 - rng.uniform(0, 0.01, n)),
+        "Close": close,
+        "Volume": rng.integers(10**5, 10**7, n).astype(float),
+    })
+    return daily.add_indicators(df)
+
+
+def cases(args):
+    """name -> zero-arg builder. Imported here so the replay backend is in place first."""
+    from app.nse import indices_html, index_live_html, preopen_html, eq_html, bhavcopy_html
+    from app.nse import build_nse_fno
+    from app.yohoofinance import daily, yahooinfo
+    from app.svgchart import svg_charts
+
+    chart = _chart_frame()
+    return {
+        "build_indices_html": lambda: indices_html.build_indices_html(),
+        "build_index_live_html": lambda: index_live_html.build_index_live_html(args["index"]),
+        "build_preopen_html": lambda: preopen_html.build_preopen_html(args["preopen"]),
+        "build_eq_html": lambda: eq_html.build_eq_html(args["symbol"]),
+        "build_bhavcopy_html": lambda: bhavcopy_html.build_bhavcopy_html(args["eod"]),
+        "nse_fno_html": lambda: build_nse_fno.nse_fno_html(args["eod"], args["fno_symbol"]),
+        "fetch_daily": lambda: daily.fetch_daily(args["symbol"], args["daily_end"], args["daily_start"]),
+        "fetch_info": lambda: yahooinfo.fetch_info(args["symbol"]),
+        "svg.candlestick_chart": lambda: svg_charts.candlestick_chart(chart),
+        "svg.line_chart": lambda: svg_charts.line_chart(chart),
+        "svg.rsi_chart": lambda: svg_charts.rsi_chart(chart),
+        "svg.macd_chart": lambda: svg_charts.macd_chart(chart),
+    }
+
+# ==============================
+# Isolation
+# ==============================
+class _ColdStores:
+    """Point persist / OHLCV at an empty temp dir and empty every TTL cache."""
+
+    def __enter__(self):
+        from app.persist import persist, ohlcv
+        self._mods = (persist, ohlcv)
+        self._saved = [m.BASE_DIR for m in self._mods]
+        self.tmp = tempfile.mkdtemp(prefix="bench_")
+        for m in self._mods:
+            m.BASE_DIR = os.path.join(self.tmp, m.__name__.rsplit(".", 1)[-1])
+            os.makedirs(m.BASE_DIR, exist_ok=True)
+        cache.clear_all()
+        return self
+
+    def __exit__(self, *exc):
+        for m, d in zip(self._mods, self._saved):
+            m.BASE_DIR = d
+        shutil.rmtree(self.tmp, ignore_errors=True)
+
+
+def _run_once(fn):
+    """(wall seconds, exclusive stage seconds, output bytes) for one cold build."""
+    timer = metrics.RequestTimer("bench", "bench")
+    with _ColdStores(), metrics.activate(timer):
+        start = time.perf_counter()
+        with timer.stage("process"):
+            html = fn()
+            if isinstance(html, Iterator):
+                html = "".join(html)
+        wall = time.perf_counter() - start
+    return wall, dict(timer.stages), len(str(html).encode("utf-8"))
+
+
+def _peak_mb(fn):
+    tracemalloc.start()
+    try:
+        with _ColdStores():
+            html = fn()
+            if isinstance(html, Iterator):
+                "".join(html)
+        return tracemalloc.get_traced_memory()[1] / 2**20
+    finally:
+        tracemalloc.stop()
+
+
+def bench_case(fn, repeat=REPEAT):
+    runs = [_run_once(fn) for _ in range(repeat)]
+    stages = {}
+    for _, st, _ in runs:
+        for k, v in st.items():
+            stages.setdefault(k, []).append(v)
+    return {
+        "wall_s": statistics.median(r[0] for r in runs),
+        "min_s": min(r[0] for r in runs),
+        "stages_s": {k: statistics.median(v) for k, v in sorted(stages.items())},
+        "bytes": runs[-1][2],
+        "peak_mb": _peak_mb(fn),
+    }
+
+# ==============================
+# Baseline
+# ==============================
+def compare(results, baseline, tolerance=TOLERANCE, errors=None, only=None):
+    """
+    Lines describing every case that got slower or bigger than the baseline
+    allows, failed, or is in the baseline (and selected by only) but did not run.
+    """
+    errors = errors or {}
+    out = [f"{name}: failed ({err})" for name, err in errors.items()]
+    for name in baseline:
+        if name not in results and name not in errors and _selected(name, only):
+            out.append(f"{name}: missing from this run")
+    for name, r in results.items():
+        b = baseline.get(name)
+        if not b:
+            continue
+        if r["wall_s"] > b["wall_s"] * (1 + tolerance) + SLACK_SEC:
+            out.append(f"{name}: wall {b['wall_s']*1000:.1f}ms -> {r['wall_s']*1000:.1f}ms")
+        if r["peak_mb"] > b["peak_mb"] * (1 + tolerance) + SLACK_MB:
+            out.append(f"{name}: peak {b['peak_mb']:.1f}MB -> {r['peak_mb']:.1f}MB")
+    return out
+
+
+def _report(results, hits):
+    stages = metrics.STAGES
+    print(f"{'case':<24}{'wall ms':>9}{'min ms':>9}" + "".join(f"{s:>9}" for s in stages) + f"{'peak MB':>9}{'KB':>8}")
+    for name, r in results.items():
+        cols = "".join(f"{r['stages_s'].get(s, 0)*1000:9.1f}" for s in stages)
+        print(f"{name:<24}{r['wall_s']*1000:9.1f}{r['min_s']*1000:9.1f}{cols}{r['peak_mb']:9.1f}{r['bytes']/1024:8.0f}")
+    print(f"fixtures: {hits['exact']} exact, {hits['loose']} loose, {hits['missing']} missing")
+
+# ==============================
+# Commands
+# ==============================
+def record(root):
+    store = fixtures.FixtureStore(os.path.join(root, "fixtures"))
+    upstream.set_backend(fixtures.RecordingBackend(store))
+    args = default_args()
+    with open(os.path.join(root, "cases.json"), "w", encoding="utf-8") as f:
+        json.dump({"recorded": date.today().isoformat(), "args": args}, f, indent=2)
+    for name, fn in cases(args).items():
+        try:
+            wall, _, size = _run_once(fn)
+        except Exception as e:
+            print(f"[{dt.now().strftime('%Y-%m-%d %H:%M:%S')}] Error recording {name}: {e!r}")
+            continue
+        print(f"recorded {name:<24}{wall:8.2f}s {size/1024:8.0f}KB")
+
+
+def _selected(name, only):
+    return not only or any(o in name for o in only)
+
+
+def run(root, repeat=REPEAT, only=None):
+    """(results, errors) — errors maps each case that raised to its exception text."""
+    store = fixtures.FixtureStore(os.path.join(root, "fixtures"))
+    if not store.load_all():
+        sys.exit(f"No fixtures under {store.root}; run `python -m app.bench.bench record` first")
+    backend = fixtures.ReplayBackend(store)
+    upstream.set_backend(backend)
+    with open(os.path.join(root, "cases.json"), encoding="utf-8") as f:
+        args = json.load(f)["args"]
+
+    results, errors = {}, {}
+    for name, fn in cases(args).items():
+        if not _selected(name, only):
+            continue
+        try:
+            results[name] = bench_case(fn, repeat)
+        except Exception as e:
+            errors[name] = repr(e)
+            print(f"[{dt.now().strftime('%Y-%m-%d %H:%M:%S')}] Error in {name}: {e!r}")
+    _report(results, backend.hits)
+    return results, errors
+
+
+# ==============================
+# Table writer parity with DataFrame.to_html
+# ==============================
+_CELL = re.compile(r"<t[dh]>(.*?)</t[dh]>", re.S)
+
+
+def parity_frames():
+    """Edge cases for tablewriter's cell formatting, one column each."""
+    return {
+        "tiny": [1e-7, 1.5, np.nan],
+        "tiny_negative": [-3.2e-9, 0.0],
+        "zeros": [0.0, 0.0],
+        "wide_large": [1e7 + 0.125, 2.0],
+        "narrow_large": [1e7 + 0.25, np.inf],
+        "huge": [1.23e16, -5.5],
+        "negative_large": [-1234567.125, 1.0],
+        "mixed": [0.1, 0.25, 123.456789, -7.0],
+        "whole": [1.0, 2.0, np.nan],
+        "precision": [1.0000004, 2.5],
+        "missing": [np.nan, np.nan],
+        "infinite": [np.inf, -np.inf, 3.0],
+        "nullable_int": pd.array([1, None], dtype="Int64"),
+        "dates": pd.to_datetime([None, "2024-01-02"]),
+        "datetimes": pd.to_datetime([None, "2024-01-02 10:11:12"]),
+        "objects": pd.Series([pd.NaT, "x", None, 1.5, np.nan, np.inf, pd.NA, "<b>"], dtype=object),
+    }
+
+
+def parity():
+    """Names of parity_frames() cases whose cells differ from pandas, with both renderings."""
+    diffs = []
+    for na_rep in ("NaN", "-"):
+        for name, values in parity_frames().items():
+            df = pd.DataFrame({"c": values})
+            want = _CELL.findall(df.to_html(na_rep=na_rep))
+            got = _CELL.findall(tw.to_html(df, na_rep=na_rep))
+            if got != want:
+                diffs.append(f"{name} (na_rep={na_rep!r}): pandas {want} tablewriter {got}")
+    return diffs
+
+
+def main(argv=None):
+    p = argparse.ArgumentParser(prog="python -m app.bench.bench", description="Offline builder benchmarks")
+    p.add_argument("command", choices=("record", "run", "parity"))
+    p.add_argument("--dir", default=BENCH_DIR, help="fixtures, cases.json and baseline.json live here")
+    p.add_argument("--repeat", type=int, default=REPEAT)
+    p.add_argument("--only", nargs="*", help="substrings of case names to run")
+    p.add_argument("--save-baseline", action="store_true")
+    p.add_argument("--check", action="store_true", help="fail on regression against baseline.json")
+    p.add_argument("--tolerance", type=float, default=TOLERANCE)
+    a = p.parse_args(argv)
+
+    if a.command == "parity":
+        diffs = parity()
+        for line in diffs:
+            print(f"MISMATCH {line}")
+        print(f"pandas {pd.__version__}: {len(diffs)} mismatch(es)")
+        return 1 if diffs else 0
+
+    os.makedirs(a.dir, exist_ok=True)
+    if a.command == "record":
+        record(a.dir)
+        return 0
+
+    results, errors = run(a.dir, max(1, a.repeat), a.only)
+    path = os.path.join(a.dir, "baseline.json")
+    if a.check:
+        if not os.path.exists(path):
+            sys.exit(f"No baseline at {path}; run with --save-baseline first")
+        with open(path, encoding="utf-8") as f:
+            regressions = compare(results, json.load(f), a.tolerance, errors, a.only)
+        for line in regressions:
+            print(f"REGRESSION {line}")
+        if regressions:
+            return 1
+    if a.save_baseline:
+        if errors:
+            sys.exit(f"Not saving a baseline: {len(errors)} case(s) failed")
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+        print(f"baseline written to {path}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
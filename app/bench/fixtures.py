@@ -0,0 +1,177 @@
+# fixtures.py — record upstream responses once, replay them offline
+#
+# RecordingBackend wraps the live transport and pickles every response
+# (HTTP body + status, archive file bytes, curl output, yfinance return
+# value or raised exception) under a fixture directory. ReplayBackend serves
+# them back with no network. Lookups try the exact call first, then looser
+# keys (no query values, no date kwargs, any symbol), so fixtures recorded on
+# one day for one symbol still drive builds for other days and symbols.
+
+import hashlib
+import os
+import pickle
+import threading
+import time
+
+import requests
+from requests.structures import CaseInsensitiveDict
+
+from app.upstream import upstream
+
+
+class FixtureMissing(requests.ConnectionError):
+    """No recorded response for this call (raised where the network would have failed)."""
+
+
+def _digest(key):
+    return hashlib.sha1(repr(key).encode("utf-8")).hexdigest()
+
+
+def _url_keys(kind, url, *extra):
+    return (kind, url) + extra, (kind, upstream.template(url))
+
+
+def _http_keys(method, url, kwargs):
+    body = {k: kwargs[k] for k in ("params", "data", "json") if kwargs.get(k) is not None}
+    return ("http", method.upper(), url, repr(sorted(body.items()))), ("http", method.upper(), upstream.template(url))
+
+
+def _yahoo_keys(name, args, kwargs):
+    return ("yahoo", name, repr(args), repr(sorted(kwargs.items()))), ("yahoo", name, repr(args)), ("yahoo", name)
+
+# ==============================
+# Store
+# ==============================
+class FixtureStore:
+    def __init__(self, root):
+        self.root = root
+        os.makedirs(root, exist_ok=True)
+        self._values = {}           # any key level -> value (first recorded wins for loose levels)
+        self._exact = set()
+
+    def _path(self, keys):
+        return os.path.join(self.root, _digest(keys[0]) + ".pkl")
+
+    def save(self, keys, value):
+        """keys: exact key first, then progressively looser ones."""
+        item = {"keys": keys, "value": value}
+        try:
+            data = pickle.dumps(item)
+        except Exception:
+            if not isinstance(value, BaseException):
+                raise
+            item["value"] = RuntimeError(repr(value))
+            data = pickle.dumps(item)
+        with open(self._path(keys), "wb") as f:
+            f.write(data)
+
+    def load_all(self):
+        for name in sorted(os.listdir(self.root)):
+            if not name.endswith(".pkl"):
+                continue
+            with open(os.path.join(self.root, name), "rb") as f:
+                item = pickle.load(f)
+            exact, *loose = item["keys"]
+            self._exact.add(exact)
+            self._values[exact] = item["value"]
+            for k in loose:
+                self._values.setdefault(k, item["value"])
+        return len(self._exact)
+
+    def lookup(self, keys):
+        """(value, "exact" | "loose"); FixtureMissing if no key level was recorded."""
+        for i, k in enumerate(keys):
+            if k in self._values and (i or k in self._exact):
+                return self._values[k], "loose" if i else "exact"
+        raise FixtureMissing(f"no fixture for {keys[0][:3]}")
+
+# ==============================
+# Backends
+# ==============================
+class RecordingBackend(upstream.LiveBackend):
+    """Live network, with every response written to the fixture store."""
+
+    def __init__(self, store):
+        self.store = store
+
+    def _keep(self, keys, fn):
+        try:
+            value = fn()
+        except Exception as e:
+            self.store.save(keys, e)
+            raise
+        self.store.save(keys, value)
+        return value
+
+    def request(self, session, method, url, **kwargs):
+        def fetch():
+            r = super(RecordingBackend, self).request(session, method, url, **kwargs)
+            return {"status": r.status_code, "headers": dict(r.headers), "content": r.content,
+                    "encoding": r.encoding, "url": r.url}
+        return _response(self._keep(_http_keys(method, url, kwargs), fetch))
+
+    def fetch_bytes(self, url):
+        return self._keep(_url_keys("bytes", url),
+                          lambda: super(RecordingBackend, self).fetch_bytes(url))
+
+    def curl(self, url, args=""):
+        return self._keep(_url_keys("curl", url, args),
+                          lambda: super(RecordingBackend, self).curl(url, args))
+
+    def yahoo(self, name, fn, args, kwargs):
+        return self._keep(_yahoo_keys(name, args, kwargs),
+                          lambda: super(RecordingBackend, self).yahoo(name, fn, args, kwargs))
+
+
+class ReplayBackend:
+    """
+    Serves recorded fixtures; counts exact / loose / missing lookups.
+    latency (seconds) is slept per call to stand in for the real round trip.
+    """
+
+    def __init__(self, store, latency=0.0):
+        self.store = store
+        self.latency = latency
+        self.hits = {"exact": 0, "loose": 0, "missing": 0}
+        self._lock = threading.Lock()
+
+    def _get(self, keys):
+        if self.latency:
+            time.sleep(self.latency)
+        try:
+            value, how = self.store.lookup(keys)
+        except FixtureMissing:
+            with self._lock:
+                self.hits["missing"] += 1
+            raise
+        with self._lock:
+            self.hits[how] += 1
+        if isinstance(value, BaseException):
+            raise value
+        return value
+
+    def request(self, session, method, url, **kwargs):
+        return _response(self._get(_http_keys(method, url, kwargs)))
+
+    def fetch_bytes(self, url):
+        return self._get(_url_keys("bytes", url))
+
+    def curl(self, url, args=""):
+        try:
+            return self._get(_url_keys("curl", url, args))
+        except FixtureMissing:
+            return b""                 # what a failed `curl -s` prints
+
+    def yahoo(self, name, fn, args, kwargs):
+        value = self._get(_yahoo_keys(name, args, kwargs))
+        return value.copy() if hasattr(value, "copy") else value
+
+
+def _response(rec):
+    r = requests.Response()
+    r.status_code = rec["status"]
+    r.headers = CaseInsensitiveDict(rec["headers"])
+    r._content = rec["content"]
+    r.encoding = rec["encoding"]
+    r.url = rec["url"]
+    return r
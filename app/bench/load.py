@@ -0,0 +1,281 @@
+# load.py — load generator for /file with cache hit / miss mixes
+#
+#   python -m app.bench.load --mix default --clients 32 --duration 30 --latency 0.15
+#
+# Starts the API (router + gzip, no Gradio) on a local port with the upstream
+# transport replaying recorded fixtures (see bench.py `record`), optionally
+# with a fixed delay per upstream call. Closed-loop clients then pick
+# filenames from a weighted mix with seeded RNGs, so runs are repeatable.
+# Cached entries are warmed first; "force" entries rebuild on every request.
+# Reports throughput, latency percentiles per class, error rates and the
+# build pools' and per-handler gates' busy / waiting counts (app/limits)
+# sampled from /api/threadpool.
+
+import argparse
+import http.client
+import json
+import os
+import random
+import sys
+import tempfile
+import threading
+import time
+from collections import Counter, defaultdict
+from urllib.parse import urlencode
+
+from app.bench import fixtures
+from app.bench.bench import BENCH_DIR, default_args
+from app.upstream import upstream
+
+# ==============================
+# Configuration
+# ==============================
+PORT = 8765
+CLIENTS = 16
+DURATION = 20.0
+POLL = 0.1                      # threadpool sampling period, seconds
+SEED = 1
+SYMBOLS = ["ITC", "TCS", "INFY", "RELIANCE", "HDFCBANK", "ICICIBANK", "SBIN", "LT", "AXISBANK", "MARUTI"]
+
+# weight, filename ({symbol} and the cases.json args are filled in), force rebuild
+MIXES = {
+    "default": [
+        {"weight": 80, "name": "@index@open@NIFTY 50.html"},
+        {"weight": 20, "name": "@stock@daily@{symbol}@{daily_end}@{daily_start}.html", "force": True},
+    ],
+    "open": [
+        {"weight": 50, "name": "@index@open@NIFTY 50.html"},
+        {"weight": 15, "name": "@index@indices@all.html"},
+        {"weight": 10, "name": "@index@preopen@NIFTY.html"},
+        {"weight": 10, "name": "@stock@info@{symbol}.html", "force": True},
+        {"weight": 15, "name": "@stock@daily@{symbol}@{daily_end}@{daily_start}.html", "force": True},
+    ],
+}
+
+
+def load_mix(spec):
+    """A builtin mix name or a JSON file holding the same list of entries."""
+    if spec in MIXES:
+        return MIXES[spec]
+    with open(spec, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def _fill(name, args, symbol):
+    return name.format(**{**args, "symbol": symbol})
+
+# ==============================
+# Server
+# ==============================
+def start_server(port):
+    import uvicorn
+    from fastapi import FastAPI
+    from fastapi.middleware.gzip import GZipMiddleware
+    from app.router import router as routes
+
+    routes.FILES_DIR = routes.Path(tempfile.mkdtemp(prefix="load_files_")).resolve()
+    api = FastAPI()
+    api.add_middleware(GZipMiddleware, minimum_size=1000)
+    api.include_router(routes.router)
+
+    server = uvicorn.Server(uvicorn.Config(api, host="127.0.0.1", port=port, log_level="warning"))
+    threading.Thread(target=server.run, name="uvicorn", daemon=True).start()
+    while not server.started:
+        time.sleep(0.05)
+    return server
+
+# ==============================
+# Clients
+# ==============================
+def _get(conn, path):
+    conn.request("GET", path, headers={"Accept-Encoding": "gzip"})
+    r = conn.getresponse()
+    body = r.read()
+    return r.status, len(body)
+
+
+def _path(name, force):
+    q = {"name": name}
+    if force:
+        q["force"] = "true"
+    return "/file?" + urlencode(q)
+
+
+def warm(port, mix, args):
+    conn = http.client.HTTPConnection("127.0.0.1", port, timeout=300)
+    names = {_fill(e["name"], args, s) for e in mix if not e.get("force") for s in SYMBOLS}
+    failed = [name for name in sorted(names) if _get(conn, _path(name, False))[0] != 200]
+    conn.close()
+    return len(names), failed
+
+
+def client(i, port, mix, args, deadline, seed, out):
+    rng = random.Random(seed * 1000 + i)
+    weights = [e["weight"] for e in mix]
+    conn = http.client.HTTPConnection("127.0.0.1", port, timeout=300)
+    while time.monotonic() < deadline:
+        e = rng.choices(mix, weights)[0]
+        force = bool(e.get("force"))
+        path = _path(_fill(e["name"], args, rng.choice(SYMBOLS)), force)
+        start = time.perf_counter()
+        try:
+            status, size = _get(conn, path)
+        except Exception as exc:
+            status, size = type(exc).__name__, 0
+            conn.close()
+            conn = http.client.HTTPConnection("127.0.0.1", port, timeout=300)
+        out.append(("miss" if force else "hit", e["name"], status, time.perf_counter() - start, size))
+    conn.close()
+
+
+def poll_threadpool(port, stop, samples):
+    conn = http.client.HTTPConnection("127.0.0.1", port, timeout=10)
+    while not stop.wait(POLL):
+        try:
+            conn.request("GET", "/api/threadpool")
+            samples.append(json.loads(conn.getresponse().read()))
+        except Exception:
+            conn.close()
+            conn = http.client.HTTPConnection("127.0.0.1", port, timeout=10)
+    conn.close()
+
+# ==============================
+# Report
+# ==============================
+def _pct(sorted_vals, q):
+    if not sorted_vals:
+        return 0.0
+    return sorted_vals[min(len(sorted_vals) - 1, int(round(q * (len(sorted_vals) - 1))))] * 1000
+
+
+def summarize(results, elapsed, pool):
+    groups = defaultdict(list)
+    for cls, name, status, secs, size in results:
+        groups[cls].append(secs)
+        groups[f"{cls} {name}"].append(secs)
+    errors = Counter(str(r[2]) for r in results if r[2] != 200)
+    rows = {}
+    for key, vals in sorted(groups.items()):
+        vals.sort()
+        rows[key] = {"n": len(vals), "rps": len(vals) / elapsed, "p50_ms": _pct(vals, 0.5),
+                     "p90_ms": _pct(vals, 0.9), "p99_ms": _pct(vals, 0.99), "max_ms": vals[-1] * 1000}
+    return {
+        "requests": len(results),
+        "seconds": elapsed,
+        "rps": len(results) / elapsed,
+        "errors": dict(errors),
+        "error_rate": sum(errors.values()) / max(1, len(results)),
+        "bytes": sum(r[4] for r in results),
+        "latency": rows,
+        "pools": _pools(pool),
+        "gates": _gates(pool),
+    }
+
+
+def _occupancy(points, total):
+    """points: [(busy, waiting)] per sample."""
+    b = [p[0] for p in points] or [0]
+    w = [p[1] for p in points] or [0]
+    return {"total": total, "busy_mean": sum(b) / len(b), "busy_max": max(b),
+            "saturated_pct": 100 * sum(1 for x in b if total and x >= total) / max(1, len(b)),
+            "waiting_mean": sum(w) / len(w), "waiting_max": max(w)}
+
+
+def _pools(samples):
+    """Build pools (app/limits, per cost class) plus the default AnyIO pool, over all samples."""
+    out = {}
+    costs = sorted({c for s in samples for c in s.get("pools", {})})
+    for c in costs:
+        total = max(s["pools"][c]["total"] for s in samples if c in s.get("pools", {}))
+        pts = [(s["pools"][c]["busy"], s["pools"][c]["waiting"]) if c in s.get("pools", {}) else (0, 0)
+               for s in samples]
+        out[c] = _occupancy(pts, total)
+    if samples:
+        out["default"] = _occupancy([(s["busy"], s["waiting"]) for s in samples], samples[0]["total"])
+    return out
+
+
+def _gates(samples):
+    """Per-handler bulkheads; a gate missing from a sample was idle."""
+    out = {}
+    keys = sorted({k for s in samples for k in s.get("gates", {})})
+    for k in keys:
+        seen = [s["gates"][k] for s in samples if k in s.get("gates", {})]
+        pts = [(s["gates"][k]["running"], s["gates"][k]["waiting"]) if k in s.get("gates", {}) else (0, 0)
+               for s in samples]
+        occ = _occupancy(pts, seen[0]["limit"])
+        occ["queue"] = seen[0]["queue"]
+        out[k] = occ
+    return out
+
+
+def print_report(s):
+    print(f"{s['requests']} requests in {s['seconds']:.1f}s = {s['rps']:.1f} req/s, "
+          f"{s['bytes'] / 2**20:.1f} MB, error rate {s['error_rate'] * 100:.2f}% {s['errors'] or ''}")
+    print(f"{'class':<64}{'n':>7}{'req/s':>8}{'p50':>9}{'p90':>9}{'p99':>9}{'max':>9}")
+    for k, r in s["latency"].items():
+        print(f"{k[:63]:<64}{r['n']:>7}{r['rps']:8.1f}{r['p50_ms']:9.1f}{r['p90_ms']:9.1f}{r['p99_ms']:9.1f}{r['max_ms']:9.1f}")
+    for label, rows in (("pool", s["pools"]), ("gate", s["gates"])):
+        for k, t in rows.items():
+            print(f"{label} {k:<28} {t['total']:>3} slots, busy mean {t['busy_mean']:.1f} / max {t['busy_max']}, "
+                  f"saturated {t['saturated_pct']:.0f}% of samples, "
+                  f"waiting mean {t['waiting_mean']:.1f} / max {t['waiting_max']}")
+
+
+def main(argv=None):
+    p = argparse.ArgumentParser(prog="python -m app.bench.load", description="Load test /file against fake upstreams")
+    p.add_argument("--dir", default=BENCH_DIR, help="fixtures and cases.json from `app.bench.bench record`")
+    p.add_argument("--mix", default="default", help=f"one of {sorted(MIXES)} or a JSON file")
+    p.add_argument("--clients", type=int, default=CLIENTS)
+    p.add_argument("--duration", type=float, default=DURATION)
+    p.add_argument("--latency", type=float, default=0.0, help="seconds added to every upstream call")
+    p.add_argument("--seed", type=int, default=SEED)
+    p.add_argument("--port", type=int, default=PORT)
+    p.add_argument("--json", help="also write the summary here")
+    a = p.parse_args(argv)
+
+    store = fixtures.FixtureStore(os.path.join(a.dir, "fixtures"))
+    if not store.load_all():
+        sys.exit(f"No fixtures under {store.root}; run `python -m app.bench.bench record` first")
+    backend = fixtures.ReplayBackend(store, latency=a.latency)
+    upstream.set_backend(backend)
+    cases = os.path.join(a.dir, "cases.json")
+    if os.path.exists(cases):
+        with open(cases, encoding="utf-8") as f:
+            args = json.load(f)["args"]
+    else:
+        args = default_args()
+
+    mix = load_mix(a.mix)
+    start_server(a.port)
+    n, failed = warm(a.port, mix, args)
+    print(f"warmed {n} cached pages; {a.clients} clients for {a.duration:.0f}s")
+    for name in failed:
+        print(f"warm-up failed for {name}: its 'hit' requests will rebuild every time")
+
+    results, pool, stop = [], [], threading.Event()
+    poller = threading.Thread(target=poll_threadpool, args=(a.port, stop, pool), daemon=True)
+    poller.start()
+    deadline = time.monotonic() + a.duration
+    start = time.perf_counter()
+    threads = [threading.Thread(target=client, args=(i, a.port, mix, args, deadline, a.seed, results), daemon=True)
+               for i in range(a.clients)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    elapsed = time.perf_counter() - start
+    stop.set()
+    poller.join()
+
+    summary = summarize(results, elapsed, pool)
+    summary["fixtures"] = dict(backend.hits)
+    print_report(summary)
+    if a.json:
+        with open(a.json, "w", encoding="utf-8") as f:
+            json.dump(summary, f, indent=2)
+    return 1 if summary["error_rate"] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,124 @@
+# cache.py — in-process bounded LRU + TTL cache with single-flight loading
+
+import threading
+import time
+import weakref
+from collections import OrderedDict
+
+_MISS = object()
+_instances = weakref.WeakSet()
+
+
+class _Flight:
+    """One in-progress load that concurrent callers for the same key wait on."""
+
+    def __init__(self):
+        self.event = threading.Event()
+        self.value = None
+        self.error = None
+
+
+class TTLCache:
+    """
+    Bounded LRU cache whose entries expire after a TTL (seconds).
+
+    - maxsize: oldest-used entries are evicted beyond this many keys
+    - ttl: default lifetime; set()/get_or_load() accept a per-entry ttl
+    - get_or_load() runs the loader once per key even under concurrent misses
+    - peek() returns an entry even when expired (stale fallback / incremental top-up)
+    """
+
+    def __init__(self, maxsize=128, ttl=300):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data = OrderedDict()   # key -> (expires_at, value)
+        self._inflight = {}          # key -> _Flight
+        self._lock = threading.Lock()
+        _instances.add(self)
+
+    # ------------------------------
+    # Basic access
+    # ------------------------------
+    def _fresh(self, key):
+        item = self._data.get(key)
+        if item is None:
+            return _MISS
+        expires_at, value = item
+        if expires_at < time.monotonic():
+            return _MISS
+        self._data.move_to_end(key)
+        return value
+
+    def get(self, key, default=None):
+        with self._lock:
+            value = self._fresh(key)
+        return default if value is _MISS else value
+
+    def peek(self, key, default=None):
+        with self._lock:
+            item = self._data.get(key)
+        return default if item is None else item[1]
+
+    def set(self, key, value, ttl=None):
+        ttl = self.ttl if ttl is None else ttl
+        with self._lock:
+            self._data[key] = (time.monotonic() + ttl, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def pop(self, key, default=None):
+        with self._lock:
+            item = self._data.pop(key, None)
+        return default if item is None else item[1]
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def __contains__(self, key):
+        with self._lock:
+            return self._fresh(key) is not _MISS
+
+    def __len__(self):
+        with self._lock:
+            return len(self._data)
+
+    # ------------------------------
+    # Single-flight load
+    # ------------------------------
+    def get_or_load(self, key, loader, ttl=None):
+        """Return the cached value for key, calling loader() once on a miss."""
+        with self._lock:
+            value = self._fresh(key)
+            if value is not _MISS:
+                return value
+            flight = self._inflight.get(key)
+            leader = flight is None
+            if leader:
+                flight = self._inflight[key] = _Flight()
+
+        if not leader:
+            flight.event.wait()
+            if flight.error is not None:
+                raise flight.error
+            return flight.value
+
+        try:
+            flight.value = loader()
+        except BaseException as e:
+            flight.error = e
+            raise
+        else:
+            self.set(key, flight.value, ttl)
+            return flight.value
+        finally:
+            with self._lock:
+                self._inflight.pop(key, None)
+            flight.event.set()
+
+
+def clear_all():
+    """Empty every live TTLCache in the process (benchmarks start each case cold)."""
+    for c in list(_instances):
+        c.clear()
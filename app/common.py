@@ -3,6 +3,10 @@ import numpy as np
 import datetime
 import traceback
 
+from app.registry import registry
+from app.static import assets
+from app.tablewriter import tablewriter as tw
+
 
 # ============================================================
 #                   NUMBER FORMATTING HELPERS
@@ -60,6 +64,7 @@ def html_section(title, content):
     """
 
 def html_error(msg):
+    registry.failed()
     return f"""
     <div style="
         padding:15px;
@@ -90,33 +95,13 @@ def clean_df(df):
 
 def make_table(df):
     try:
-        df = df.copy()
-        df = clean_df(df)
-        html = df.to_html(classes="styled-table", escape=False, border=0)
+        # clean_df's rules (date-only index, inf/NaN -> "-") applied by the
+        # writer, without copying or fillna-ing the frame
+        if isinstance(df.index, pd.DatetimeIndex):
+            df = df.set_axis(df.index.strftime("%Y-%m-%d"))
+        html = tw.to_html(df, classes="styled-table", escape=False, border=0, na_rep="-")
         return f"""
-        <style>
-        .styled-table {{
-            width:100%;
-            border-collapse:collapse;
-            font-size:14px;
-        }}
-        .styled-table th {{
-            background:#0077cc;
-            color:white;
-            padding:8px;
-            text-align:left;
-        }}
-        .styled-table td {{
-            padding:8px;
-            border-bottom:1px solid #ddd;
-        }}
-        .styled-table tr:nth-child(even) {{
-            background:#f3f7ff;
-        }}
-        .styled-table tr:hover {{
-            background:#e7f1ff;
-        }}
-        </style>
+        {assets.style_tag("table.css")}
         {html}
         """
     except Exception as e:
@@ -157,20 +142,7 @@ def format_timestamp_to_date(timestamp):
 #                   HTML WRAPPER
 # ============================================================
 
-STYLE_BLOCK = """
-<style>
-.styled-table {border-collapse: collapse; margin: 10px 0; font-size: 0.9em; font-family: sans-serif; width: 100%; box-shadow: 0 0 10px rgba(0,0,0,0.1);}
-.styled-table th, .styled-table td {padding: 8px 10px; border: 1px solid #ddd;}
-.styled-table tbody tr:nth-child(even) {background-color: #f9f9f9;}
-.card {display: block; width: 95%; margin: 10px auto; padding: 15px; border: 1px solid #ddd; border-radius: 8px; box-shadow: 0 2px 5px rgba(0,0,0,0.1); background: #fafafa;}
-.card-category-title {font-size: 1.1em; color: #222; margin: 0 0 8px; border-bottom: 1px solid #eee; padding-bottom: 5px;}
-.card-content-grid {display: flex; flex-wrap: wrap; gap: 15px;}
-.key-value-pair {flex: 1 1 calc(20% - 15px); box-sizing: border-box; min-width: 150px; background: #fff; padding: 10px; border: 1px solid #e0e0e0; border-radius: 5px; box-shadow: 0 1px 3px rgba(0,0,0,0.05);}
-.key-value-pair h3 {font-size: 0.95em; color: #444; margin: 0 0 5px 0;}
-.key-value-pair p {font-size: 0.9em; color: #555; margin: 0; font-weight: bold;}
-.big-box {width:95%; margin:20px auto; padding:20px; border:1px solid #ccc; border-radius:8px; background:#fff; box-shadow:0 2px 8px rgba(0,0,0,0.1); font-size:0.95em; line-height:1.4em; max-height:400px; overflow-y:auto;}
-</style>
-"""
+STYLE_BLOCK = assets.style_tag("common.css")
 
 def wrap_html(content, title="Stock Data"):
     return f"""
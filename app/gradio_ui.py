@@ -7,15 +7,14 @@ import gradio as gr
 import requests
 import pandas as pd
 from datetime import datetime
+from urllib.parse import quote
 
+from app.registry import registry
+from app.router.router import build_filename
 
-REQ_TYPES = {
-    "stock": ['info','intraday','daily','nse_eq','qresult','result','balance','cashflow','dividend','split','other','stock_hist'],
-    "index": ['indices','open','preopen','fno','fiidii','events','index_highlow','stock_highlow','bhav','largedeals','bulkdeals','blockdeals','most_active','index_history','hlargedeals','pe_pb','total_returns'],
-    "screener": ['from_low','from_high','volume','delivery']
-}
 
-DEFAULT_TYPES = {"stock": "info", "index": "indices", "screener": "from_low"}
+REQ_TYPES = registry.req_types()
+DEFAULT_TYPES = registry.defaults()
 
 
 def get_fy_start():
@@ -31,24 +30,12 @@ def get_today():
     return f"{d.day:02d}-{d.month:02d}-{d.year}"
 
 
-def build_filename(mode, req_type, name, end_date, start_date, suffix=""):
-    filename = f"@{mode}@{req_type}"
-    if name:
-        filename += f"@{name}"
-    if end_date:
-        filename += f"@{end_date}"
-    if start_date:
-        filename += f"@{start_date}"
-    if suffix:
-        filename += f"@{suffix}"
-    return filename + ".html"
-
-
 def fetch_data_internal(filename, force=False):
     try:
         base_url = "http://localhost:7860"
         url = f"{base_url}/file"
-        params = {"name": filename}
+        # the pane runs no scripts and read_html needs every row: no paged tables
+        params = {"name": filename, "full": "true"}
         if force:
             params["force"] = "true"
         
@@ -147,7 +134,7 @@ def create_interface():
                     # End Date (visible, prefilled today, user can change)
                     date_end = gr.Textbox(
                                 label=None,
-                                value=get_today(),
+                                value=get_today,   # evaluated per page load
                                 placeholder="End Date",
                                 show_label=False,
                                 container=False,
@@ -158,7 +145,7 @@ def create_interface():
                     # Start Date (HIDDEN - fixed to FY start)
                     date_start = gr.Textbox(
                         label=None,
-                        value=get_fy_start(),
+                        value=get_fy_start,
                         show_label=False,
                         container=False,
                         #elem_classes="hidden-field"
@@ -189,6 +176,10 @@ def create_interface():
                         elem_classes="status-badge",
                         min_width=150
                     )
+
+                    # The pane below doesn't run page scripts (live updates,
+                    # paged tables, JS charts): open the page itself for those
+                    open_link = gr.HTML(value="")
         
         # ==========================================
         # MAIN CONTENT AREA
@@ -217,11 +208,7 @@ def create_interface():
         
         # Update defaults when mode changes
         def update_defaults(m):
-            if m == "stock":
-                return "ITC"
-            elif m == "index":
-                return "NIFTY 50"
-            return ""
+            return registry.DEFAULT_NAMES.get(m, "")
         
         mode.change(update_defaults, inputs=mode, outputs=name)
         
@@ -231,6 +218,7 @@ def create_interface():
             
             # Loading state
             yield {
+                open_link: "",
                 status: gr.Textbox(value="⏳ Fetching...", elem_classes="status-badge status-fetching"),
                 html_out: "<div style='text-align:center;padding:60px;'><div style='font-size:48px;'>🔄</div><p>Loading data...</p></div>",
                 raw_out: "",
@@ -243,6 +231,7 @@ def create_interface():
             if result["success"]:
                 tables = extract_tables(result["content"])
                 yield {
+                    open_link: f"<a href='/file?name={quote(filename)}' target='_blank' rel='noopener'>↗ Open page</a>",
                     status: gr.Textbox(value=f"✅ {result['size']:,} chars", elem_classes="status-badge status-success"),
                     html_out: result["content"],
                     raw_out: result["content"],
@@ -259,18 +248,19 @@ def create_interface():
         btn_fetch.click(
             on_fetch,
             inputs=[mode, req_type, name, date_end, date_start, force],
-            outputs=[status, html_out, raw_out, table_out]
+            outputs=[status, html_out, raw_out, table_out, open_link]
         )
         
         # Clear
         def on_clear():
             return {
+                open_link: "",
                 status: gr.Textbox(value="Ready", elem_classes="status-badge"),
                 html_out: "<div style='text-align:center;padding:60px;color:#9ca3af;'><div style='font-size:64px;'>📈</div><p>Ready to fetch data...</p></div>",
                 raw_out: "",
                 table_out: pd.DataFrame()
             }
         
-        btn_clear.click(on_clear, outputs=[status, html_out, raw_out, table_out])
+        btn_clear.click(on_clear, outputs=[status, html_out, raw_out, table_out, open_link])
     
     return demo
\ No newline at end of file
@@ -0,0 +1,82 @@
+# lazyload.py — deferred handler imports and a startup-time report
+#
+# Handler modules (and what they pull in: yfinance, talib, bs4, ...) are
+# bound as LazyModule proxies and imported on first attribute access, i.e.
+# by the first request that needs them. That is all that is deferred:
+# pandas, numpy and requests still load at startup, with Gradio and with
+# the router's own helpers (common, tablewriter, persist, upstream). app.py
+# marks startup phases with mark(); report() lists those plus every
+# deferred import and what it cost.
+
+import importlib
+import sys
+import threading
+import time
+
+_T0 = time.perf_counter()
+
+_phases = []                   # [(name, ms since previous mark)]
+_last = _T0
+_imports = {}                  # module name -> {"ms": import time, "at_ms": when, since process start}
+_lock = threading.Lock()
+
+
+def mark(name):
+    """Close a startup phase (time since the previous mark)."""
+    global _last
+    now = time.perf_counter()
+    _phases.append((name, round((now - _last) * 1000, 1)))
+    _last = now
+
+
+class LazyModule:
+    """Stands in for a module until an attribute is first read."""
+
+    def __init__(self, name):
+        self._name = name
+        self._module = None
+
+    def _load(self):
+        if self._module is None:
+            with _lock:
+                if self._module is None:
+                    start = time.perf_counter()
+                    module = importlib.import_module(self._name)
+                    _imports[self._name] = {
+                        "ms": round((time.perf_counter() - start) * 1000, 1),
+                        "at_ms": round((start - _T0) * 1000, 1),
+                    }
+                    self._module = module
+        return self._module
+
+    def __getattr__(self, attr):
+        return getattr(self._load(), attr)
+
+    def __repr__(self):
+        state = "loaded" if self._module is not None else "deferred"
+        return f"<lazy module {self._name!r} ({state})>"
+
+
+def lazy(name):
+    return LazyModule(name)
+
+
+DEFERRED = "handler modules and their own imports (yfinance, talib, bs4, ...)"
+EAGER = ("pandas", "numpy", "requests")    # imported with Gradio and the router
+
+
+def report():
+    """Startup phases, total, deferred imports so far and how many modules are loaded."""
+    return {
+        "phases_ms": dict(_phases),
+        "startup_ms": round(sum(ms for _, ms in _phases), 1),
+        "deferred": DEFERRED,
+        "not_deferred": list(EAGER),
+        "deferred_imports": dict(_imports),
+        "modules_loaded": len(sys.modules),
+    }
+
+
+def summary_line():
+    phases = ", ".join(f"{n} {ms:.0f}ms" for n, ms in _phases)
+    return f"startup {sum(ms for _, ms in _phases):.0f}ms ({phases}); {len(sys.modules)} modules loaded"
@@ -0,0 +1,148 @@
+# limits.py — bulkheads for /file builds
+#
+# Cache hits are answered on the event loop and never wait behind a build.
+# Builds run in per-cost thread pools (cpu / network), apart from the
+# default AnyIO pool and from each other, behind a per-handler gate: at most
+# handler.limit builds of one page type run at once, at most handler.queue
+# wait, and none waits longer than QUEUE_TIMEOUT. A build that is turned
+# away raises Overloaded; the router answers it from the stale cached page
+# when there is one, else with 503 + Retry-After.
+
+import weakref
+
+import anyio
+from anyio import to_thread
+
+from app.metrics import metrics
+
+# ==============================
+# Configuration
+# ==============================
+THREADS = {"cpu": 4, "network": 16}     # worker threads per cost class
+QUEUE_TIMEOUT = 10.0                     # seconds a build may wait for its gate
+RETRY_AFTER = 5
+
+SHED = metrics.Counter("dashboard_file_shed_total", "Builds turned away by a bulkhead",
+                       ("mode", "req_type", "outcome"))
+
+
+class Overloaded(Exception):
+    pass
+
+
+_pools = {}
+_gates = {}
+
+
+def _pool(cost):
+    # created on first use: AnyIO primitives need the running event loop
+    pool = _pools.get(cost)
+    if pool is None:
+        pool = _pools[cost] = anyio.CapacityLimiter(THREADS[cost])
+    return pool
+
+
+class Gate:
+    """Concurrency + queue bound for one handler."""
+
+    def __init__(self, key, cost, limit, queue):
+        self.key = key
+        self.cost = cost
+        self.limit = limit
+        self.queue = queue
+        self.sem = anyio.Semaphore(limit)
+
+    @property
+    def waiting(self):
+        return self.sem.statistics().tasks_waiting
+
+    @property
+    def running(self):
+        return self.limit - self.sem.value
+
+    async def acquire(self):
+        if self.waiting >= self.queue:
+            raise Overloaded(self.key)
+        with anyio.move_on_after(QUEUE_TIMEOUT) as scope:
+            await self.sem.acquire()
+        if scope.cancelled_caught:
+            raise Overloaded(self.key)
+
+    def release(self):
+        self.sem.release()
+
+
+def gate(key, cost, limit, queue):
+    g = _gates.get(key)
+    if g is None:
+        g = _gates[key] = Gate(key, cost, limit, queue)
+    return g
+
+class Held:
+    """One slot of a gate, acquired up front; release() is idempotent."""
+
+    def __init__(self, g):
+        self.gate = g
+        self._released = False
+
+    def release(self):
+        if not self._released:
+            self._released = True
+            self.gate.release()
+
+
+async def hold(g):
+    """Acquire a slot of g (Overloaded if it is turned away) for the caller to hand on."""
+    await g.acquire()
+    return Held(g)
+
+# ==============================
+# Running builds
+# ==============================
+async def call(held, fn, *args):
+    """fn(*args) in the held gate's cost pool; the slot stays held."""
+    return await to_thread.run_sync(fn, *args, limiter=_pool(held.gate.cost))
+
+
+async def run(g, fn, *args):
+    """fn(*args) in g's cost pool once the gate admits it; Overloaded if it doesn't."""
+    held = await hold(g)
+    try:
+        return await call(held, fn, *args)
+    finally:
+        held.release()
+
+
+def stream(held, chunks):
+    """
+    Async iterator over a sync chunk generator, each next() in the held
+    gate's cost pool; the slot is released when the body ends, fails or is
+    abandoned, so a streamed build is admitted once, before its headers.
+    """
+    body = _stream(held, chunks)
+    # a response dropped before its body starts never reaches _stream's finally
+    weakref.finalize(body, held.release)
+    return body
+
+
+async def _stream(held, chunks):
+    pool = _pool(held.gate.cost)
+    try:
+        while True:
+            chunk = await to_thread.run_sync(next, chunks, None, limiter=pool)
+            if chunk is None:
+                break
+            yield chunk
+    finally:
+        chunks.close()
+        held.release()
+
+
+def stats():
+    """Per-pool and per-handler occupancy (for /api/threadpool)."""
+    return {
+        "pools": {c: {"total": p.total_tokens, "busy": p.borrowed_tokens,
+                      "waiting": p.statistics().tasks_waiting} for c, p in _pools.items()},
+        "gates": {"/".join(k): {"running": g.running, "waiting": g.waiting, "limit": g.limit, "queue": g.queue}
+                  for k, g in _gates.items() if g.running or g.waiting},
+    }
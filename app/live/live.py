@@ -0,0 +1,206 @@
+# live.py — one upstream poll per index, fanned out to SSE subscribers
+#
+# The first viewer of an index starts a Feed that polls ns.nse_index_live
+# (through its own bulkhead gate, one poll in flight per index) every
+# POLL_SEC while the market is open and every IDLE_SEC otherwise. Each poll
+# is diffed against the previous one and only the rows whose FIELDS moved
+# are pushed to every subscriber; a new subscriber gets the last snapshot
+# first. The feed stops polling when its last subscriber leaves, so
+# upstream load depends on the number of watched indices, not viewers.
+# Only names NSE publishes (allIndices) get a feed. The consumer is
+# static/nse_live.js, on the page opened from /file or injected by
+# index.html (which re-runs its scripts); the Gradio HTML pane does not run
+# scripts and links out to it instead.
+
+import asyncio
+import json
+import math
+from datetime import datetime as dt
+
+import pandas as pd
+
+from app.cache.cache import TTLCache
+from app.limits import limits
+from app.registry import registry
+from app.scheduler import scheduler
+
+# ==============================
+# Configuration
+# ==============================
+FIELDS = ("lastPrice", "pChange", "totalTradedVolume")
+POLL_SEC = 5                 # market (pre-)open
+IDLE_SEC = 60                # closed: prices don't move, keep the connection honest
+KEEPALIVE_SEC = 15           # comment line so proxies don't drop idle streams
+QUEUE_MAX = 64               # events buffered per slow client before it is resynced
+MAX_FEEDS = 16               # distinct indices polled at once
+
+
+_known = TTLCache(maxsize=1, ttl=registry.DAY)
+
+
+class TooManyFeeds(Exception):
+    pass
+
+
+def _log(msg):
+    print(f"[{dt.now().strftime('%Y-%m-%d %H:%M:%S')}] Live: {msg}")
+
+
+def _num(v):
+    v = pd.to_numeric(v, errors="coerce")
+    return None if v is None or (isinstance(v, float) and math.isnan(v)) else float(v)
+
+
+def fetch_rows(index):
+    """symbol -> {field: value} for the index row and its constituents."""
+    from app.nse import nsepythonmodified as ns
+    df = ns.nse_index_live(index).get("data", pd.DataFrame())
+    if df.empty or "symbol" not in df.columns:
+        return {}
+    cols = [c for c in FIELDS if c in df.columns]
+    return {str(row["symbol"]): {c: _num(row[c]) for c in cols}
+            for row in df[["symbol", *cols]].to_dict("records")}
+
+
+def normalise(name):
+    return " ".join(str(name).split()).upper()
+
+
+def _load_indices():
+    from app.nse import nsepythonmodified as ns
+    df = ns.indices()["data"]
+    if "index" not in df.columns:
+        raise RuntimeError("allIndices returned no index names")
+    return frozenset(normalise(n) for n in df["index"])
+
+
+async def known_indices():
+    """Index names NSE publishes, cached for a day (loaded off the event loop)."""
+    names = _known.get("all")
+    if names is None:
+        g = limits.gate(("live", "indices"), "network", 1, 64)
+        names = await limits.run(g, _known.get_or_load, "all", _load_indices)
+    return names
+
+
+def interval():
+    """Poll period for now; reads the trading calendar, so call it off the event loop."""
+    active = scheduler.active(scheduler.now_ist())
+    return POLL_SEC if ("session" in active or "preopen" in active) else IDLE_SEC
+
+# ==============================
+# Feed
+# ==============================
+class Feed:
+    """Polls one index while anyone is subscribed."""
+
+    def __init__(self, index):
+        self.index = index
+        self.rows = {}
+        self.subscribers = set()
+        self.polls = 0
+        self.updated = None
+        self.task = None
+        self.gate = limits.gate(("live", index), "network", 1, 1)
+
+    def subscribe(self):
+        """
+        New subscriber queue. Its first snapshot comes from here when the feed
+        has rows, else from the first poll's publish: never both.
+        """
+        q = asyncio.Queue(QUEUE_MAX)
+        if self.rows:
+            q.put_nowait(("snapshot", self.rows))
+        self.subscribers.add(q)
+        if self.task is None:
+            self.task = asyncio.get_running_loop().create_task(self._poll())
+        return q
+
+    def unsubscribe(self, q):
+        self.subscribers.discard(q)
+
+    def publish(self, kind, data):
+        for q in self.subscribers:
+            try:
+                q.put_nowait((kind, data))
+            except asyncio.QueueFull:
+                # client fell behind: drop its backlog, it gets the full state instead
+                while not q.empty():
+                    q.get_nowait()
+                q.put_nowait(("snapshot", self.rows))
+
+    async def _poll(self):
+        try:
+            while self.subscribers:
+                try:
+                    rows = await limits.run(self.gate, fetch_rows, self.index)
+                    self.polls += 1
+                    if not self.rows:
+                        self.rows = rows
+                        self.publish("snapshot", rows)
+                    else:
+                        changed = {s: r for s, r in rows.items() if self.rows.get(s) != r}
+                        self.rows = rows
+                        if changed:
+                            self.publish("update", changed)
+                    self.updated = dt.now()
+                except Exception as e:
+                    _log(f"{self.index} poll failed: {e}")
+                    self.publish("error", {"message": str(e)})
+                try:
+                    # the holiday calendar may need an upstream fetch: not on the loop
+                    wait = await limits.run(self.gate, interval)
+                except Exception:
+                    wait = POLL_SEC
+                await asyncio.sleep(wait)
+        finally:
+            self.task = None
+            if not self.subscribers and _feeds.get(self.index) is self:
+                del _feeds[self.index]
+
+
+_feeds = {}
+
+
+def feed(index):
+    f = _feeds.get(index)
+    if f is None:
+        if len(_feeds) >= MAX_FEEDS:
+            raise TooManyFeeds(index)
+        f = _feeds[index] = Feed(index)
+    return f
+
+# ==============================
+# SSE
+# ==============================
+def _event(kind, data):
+    return f"event: {kind}\ndata: {json.dumps(data, separators=(',', ':'))}\n\n"
+
+
+def subscribe(index):
+    """(feed, queue) for a new viewer of a known, normalised index; TooManyFeeds if it can't be polled."""
+    f = feed(index)
+    return f, f.subscribe()
+
+
+async def events(f, q):
+    """text/event-stream body: snapshot, then update events with changed rows only (all queued by the feed)."""
+    try:
+        yield f"retry: {POLL_SEC * 1000}\n\n"
+        while True:
+            try:
+                kind, data = await asyncio.wait_for(q.get(), KEEPALIVE_SEC)
+            except asyncio.TimeoutError:
+                yield ": keepalive\n\n"
+                continue
+            yield _event(kind, data)
+    finally:
+        f.unsubscribe(q)
+
+
+def stats():
+    return {
+        index: {"subscribers": len(f.subscribers), "rows": len(f.rows), "polls": f.polls,
+                "updated": f.updated.strftime("%Y-%m-%d %H:%M:%S") if f.updated else None}
+        for index, f in _feeds.items()
+    }
@@ -0,0 +1,182 @@
+# metrics.py — per-request stage timing and Prometheus text exposition
+#
+# get_file opens a RequestTimer per /file request; code underneath marks
+# stages with `with metrics.stage("fetch"):` (or @metrics.timed). Stages are
+# exclusive: time inside a nested stage is not counted in its parent, so
+# "process" is builder time minus upstream fetches and HTML rendering.
+# Results go to histograms keyed by (mode, req_type), served from /metrics.
+
+import threading
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+from contextvars import ContextVar
+from functools import wraps
+
+# ==============================
+# Configuration
+# ==============================
+BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+BYTE_BUCKETS = (1e3, 1e4, 5e4, 1e5, 5e5, 1e6, 5e6, 2e7)
+STAGES = ("fetch", "process", "render", "write")
+
+# ==============================
+# Instruments
+# ==============================
+def _escape(v):
+    return str(v).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _labels(names, values, extra=()):
+    pairs = list(zip(names, values)) + list(extra)
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{k}="{_escape(v)}"' for k, v in pairs) + "}"
+
+
+class Counter:
+    def __init__(self, name, help, labels=()):
+        self.name, self.help, self.labels = name, help, tuple(labels)
+        self._values = defaultdict(float)
+        self._lock = threading.Lock()
+        _registry.append(self)
+
+    def inc(self, labels=(), n=1.0):
+        with self._lock:
+            self._values[tuple(labels)] += n
+
+    def expose(self):
+        yield f"# HELP {self.name} {self.help}"
+        yield f"# TYPE {self.name} counter"
+        with self._lock:
+            items = sorted(self._values.items())
+        for lv, v in items:
+            yield f"{self.name}{_labels(self.labels, lv)} {v:g}"
+
+
+class Histogram:
+    def __init__(self, name, help, labels=(), buckets=BUCKETS):
+        self.name, self.help, self.labels = name, help, tuple(labels)
+        self.buckets = tuple(buckets)
+        self._series = {}            # labels -> [bucket counts..., sum, count]
+        self._lock = threading.Lock()
+        _registry.append(self)
+
+    def observe(self, labels, value):
+        labels = tuple(labels)
+        with self._lock:
+            s = self._series.get(labels)
+            if s is None:
+                s = self._series[labels] = [0] * len(self.buckets) + [0.0, 0]
+            for i, b in enumerate(self.buckets):
+                if value <= b:
+                    s[i] += 1
+            s[-2] += value
+            s[-1] += 1
+
+    def expose(self):
+        yield f"# HELP {self.name} {self.help}"
+        yield f"# TYPE {self.name} histogram"
+        with self._lock:
+            items = sorted((k, list(v)) for k, v in self._series.items())
+        for lv, s in items:
+            for b, c in zip(self.buckets, s):
+                yield f"{self.name}_bucket{_labels(self.labels, lv, [('le', f'{b:g}')])} {c}"
+            yield f"{self.name}_bucket{_labels(self.labels, lv, [('le', '+Inf')])} {s[-1]}"
+            yield f"{self.name}_sum{_labels(self.labels, lv)} {s[-2]:.6f}"
+            yield f"{self.name}_count{_labels(self.labels, lv)} {s[-1]}"
+
+
+_registry = []
+
+REQUESTS = Counter("dashboard_file_requests_total", "/file requests", ("mode", "req_type", "cache", "status"))
+LATENCY = Histogram("dashboard_file_seconds", "/file handler time until the response is complete",
+                    ("mode", "req_type", "cache"))
+STAGE = Histogram("dashboard_file_stage_seconds", "Exclusive time per build stage",
+                  ("mode", "req_type", "stage"))
+BYTES = Histogram("dashboard_file_bytes", "Bytes written to the page cache per build",
+                  ("mode", "req_type"), buckets=BYTE_BUCKETS)
+
+
+def render():
+    """All metrics in Prometheus text format (version 0.0.4)."""
+    lines = []
+    for m in _registry:
+        lines.extend(m.expose())
+    return "\n".join(lines) + "\n"
+
+# ==============================
+# Request timer
+# ==============================
+class RequestTimer:
+    def __init__(self, mode, req_type):
+        self.labels = (mode, req_type)
+        self.cache = "hit"
+        self.bytes = 0
+        self.stages = defaultdict(float)
+        self._start = time.perf_counter()
+        self._stack = []             # [name, resumed_at]
+        self._done = False
+
+    @contextmanager
+    def stage(self, name):
+        now = time.perf_counter()
+        if self._stack:
+            parent = self._stack[-1]
+            self.stages[parent[0]] += now - parent[1]
+        frame = [name, now]
+        self._stack.append(frame)
+        try:
+            yield
+        finally:
+            now = time.perf_counter()
+            self._stack.pop()
+            self.stages[name] += now - frame[1]
+            if self._stack:
+                self._stack[-1][1] = now
+
+    def finish(self, status="ok"):
+        if self._done:
+            return
+        self._done = True
+        total = time.perf_counter() - self._start
+        REQUESTS.inc(self.labels + (self.cache, status))
+        LATENCY.observe(self.labels + (self.cache,), total)
+        for name, secs in self.stages.items():
+            STAGE.observe(self.labels + (name,), secs)
+        if self.cache == "miss":
+            BYTES.observe(self.labels, self.bytes)
+
+
+_current = ContextVar("request_timer", default=None)
+
+
+@contextmanager
+def activate(timer):
+    """Make timer the target of stage() in this context (e.g. per streamed chunk)."""
+    token = _current.set(timer)
+    try:
+        yield timer
+    finally:
+        _current.reset(token)
+
+
+@contextmanager
+def stage(name):
+    timer = _current.get()
+    if timer is None:
+        yield
+        return
+    with timer.stage(name):
+        yield
+
+
+def timed(name):
+    """Decorator form of stage(name) for plain (non-generator) functions."""
+    def deco(fn):
+        @wraps(fn)
+        def wrapper(*args, **kwargs):
+            with stage(name):
+                return fn(*args, **kwargs)
+        return wrapper
+    return deco
@@ -2,14 +2,28 @@ import pandas as pd
 
 from app.nse import nsepythonmodified as ns
 from app.persist import persist
+from app.registry import registry
+from app.tablewriter import tablewriter as tw
+from app.tablewriter import paged
+from app.static import assets
 
 from datetime import datetime as dt
 
 
+CSS = assets.style_tag("bhavcopy.css")
+
+
 def build_bhavcopy_html(date_str):
-    key = f"bhavcopy_{date_str}"
+    return "".join(iter_bhavcopy_html(date_str))
 
 
+def iter_bhavcopy_html(date_str):
+    """
+    Same page as build_bhavcopy_html, yielded in pieces: the stylesheet goes
+    out before the bhavcopy download; the main table ships its first page
+    and fetches the rest on demand.
+    """
+    key = f"bhavcopy_{date_str}"
 
     try:
         # -------------------------------------------------------
@@ -19,8 +33,12 @@ def build_bhavcopy_html(date_str):
             dt.strptime(date_str, "%d-%m-%Y")
         except ValueError:
             html = "<h3>Invalid date format. Use DD-MM-YYYY.</h3>"
+            registry.failed()
             persist.save(key, html, "html")
-            return html
+            yield html
+            return
+
+        yield CSS
 
         # -------------------------------------------------------
         # 2) Fetch Bhavcopy (nsepython expects DD-MM-YYYY)
@@ -29,9 +47,9 @@ def build_bhavcopy_html(date_str):
             df = ns.nse_bhavcopy(date_str)
             df.columns = df.columns.str.strip()
         except Exception:
-            html = f"<h3>No Bhavcopy found for {date_str}.</h3>"
-
-            return html
+            registry.failed()
+            yield f"<h3>No Bhavcopy found for {date_str}.</h3>"
+            return
 
         # -------------------------------------------------------
         # 3) Drop unwanted columns
@@ -77,63 +95,31 @@ def build_bhavcopy_html(date_str):
         # -------------------------------------------------------
         # 7) HTML Output
         # -------------------------------------------------------
-        main_html = f"""
-        <div class="main-table-container">
-            {df.to_html(index=False, escape=False)}
-        </div>
-        """
+        yield "<h2>Main Bhavcopy Table</h2>"
+        yield '<div class="main-table-container">'
+        yield from paged.iter_paged_html(df, f"bhav:{date_str}", escape=False)
+        yield "</div>"
 
         metrics = ["perchange", "pergap", "TURNOVER_LACS", "NO_OF_TRADES", "DELIV_PER"]
-        col_html = []
 
+        yield "<h2>Matrix/Grid Table</h2>"
+        yield '<div class="grid">'
         for m in metrics:
             if m in df.columns:
                 temp = df[["SYMBOL", m]].sort_values(m, ascending=False)
-                col_html.append(
-                    f"""
+                yield f"""
                     <div class="col">
                         <h4>{m}</h4>
-                        {temp.to_html(index=False, escape=False)}
+                        {tw.to_html(temp, index=False, escape=False)}
                     </div>
                     """
-                )
-
-        grid_html = f"""
-        <div class="grid">
-            {''.join(col_html)}
-        </div>
-        """
-
-        css = """
-        <style>
-            .grid { display: grid; grid-template-columns: repeat(5, 1fr); gap: 10px; }
-            .col, .main-table-container {
-                max-height: 480px; overflow-y: auto;
-                border: 1px solid #ccc; padding: 4px;
-            }
-            table { font-size: 12px; width: 100%; border-collapse: collapse; }
-            th, td { border: 1px solid #ddd; padding: 4px; }
-            th {
-                background: #2E7D32; color: white;
-                position: sticky; top: 0;
-            }
-        </style>
-        """
-
-        html = (
-            css +
-            "<h2>Main Bhavcopy Table</h2>" +
-            main_html +
-            "<h2>Matrix/Grid Table</h2>" +
-            grid_html
-        )
-
-
-        return html
+        yield "</div>"
+        registry.succeeded()
 
     except Exception as e:
         print(
             f"[{dt.now().strftime('%Y-%m-%d %H:%M:%S')}] "
             f"Error build_bhavcopy_html: {e}"
         )
-        return f"<h3>Error: {e}</h3>"
\ No newline at end of file
+        registry.failed()
+        yield f"<h3>Error: {e}</h3>"
@@ -1,10 +1,11 @@
 import zipfile
 import io
 import pandas as pd
-import requests
 from datetime import datetime as dt
 
 from app.persist import persist
+from app.registry import registry
+from app.upstream import upstream
 
 NSE_FO_BASE = "https://archives.nseindia.com/content/fo"
 
@@ -28,7 +29,7 @@ def fetch_fo_bhavcopy(fo_date: str) -> pd.DataFrame:
     url = f"{NSE_FO_BASE}/{zip_name}"
 
     headers = {"User-Agent": "Mozilla/5.0"}
-    r = requests.get(url, headers=headers, timeout=10)
+    r = upstream.get(None, url, headers=headers, timeout=10)
     if r.status_code != 200:
         raise RuntimeError(f"FO bhavcopy download failed ({r.status_code})")
 
@@ -95,10 +96,10 @@ def nse_fno_html(fo_date: str, symbol: str) -> str:
     else:
         fo_df = fetch_fo_bhavcopy(fo_date)
 
+    # stubs below are not persisted (or prewarmed): a later build may find the data
     if fo_df.empty:
-        html = "<h3>FO Bhavcopy empty</h3>"
-        persist.save(html_name, html, "html")
-        return html
+        registry.failed()
+        return "<h3>FO Bhavcopy empty</h3>"
 
     fo = fo_df.copy()
     exp = pd.to_datetime(fo["FininstrmActlXpryDt"], errors="coerce")
@@ -106,18 +107,16 @@ def nse_fno_html(fo_date: str, symbol: str) -> str:
 
     monthly = exp[exp >= today].groupby([exp.dt.year, exp.dt.month]).max()
     if monthly.empty:
-        html = "<h3>No valid expiry</h3>"
-        persist.save(html_name, html, "html")
-        return html
+        registry.failed()
+        return "<h3>No valid expiry</h3>"
 
     expiry = monthly.iloc[0].strftime("%d-%m-%Y")
     fo["EXP"] = exp.dt.strftime("%d-%m-%Y")
 
     df = fo[(fo["TckrSymb"] == symbol) & (fo["EXP"] == expiry)]
     if df.empty:
-        html = f"<h3>No F&O data for {symbol}</h3>"
-        persist.save(html_name, html, "html")
-        return html
+        registry.failed()
+        return f"<h3>No F&O data for {symbol}</h3>"
 
     fut_df = df[df["FinInstrmTp"].isin(["STF", "IDF"])]
     opt_df = df[df["FinInstrmTp"].isin(["STO", "IDO"])]
@@ -151,4 +150,5 @@ h2,h3,h4 {{ margin:6px 0; }}
 </html>
 """
 
+    registry.succeeded()
     return html
@@ -3,6 +3,8 @@ import pandas as pd
 from datetime import datetime
 import re
 
+from app.static import assets
+
 
 def build_eq_html(symbol):
     """
@@ -228,250 +230,7 @@ def build_eq_html(symbol):
 <meta charset="UTF-8">
 <meta name="viewport" content="width=device-width, initial-scale=1.0">
 <title>Equity Report - {symbol}</title>
-<style>
-:root {{
-    --primary: #1a5f9e;
-    --primary-light: #2980b9;
-    --accent: #e74c3c;
-    --success: #27ae60;
-    --warning: #f39c12;
-    --bg: #f0f2f5;
-    --card-bg: #ffffff;
-    --border: #e1e8ed;
-    --text: #2c3e50;
-    --text-muted: #7f8c8d;
-    --shadow: 0 2px 8px rgba(0,0,0,0.08);
-    --shadow-hover: 0 4px 16px rgba(0,0,0,0.12);
-}}
-
-* {{
-    box-sizing: border-box;
-    margin: 0;
-    padding: 0;
-}}
-
-body {{
-    font-family: -apple-system, BlinkMacSystemFont, "Segoe UI", Roboto, "Helvetica Neue", Arial, sans-serif;
-    background: var(--bg);
-    color: var(--text);
-    line-height: 1.6;
-}}
-
-.header {{
-    background: linear-gradient(135deg, var(--primary) 0%, var(--primary-light) 100%);
-    color: white;
-    padding: 30px 20px;
-    text-align: center;
-    box-shadow: var(--shadow);
-}}
-
-.header h1 {{
-    font-size: 36px;
-    font-weight: 700;
-    margin-bottom: 8px;
-}}
-
-.header .subtitle {{
-    opacity: 0.9;
-    font-size: 16px;
-}}
-
-.container {{
-    max-width: 1200px;
-    margin: 0 auto;
-    padding: 20px;
-}}
-
-.section {{
-    background: var(--card-bg);
-    border-radius: 12px;
-    margin-bottom: 20px;
-    box-shadow: var(--shadow);
-    overflow: hidden;
-    animation: fadeIn 0.5s ease-out;
-}}
-
-@keyframes fadeIn {{
-    from {{ opacity: 0; transform: translateY(20px); }}
-    to {{ opacity: 1; transform: translateY(0); }}
-}}
-
-.section-header {{
-    padding: 16px 20px;
-    background: linear-gradient(to right, #f8f9fa, #ffffff);
-    border-bottom: 1px solid var(--border);
-}}
-
-.section-title {{
-    font-size: 18px;
-    font-weight: 700;
-    color: var(--primary);
-    display: flex;
-    align-items: center;
-    gap: 10px;
-}}
-
-.section-title .icon {{
-    font-size: 22px;
-}}
-
-.section-body {{
-    padding: 20px;
-}}
-
-/* Cards Grid */
-.cards-grid {{
-    display: grid;
-    grid-template-columns: repeat(auto-fill, minmax(260px, 1fr));
-    gap: 16px;
-}}
-
-.card {{
-    background: var(--card-bg);
-    border: 1px solid var(--border);
-    border-radius: 10px;
-    padding: 16px;
-    transition: all 0.3s ease;
-    position: relative;
-    overflow: hidden;
-}}
-
-.card:hover {{
-    box-shadow: var(--shadow-hover);
-    transform: translateY(-2px);
-    border-color: var(--primary-light);
-}}
-
-.card.highlight {{
-    background: linear-gradient(135deg, #f8f9fa 0%, #ffffff 100%);
-    border: 2px solid var(--primary-light);
-    border-left: 4px solid var(--primary);
-}}
-
-.card-label {{
-    font-size: 11px;
-    text-transform: uppercase;
-    letter-spacing: 0.5px;
-    color: var(--text-muted);
-    margin-bottom: 6px;
-    font-weight: 600;
-}}
-
-.card-value {{
-    font-size: 16px;
-    font-weight: 700;
-    color: var(--text);
-    word-break: break-word;
-}}
-
-/* List Container */
-.list-container {{
-    border-radius: 10px;
-    overflow: hidden;
-    border: 1px solid var(--border);
-}}
-
-.list-header {{
-    display: grid;
-    grid-template-columns: repeat(auto-fit, minmax(120px, 1fr));
-    gap: 12px;
-    padding: 14px 16px;
-    background: var(--primary);
-    color: white;
-    font-weight: 600;
-    font-size: 12px;
-    text-transform: uppercase;
-    letter-spacing: 0.5px;
-}}
-
-.list-row {{
-    display: grid;
-    grid-template-columns: repeat(auto-fit, minmax(120px, 1fr));
-    gap: 12px;
-    padding: 12px 16px;
-    border-bottom: 1px solid var(--border);
-    background: white;
-    transition: background 0.2s;
-}}
-
-.list-row:hover {{
-    background: #f8f9fa;
-}}
-
-.list-row:last-child {{
-    border-bottom: none;
-}}
-
-.list-cell {{
-    font-size: 14px;
-    color: var(--text);
-}}
-
-/* Badges */
-.badge {{
-    display: inline-block;
-    padding: 3px 8px;
-    border-radius: 10px;
-    font-size: 11px;
-    font-weight: 600;
-    text-transform: uppercase;
-}}
-
-.badge.success {{
-    background: #d4edda;
-    color: #155724;
-}}
-
-.badge.danger {{
-    background: #f8d7da;
-    color: #721c24;
-}}
-
-.badge.warning {{
-    background: #fff3cd;
-    color: #856404;
-}}
-
-.badge.info {{
-    background: #d1ecf1;
-    color: #0c5460;
-}}
-
-.empty {{
-    text-align: center;
-    padding: 40px;
-    color: var(--text-muted);
-    font-style: italic;
-}}
-
-/* Responsive */
-@media (max-width: 768px) {{
-    .header h1 {{
-        font-size: 28px;
-    }}
-    
-    .cards-grid {{
-        grid-template-columns: 1fr;
-    }}
-    
-    .list-header,
-    .list-row {{
-        grid-template-columns: 1fr;
-        gap: 8px;
-    }}
-    
-    .list-header {{
-        display: none;
-    }}
-    
-    .list-row {{
-        padding: 16px;
-        border: 1px solid var(--border);
-        border-radius: 8px;
-        margin-bottom: 8px;
-    }}
-}}
-</style>
+{assets.style_tag("eq.css")}
 </head>
 <body>
 <div class="header">
@@ -3,6 +3,8 @@ from app.nse import nsepythonmodified as ns
 import html
 from datetime import datetime as dt
 
+from app.static import assets
+
 # Your allowed indices list
 ALLOWED_INDICES = [
     "NIFTY 50", "NIFTY 100", "NIFTY 200", "NIFTY 500", "NIFTY BANK",
@@ -16,8 +18,26 @@ ALLOWED_INDICES = [
     "NIFTY IND TOURISM", "NIFTY CAPITAL MKT", "NIFTY EV"
 ]
 
+# ================= CSS =================
+CSS = assets.style_tag("indices.css")
+
+HEAD = "".join([
+    "<!DOCTYPE html>",
+    "<html>",
+    "<head>",
+    "<meta charset='utf-8'>",
+    "<title>NSE Indices</title>",
+    CSS,
+    "</head>",
+    "<body>",
+])
+
 
 def build_indices_html():
+    return "".join(iter_indices_html())
+
+
+def iter_indices_html():
     """
     Generates simplified HTML for NSE Indices
     - Only allowed indices
@@ -26,13 +46,17 @@ def build_indices_html():
     - No category sections
     """
 
+    # Page head goes out before the upstream fetch
+    yield HEAD
+
     # Fetch data
     p = ns.indices()
     data_df = p.get("data", pd.DataFrame())
     dates_df = p.get("dates", pd.DataFrame())
 
     if data_df.empty:
-        return "<p>No data available.</p>"
+        yield "<p>No data available.</p></body></html>"
+        return
 
     # Filter to allowed indices only
     records = data_df.to_dict(orient="records")
@@ -42,7 +66,8 @@ def build_indices_html():
     ]
 
     if not filtered_records:
-        return "<p>No matching indices found.</p>"
+        yield "<p>No matching indices found.</p></body></html>"
+        return
 
     # Columns to exclude (key, index, and hidden metadata)
     exclude_cols = {
@@ -93,107 +118,11 @@ def build_indices_html():
     # Build main indices table
     main_html = build_table(filtered_records, display_cols)
 
-    # ================= CSS =================
-    css = """
-    <style>
-    body { 
-        font-family: -apple-system, BlinkMacSystemFont, 'Segoe UI', Roboto, Arial, sans-serif; 
-        padding: 20px; 
-        background: #f8fafc; 
-        color: #1e293b; 
-        margin: 0;
-    }
-    h2 { 
-        color: #334155; 
-        font-size: 18px; 
-        margin: 20px 0 12px 0;
-        padding-bottom: 8px;
-        border-bottom: 2px solid #e2e8f0;
-    }
-    table { 
-        border-collapse: collapse; 
-        width: 100%; 
-        margin-bottom: 16px;
-        background: white;
-        box-shadow: 0 1px 3px rgba(0,0,0,0.1);
-        border-radius: 8px;
-        overflow: hidden;
-    }
-    th, td { 
-        border: 1px solid #e2e8f0; 
-        padding: 10px 12px; 
-        font-size: 13px;
-        text-align: left;
-    }
-    th { 
-        background: #3b82f6; 
-        color: #fff; 
-        font-weight: 600;
-        text-transform: uppercase;
-        font-size: 11px;
-        letter-spacing: 0.5px;
-    }
-    tr:nth-child(even) { background: #f8fafc; }
-    tr:hover { background: #eff6ff; }
-    td { color: #475569; }
-    
-    /* First column (indexSymbol) styling */
-    td:first-child, th:first-child {
-        font-weight: 600;
-        color: #1e40af;
-        background: #eff6ff;
-    }
-    
-    .scroll { 
-        max-height: 600px; 
-        overflow: auto;
-        border-radius: 8px;
-        box-shadow: 0 4px 6px -1px rgba(0,0,0,0.1);
-    }
-    .dates-section {
-        background: white;
-        padding: 16px;
-        border-radius: 8px;
-        margin-bottom: 20px;
-        box-shadow: 0 1px 3px rgba(0,0,0,0.1);
-    }
-    .dates-section h2 {
-        margin-top: 0;
-        color: #059669;
-        border-bottom-color: #10b981;
-    }
-    .main-section {
-        background: white;
-        padding: 16px;
-        border-radius: 8px;
-        box-shadow: 0 1px 3px rgba(0,0,0,0.1);
-    }
-    .count-badge {
-        display: inline-block;
-        background: #3b82f6;
-        color: white;
-        padding: 4px 12px;
-        border-radius: 12px;
-        font-size: 12px;
-        font-weight: 600;
-        margin-left: 10px;
-    }
-    </style>
-    """
 
     # ================= FINAL HTML =================
     count_badge = f'<span class="count-badge">{len(filtered_records)} indices</span>'
     
     html_parts = [
-        "<!DOCTYPE html>",
-        "<html>",
-        "<head>",
-        "<meta charset='utf-8'>",
-        "<title>NSE Indices</title>",
-        css,
-        "</head>",
-        "<body>",
-        
         # Dates section on top
         '<div class="dates-section">' if dates_html else "",
         '<h2>📅 Market Dates</h2>' if dates_html else "",
@@ -213,4 +142,4 @@ def build_indices_html():
         "</body></html>"
     ]
 
-    return "".join(html_parts)
\ No newline at end of file
+    yield "".join(html_parts)
\ No newline at end of file
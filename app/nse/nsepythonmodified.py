@@ -4,12 +4,18 @@
 # Uses session + curl fallback for reliability
 # ==============================
 
-import os, sys, json, random, datetime, time, logging, re, urllib.parse, zipfile
+import os, sys, json, random, datetime, time, logging, re, threading, urllib.parse, zipfile
 from collections import Counter
 from io import BytesIO, StringIO
 import pandas as pd
 import requests
 
+from app.tablewriter.tablewriter import to_html as df_html
+from app.tablewriter.paged import paged_html
+from app.metrics import metrics
+from app.registry import registry
+from app.upstream import upstream
+
 # ------------------------- HEADERS -------------------------
 headers = {
     "accept": "text/html,application/xhtml+xml,application/xml;q=0.9,image/avif,image/webp,image/apng,*/*;q=0.8",
@@ -51,18 +57,29 @@ class NSESession:
         self.s = requests.Session()
         self.base_urls = ["https://www.nseindia.com", "https://www.nseindia.com/option-chain"]
         self.cookies_file = "nse_cookies.txt"
-        self.init_session()
+        self._ready = False
+        self._lock = threading.Lock()
 
     def init_session(self):
         for url in self.base_urls:
             try:
-                self.s.get(url, headers=headers, timeout=10)
+                upstream.get(self.s, url, headers=headers, timeout=10)
             except:
                 pass
 
+    def ensure(self):
+        """Fetch the cookie pages on first use rather than at import (keeps startup off the network)."""
+        if self._ready:
+            return
+        with self._lock:
+            if not self._ready:
+                self.init_session()
+                self._ready = True
+
     def get_json(self, url):
+        self.ensure()
         try:
-            r = self.s.get(url, headers=headers, timeout=10)
+            r = upstream.get(self.s, url, headers=headers, timeout=10)
             r.raise_for_status()
             return r.json()
         except:
@@ -70,8 +87,9 @@ class NSESession:
             return self.curl_json(url)
 
     def get_text(self, url):
+        self.ensure()
         try:
-            r = self.s.get(url, headers=headers, timeout=10)
+            r = upstream.get(self.s, url, headers=headers, timeout=10)
             r.raise_for_status()
             return r.text
         except:
@@ -79,31 +97,32 @@ class NSESession:
             return self.curl_text(url)
 
     def download_file(self, url, local_path):
+        self.ensure()
         try:
-            r = self.s.get(url, headers=headers, timeout=10)
+            r = upstream.get(self.s, url, headers=headers, timeout=10)
             r.raise_for_status()
             with open(local_path, "wb") as f:
                 f.write(r.content)
             return local_path
         except:
             # fallback: curl
-            cmd = f'curl -s -L -o {local_path} "{url}"'
-            os.system(cmd)
+            data = upstream.curl(url, "-L")
+            if data:
+                with open(local_path, "wb") as f:
+                    f.write(data)
             if os.path.exists(local_path):
                 return local_path
             return None
 
     def curl_json(self, url):
         try:
-            cmd = f'curl -s -H "User-Agent: Mozilla/5.0" "{url}"'
-            raw = os.popen(cmd).read()
+            raw = upstream.curl(url, '-H "User-Agent: Mozilla/5.0"')
             return json.loads(raw)
         except:
             return {}
 
     def curl_text(self, url):
-        cmd = f'curl -s -L "{url}"'
-        return os.popen(cmd).read()
+        return upstream.curl(url, "-L").decode("utf-8", errors="replace")
 
 # Create global session
 nse_session = NSESession()
@@ -153,15 +172,19 @@ def _fmt_date(d):
     return d.replace("-", "")
 
 # ------------------------- NSE APIs -------------------------
+@metrics.timed("fetch")
 def nsefetch(url):
     return nse_session.get_json(url)
 
+@metrics.timed("fetch")
 def nse_csv_fetch(url):
     return nse_session.get_text(url)
 
+@metrics.timed("fetch")
 def nse_zip_csv_fetch(url):
+    nse_session.ensure()
     try:
-        r = nse_session.s.get(url, headers=headers, timeout=10)
+        r = upstream.get(nse_session.s, url, headers=headers, timeout=10)
         z = zipfile.ZipFile(BytesIO(r.content))
         dfs = []
         for name in z.namelist():
@@ -204,12 +227,12 @@ def nse_results(index="equities",period="Quarterly"):
         return pd.json_normalize(nsefetch(f'https://www.nseindia.com/api/corporates-financial-results?index={index}&period={period}'))
     print("Invalid Input")
 
-def nse_events(): return pd.json_normalize(nsefetch('https://www.nseindia.com/api/event-calendar')).to_html()
+def nse_events(): return df_html(pd.json_normalize(nsefetch('https://www.nseindia.com/api/event-calendar')))
 def nse_past_results(symbol): return nsefetch('https://www.nseindia.com/api/results-comparision?symbol='+nsesymbolpurify(symbol))
 def nse_blockdeal(): return nsefetch('https://nseindia.com/api/block-deal')
 def nse_marketStatus(): return nsefetch('https://nseindia.com/api/marketStatus')
 def nse_circular(mode="latest"): return nsefetch('https://www.nseindia.com/api/latest-circular' if mode=="latest" else 'https://www.nseindia.com/api/circulars')
-def nse_fiidii(mode="pandas"): return pd.DataFrame(nsefetch('https://www.nseindia.com/api/fiidiiTradeReact')).to_html()
+def nse_fiidii(mode="pandas"): return df_html(pd.DataFrame(nsefetch('https://www.nseindia.com/api/fiidiiTradeReact')))
 
 def nsetools_get_quote(symbol):
     p=nsefetch('https://www.nseindia.com/api/equity-stockIndices?index=SECURITIES%20IN%20F%26O')
@@ -219,6 +242,7 @@ def nsetools_get_quote(symbol):
 def nse_index(): return pd.DataFrame(nsefetch('https://iislliveblob.niftyindices.com/jsonfiles/LiveIndicesWatch.json')['data'])
 
 # ------------------------- INDEX FUNCTIONS -------------------------
+@metrics.timed("fetch")
 def index_history(symbol, start_date, end_date):
     # Convert frontend format → NSE expected format
     start_date = datetime.strptime(start_date, "%d-%m-%Y").strftime("%d%m%Y")
@@ -233,7 +257,8 @@ def index_history(symbol, start_date, end_date):
         )
     }
 
-    payload = nse_session.s.post(
+    payload = upstream.post(
+        nse_session.s,
         'https://niftyindices.com/Backpage.aspx/getHistoricaldatatabletoString',
         headers=niftyindices_headers,
         json=data
@@ -241,38 +266,44 @@ def index_history(symbol, start_date, end_date):
 
     payload = json.loads(payload["d"])
 
-    return pd.DataFrame.from_records(payload).to_html()
+    return df_html(pd.DataFrame.from_records(payload))
 
+@metrics.timed("fetch")
 def index_pe_pb_div(symbol, start_date, end_date):
     start_date = datetime.strptime(start_date, "%d-%m-%Y").strftime("%d%m%Y")
     end_date   = datetime.strptime(end_date, "%d-%m-%Y").strftime("%d%m%Y")
     data = {'cinfo': f"{{'name':'{symbol}','startDate':'{start_date}','endDate':'{end_date}','indexName':'{symbol}'}}"}
-    payload = nse_session.s.post('https://niftyindices.com/Backpage.aspx/getpepbHistoricaldataDBtoString', headers=niftyindices_headers, json=data).json()
+    payload = upstream.post(nse_session.s, 'https://niftyindices.com/Backpage.aspx/getpepbHistoricaldataDBtoString', headers=niftyindices_headers, json=data).json()
     payload = json.loads(payload["d"])
-    return pd.DataFrame.from_records(payload).to_html()
+    return df_html(pd.DataFrame.from_records(payload))
 
+@metrics.timed("fetch")
 def index_total_returns(symbol, start_date, end_date):
     start_date = datetime.strptime(start_date, "%d-%m-%Y").strftime("%d%m%Y")
     end_date   = datetime.strptime(end_date, "%d-%m-%Y").strftime("%d%m%Y")
     data = {'cinfo': f"{{'name':'{symbol}','startDate':'{start_date}','endDate':'{end_date}','indexName':'{symbol}'}}"}
-    payload = nse_session.s.post('https://niftyindices.com/Backpage.aspx/getTotalReturnIndexString', headers=niftyindices_headers, json=data).json()
+    payload = upstream.post(nse_session.s, 'https://niftyindices.com/Backpage.aspx/getTotalReturnIndexString', headers=niftyindices_headers, json=data).json()
     payload = json.loads(payload["d"])
-    return pd.DataFrame.from_records(payload).to_html()
+    return df_html(pd.DataFrame.from_records(payload))
 
 # ------------------------- CSV / BHAV -------------------------
-def nse_bhavcopy(d): return pd.read_csv("https://archives.nseindia.com/products/content/sec_bhavdata_full_"+d.replace("-","")+".csv")
-def nse_bulkdeals(): return pd.read_csv("https://archives.nseindia.com/content/equities/bulk.csv").to_html()
-def nse_blockdeals(): return pd.read_csv("https://archives.nseindia.com/content/equities/block.csv").to_html()
+@metrics.timed("fetch")
+def nse_bhavcopy(d): return upstream.read_csv("https://archives.nseindia.com/products/content/sec_bhavdata_full_"+d.replace("-","")+".csv")
+@metrics.timed("fetch")
+def nse_bulkdeals(): return paged_html(upstream.read_csv("https://archives.nseindia.com/content/equities/bulk.csv"), f"bulkdeals:{datetime.date.today()}")
+@metrics.timed("fetch")
+def nse_blockdeals(): return paged_html(upstream.read_csv("https://archives.nseindia.com/content/equities/block.csv"), f"blockdeals:{datetime.date.today()}")
 
 def nse_preopen(key):
     p=nsefetch("https://www.nseindia.com/api/market-data-pre-open?key="+key)
     return {"data":df_from_data(p.pop("data")), "rem":df_from_data([p])}
 
 def nse_most_active(t="securities",s="value"):
-    return pd.DataFrame(nsefetch(f"https://www.nseindia.com/api/live-analysis-most-active-{t}?index={s}")["data"]).to_html()
+    return df_html(pd.DataFrame(nsefetch(f"https://www.nseindia.com/api/live-analysis-most-active-{t}?index={s}")["data"]))
 
+@metrics.timed("fetch")
 def nse_eq_symbols():
-    return pd.read_csv('https://archives.nseindia.com/content/equities/EQUITY_L.csv')['SYMBOL'].tolist()
+    return upstream.read_csv('https://archives.nseindia.com/content/equities/EQUITY_L.csv')['SYMBOL'].tolist()
 
 def nse_price_band_hitters(b="both",v="AllSec"):
     p=nsefetch("https://www.nseindia.com/api/live-analysis-price-band-hitter")
@@ -280,16 +311,16 @@ def nse_price_band_hitters(b="both",v="AllSec"):
 
 def nse_largedeals(mode="bulk_deals"):
     p=nsefetch('https://www.nseindia.com/api/snapshot-capital-market-largedeal')
-    return pd.DataFrame(p["BULK_DEALS_DATA" if mode=="bulk_deals" else "SHORT_DEALS_DATA" if mode=="short_deals" else "BLOCK_DEALS_DATA"]).to_html()
+    return df_html(pd.DataFrame(p["BULK_DEALS_DATA" if mode=="bulk_deals" else "SHORT_DEALS_DATA" if mode=="short_deals" else "BLOCK_DEALS_DATA"]))
 
 def nse_largedeals_historical(f,t,mode="bulk_deals"):
     m = "bulk-deals" if mode=="bulk_deals" else "short-selling" if mode=="short_deals" else "block-deals"
     p=nsefetch(f'https://www.nseindia.com/api/historical/{m}?from={f}&to={t}')
-    return pd.DataFrame(p["data"]).to_html()
+    return paged_html(pd.DataFrame(p["data"]), f"largedeals_historical:{m}:{f}:{t}")
 
 def nse_stock_hist(f,t,symbol,series="ALL"):
     url=f"https://www.nseindia.com/api/historical/securityArchives?from={f}&to={t}&symbol={symbol.upper()}&dataType=priceVolumeDeliverable&series={series}"
-    return pd.DataFrame(nsefetch(url)['data']).to_html()
+    return df_html(pd.DataFrame(nsefetch(url)['data']))
 def nse_stock_hist(start, end, symbol, series="ALL"):
     """
     NSE Stock historical data (OR API)
@@ -320,18 +351,32 @@ def nse_stock_hist(start, end, symbol, series="ALL"):
     return pd.DataFrame(payload["data"])
 
 
+def nse_stock_hist_html(start, end, symbol):
+    """nse_stock_hist as a paged table."""
+    df = nse_stock_hist(start, end, symbol)
+    return paged_html(df, f"stock_hist:{symbol}:{start}:{end}")
+
+
 def nse_index_live(name):
     p=nsefetch(f"https://www.nseindia.com/api/equity-stockIndices?index={name.replace(' ','%20')}")
     return {"data":df_from_data(p.pop("data")) if "data" in p else pd.DataFrame(), "rem":df_from_data([p])}
 
+@metrics.timed("fetch")
 def nse_highlow(date_str):
     date_str = date_str.replace("-", "")
     url="https://archives.nseindia.com/content/indices/ind_close_all_"+date_str+".csv"
-    return pd.read_csv(url, header=0).to_html()
+    df = upstream.read_csv(url, header=0)
+    if not df.empty:
+        registry.succeeded()
+    return df_html(df)
 
+@metrics.timed("fetch")
 def stock_highlow(date_str):
     date_str = date_str.replace("-", "")
     url="https://archives.nseindia.com/content/CM_52_wk_High_low_"+date_str+".csv"
-    return pd.read_csv(url, header=2).to_html()
+    df = upstream.read_csv(url, header=2)
+    if not df.empty:
+        registry.succeeded()
+    return df_html(df)
 
 # ------------------------- END OF FILE -------------------------
\ No newline at end of file
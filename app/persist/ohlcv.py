@@ -0,0 +1,343 @@
+import os
+import re
+import threading
+import numpy as np
+import pandas as pd
+import yfinance as yf
+from datetime import datetime
+
+from app.cache.cache import TTLCache
+from app.metrics import metrics
+from app.scheduler import scheduler
+from app.upstream import upstream
+
+# ==============================
+# Configuration
+# ==============================
+BASE_DIR = "./data/ohlcv"
+os.makedirs(BASE_DIR, exist_ok=True)
+
+TOPUP_TTL = 5 * 60          # seconds between upstream top-ups of one symbol
+MISS_TTL = 30 * 60          # back-off after a download returned nothing for a symbol
+ADJUST_TOLERANCE = 0.005    # stored vs fresh close drift that means "re-adjusted upstream"
+CHECK_BARS = 5              # overlapping bars compared to detect a re-adjustment
+MAX_START = np.datetime64("1900-01-01", "D")   # "complete since listing" (period="max")
+
+# One fixed-width record per completed daily bar; files are append-only
+RECORD = np.dtype([
+    ("date", "M8[D]"),
+    ("open", "f8"),
+    ("high", "f8"),
+    ("low", "f8"),
+    ("close", "f8"),
+    ("volume", "f8"),
+])
+COLUMNS = {"Open": "open", "High": "high", "Low": "low", "Close": "close", "Volume": "volume"}
+
+_PERIOD_UNITS = {"d": "days", "wk": "weeks", "mo": "months", "y": "years"}
+
+# ticker -> today's (still forming) bars; presence also means "topped up recently"
+_live = TTLCache(maxsize=4096, ttl=TOPUP_TTL)
+
+_locks = {}
+_locks_guard = threading.Lock()
+
+# ==============================
+# Helpers
+# ==============================
+def _ts():
+    return datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+
+def _path(ticker: str):
+    safe = re.sub(r"[^A-Za-z0-9_.^-]", "_", ticker.upper())
+    return os.path.join(BASE_DIR, f"{safe}.bin")
+
+def _lock(ticker: str):
+    with _locks_guard:
+        return _locks.setdefault(ticker.upper(), threading.Lock())
+
+def _today():
+    # NSE's trading date: a bar is complete once the IST day has moved on
+    return np.datetime64(scheduler.now_ist().date(), "D")
+
+def _from_path(ticker: str):
+    return _path(ticker)[:-len(".bin")] + ".from"
+
+def period_start(period: str):
+    """Earliest timestamp covered by a yfinance period string, or None for max."""
+    if period == "ytd":
+        return pd.Timestamp(scheduler.now_ist().year, 1, 1)
+    for unit, name in _PERIOD_UNITS.items():
+        if period.endswith(unit) and period[:-len(unit)].isdigit():
+            return pd.Timestamp(scheduler.now_ist().date()) - pd.DateOffset(**{name: int(period[:-len(unit)])})
+    return None
+
+def _to_records(df: pd.DataFrame) -> np.ndarray:
+    if df is None or df.empty:
+        return np.empty(0, RECORD)
+    if isinstance(df.columns, pd.MultiIndex):
+        df = df.copy()
+        df.columns = df.columns.get_level_values(0)
+    df = df.dropna(subset=["Open", "High", "Low", "Close"])
+    idx = pd.DatetimeIndex(df.index)
+    if idx.tz is not None:
+        idx = idx.tz_localize(None)
+
+    rec = np.empty(len(df), RECORD)
+    rec["date"] = idx.values.astype("M8[D]")
+    for col, field in COLUMNS.items():
+        rec[field] = df[col].to_numpy(dtype=float) if col in df.columns else 0.0
+    return rec[np.argsort(rec["date"], kind="stable")]
+
+# ==============================
+# Read
+# ==============================
+def read(ticker: str) -> np.ndarray:
+    """Memory-mapped view of all stored bars (empty array if none)."""
+    try:
+        f = open(_path(ticker), "rb")
+    except FileNotFoundError:
+        return np.empty(0, RECORD)
+    with f:
+        # sized from the open file (a rewrite replaces the path, not this inode), whole
+        # records only: an append in progress may have written part of one
+        n = os.fstat(f.fileno()).st_size // RECORD.itemsize
+        if not n:
+            return np.empty(0, RECORD)
+        return np.memmap(f, dtype=RECORD, mode="r", shape=(n,))
+
+def last_date(ticker: str):
+    rec = read(ticker)
+    return rec["date"][-1] if len(rec) else None
+
+def covered_from(ticker: str):
+    """
+    Date the stored history is complete from: what was last requested when
+    it reached back before the first bar (listing), else the first bar.
+    """
+    try:
+        with open(_from_path(ticker)) as f:
+            return np.datetime64(f.read().strip(), "D")
+    except (OSError, ValueError):
+        rec = read(ticker)
+        return rec["date"][0] if len(rec) else None
+
+def _want(start):
+    return MAX_START if start is None else np.datetime64(pd.Timestamp(start).date(), "D")
+
+def _needs_backfill(ticker: str, start) -> bool:
+    cov = covered_from(ticker)
+    return cov is not None and len(read(ticker)) > 0 and _want(start) < cov
+
+def _since(day, **kw):
+    """yf.download range arguments for bars from day on."""
+    return {"period": "max", **kw} if day == MAX_START else {"start": str(day), **kw}
+
+def _check_from(stored):
+    """Top-up start: the last CHECK_BARS stored bars are re-fetched for comparison."""
+    return stored["date"][-min(CHECK_BARS, len(stored))]
+
+def _download(tickers, **kw):
+    return upstream.yahoo("download", yf.download, tickers, interval="1d", progress=False, **kw)
+
+# ==============================
+# Write
+# ==============================
+def _readjusted(stored: np.ndarray, fresh: np.ndarray) -> bool:
+    """
+    True when the overlapping closes disagree with the store, i.e. Yahoo
+    re-adjusted history (split / dividend). Judged on the median drift of up
+    to CHECK_BARS shared dates, so one corrected print doesn't count.
+    """
+    _, i, j = np.intersect1d(stored["date"], fresh["date"], return_indices=True)
+    a, b = np.asarray(stored["close"])[i], fresh["close"][j]
+    ok = a != 0
+    if not ok.any():
+        return False
+    return bool(np.median(np.abs(b[ok] / a[ok] - 1)) > ADJUST_TOLERANCE)
+
+def _write(ticker: str, rec: np.ndarray, rewrite=False):
+    path = _path(ticker)
+    if rewrite:
+        tmp = path + ".tmp"
+        with open(tmp, "wb") as f:
+            f.write(rec.tobytes())
+        os.replace(tmp, path)
+    else:
+        with open(path, "ab") as f:
+            f.write(rec.tobytes())
+
+def _set_covered(ticker: str, day):
+    with open(_from_path(ticker), "w") as f:
+        f.write(str(day))
+
+def _apply(ticker: str, df: pd.DataFrame, rewrite=False):
+    """
+    Append completed bars newer than the last stored one and return today's
+    bars (not persisted; they are still forming). Returns None when the
+    overlapping bars disagree with the store, i.e. Yahoo re-adjusted history.
+    """
+    rec = _to_records(df)
+    today = _today()
+    done, live = rec[rec["date"] < today], rec[rec["date"] >= today]
+
+    stored = np.empty(0, RECORD) if rewrite else read(ticker)
+    if len(stored):
+        if _readjusted(stored[-CHECK_BARS:], done):
+            return None
+        done = done[done["date"] > stored["date"][-1]]
+
+    if len(done):
+        _write(ticker, done, rewrite)
+    return live
+
+@metrics.timed("fetch")
+def _rebuild(ticker: str):
+    """Re-download everything the store covered (history was re-adjusted upstream)."""
+    print(f"[{_ts()}] [OHLCV] history re-adjusted upstream, rebuilding {ticker}")
+    return _apply(ticker, _download(ticker, **_since(covered_from(ticker))), rewrite=True)
+
+@metrics.timed("fetch")
+def _backfill(ticker: str, want):
+    """Prepend the bars between want and the first stored bar."""
+    stored = read(ticker)
+    # reach a few bars into the store so the join can be checked for a re-adjustment
+    end = stored["date"][min(CHECK_BARS, len(stored)) - 1] + 1
+    rec = _to_records(_download(ticker, **_since(want, end=str(end))))
+    if _readjusted(stored[:CHECK_BARS], rec):
+        _set_covered(ticker, want)
+        return _rebuild(ticker)
+    older = rec[rec["date"] < stored["date"][0]]
+    if len(older):
+        _write(ticker, np.concatenate([older, stored]), rewrite=True)
+    _set_covered(ticker, want)
+
+def _fresh(ticker: str, df: pd.DataFrame, want):
+    """Store the first download for a symbol; returns today's bars."""
+    live = _apply(ticker, df, rewrite=True)
+    if len(read(ticker)):
+        _set_covered(ticker, want)
+    return live
+
+def _remember(ticker: str, df, live):
+    # an empty answer (unknown / delisted symbol, upstream hiccup) is retried after MISS_TTL, not on every call
+    empty = df is None or df.dropna(how="all").empty
+    _live.set(ticker, live if live is not None else np.empty(0, RECORD), ttl=MISS_TTL if empty else TOPUP_TTL)
+
+# ==============================
+# Top-up
+# ==============================
+@metrics.timed("fetch")
+def top_up(ticker: str, start=None):
+    """
+    Fetch only bars after the last stored date (at most once per TOPUP_TTL),
+    and once the bars before the first stored one when start reaches further
+    back than the store (start=None: full history).
+    """
+    with _lock(ticker):
+        backfill = _needs_backfill(ticker, start)
+        if ticker in _live and not backfill:
+            return
+        if backfill:
+            _backfill(ticker, _want(start))
+            if ticker in _live:
+                return
+        stored = read(ticker)
+        if not len(stored):
+            df = _download(ticker, **_since(_want(start)))
+            live = _fresh(ticker, df, _want(start))
+        else:
+            df = _download(ticker, start=str(_check_from(stored)))
+            live = _apply(ticker, df)
+            if live is None:
+                live = _rebuild(ticker)
+        _remember(ticker, df, live)
+
+@metrics.timed("fetch")
+def top_up_many(tickers, start=None):
+    """
+    Top up many tickers with at most two batched downloads (new / existing);
+    tickers whose store starts after start are backfilled one by one.
+    """
+    want = _want(start)
+    for t in dict.fromkeys(tickers):
+        if _needs_backfill(t, start):
+            with _lock(t):
+                _backfill(t, want)
+
+    pending = [t for t in dict.fromkeys(tickers) if t not in _live]
+    if not pending:
+        return
+
+    stored = {t: read(t) for t in pending}
+    fresh = [t for t in pending if not len(stored[t])]
+    known = [t for t in pending if len(stored[t])]
+
+    batches = []
+    if fresh:
+        batches.append((fresh, _since(want)))
+    if known:
+        batches.append((known, {"start": str(min(_check_from(stored[t]) for t in known))}))
+
+    for group, params in batches:
+        raw = _download(group, group_by="ticker", threads=True, **params)
+        for t in group:
+            if isinstance(raw.columns, pd.MultiIndex):
+                if t not in raw.columns.get_level_values(0):
+                    _remember(t, None, None)
+                    continue
+                df = raw[t]
+            else:
+                df = raw
+            df = df.dropna(how="all")
+            with _lock(t):
+                if t in fresh:
+                    live = _fresh(t, df, want)
+                else:
+                    live = _apply(t, df)
+                    if live is None:
+                        live = _rebuild(t)
+                _remember(t, df, live)
+
+# ==============================
+# Public API
+# ==============================
+def _frame(rec: np.ndarray) -> pd.DataFrame:
+    idx = pd.DatetimeIndex(rec["date"].astype("M8[ns]"), name="Date")
+    return pd.DataFrame({col: np.asarray(rec[field]) for col, field in COLUMNS.items()}, index=idx)
+
+def _slice(rec, start, end):
+    dates = rec["date"]
+    lo = 0 if start is None else np.searchsorted(dates, np.datetime64(pd.Timestamp(start).date(), "D"), "left")
+    hi = len(rec) if end is None else np.searchsorted(dates, np.datetime64(pd.Timestamp(end).date(), "D"), "left")
+    return np.array(rec[lo:hi])
+
+def history(ticker: str, start=None, end=None, refresh=True) -> pd.DataFrame:
+    """
+    Daily OHLCV for a Yahoo ticker from the local store, start inclusive and
+    end exclusive (like yf.download). Today's forming bar is appended when
+    known. Index is a tz-naive DatetimeIndex named "Date".
+    """
+    if refresh:
+        try:
+            top_up(ticker, start)
+        except Exception as e:
+            print(f"[{_ts()}] [OHLCV] top-up failed for {ticker}: {e}")
+
+    rec = _slice(read(ticker), start, end)
+    live = _live.get(ticker)
+    if live is not None and len(live):
+        if len(rec):
+            live = live[live["date"] > rec["date"][-1]]
+        live = _slice(live, start, end)
+        rec = np.concatenate([rec, live]) if len(rec) else live
+    return _frame(rec)
+
+def closes(tickers, start=None, end=None) -> pd.DataFrame:
+    """Close matrix (date × ticker) read from the store; call top_up_many first."""
+    cols = {}
+    for t in tickers:
+        df = history(t, start, end, refresh=False)
+        if not df.empty:
+            cols[t] = df["Close"]
+    return pd.DataFrame(cols)
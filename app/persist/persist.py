@@ -146,4 +146,29 @@ def list_files(name=None, ftype=None):
         files = [f for f in files if f.startswith(name)]
     if ftype:
         files = [f for f in files if f.endswith("." + ftype)]
-    return files
\ No newline at end of file
+    return files
+# ==============================
+# Prune
+# ==============================
+def prune(prefix: str, ftype: str, max_age=None, keep=None) -> int:
+    """
+    Delete files named prefix*.ftype older than max_age seconds, and all but
+    the newest keep of them. Returns how many were removed.
+    """
+    entries = []
+    for f in _list_files():
+        if f.startswith(prefix) and f.endswith("." + ftype):
+            try:
+                entries.append((os.path.getmtime(_path(f)), f))
+            except OSError:
+                pass
+    entries.sort(reverse=True)
+    now = datetime.now().timestamp()
+    doomed = [f for i, (mtime, f) in enumerate(entries)
+              if (keep is not None and i >= keep) or (max_age is not None and now - mtime > max_age)]
+    for f in doomed:
+        try:
+            os.remove(_path(f))
+        except OSError:
+            pass
+    return len(doomed)
@@ -0,0 +1,143 @@
+# profiling.py — profile one page build on demand
+#
+# Two outputs:
+#   pstats     deterministic cProfile of the build thread, plus who called
+#              the upstream transport (every network call goes through
+#              app.upstream, so it shows up as request / read_csv / yahoo).
+#   collapsed  wall-clock sampling of the build thread and the worker pools
+#              it fans out to, as "frame;frame;... count" lines that
+#              flamegraph.pl / speedscope read directly. A thread inside an
+#              upstream call gets an extra "[upstream] <template>" frame, so
+#              network time stands apart from CPU time.
+
+import cProfile
+import io
+import os
+import pstats
+import re
+import sys
+import threading
+import time
+from collections import Counter
+from collections.abc import Iterator
+
+from app.upstream import upstream
+
+# ==============================
+# Configuration
+# ==============================
+FORMATS = ("pstats", "collapsed")
+SORTS = ("cumulative", "tottime", "ncalls")
+INTERVAL = 0.005                # sampling period, seconds
+WORKER_PREFIXES = ("yfinfo", "ThreadPoolExecutor")
+NETWORK_FUNCS = r"upstream\.py:\d+\((request|read_csv|yahoo|record)\)"
+
+_UPSTREAM_FILE = os.path.normcase(upstream.__file__)
+_IDLE_FILES = ("threading.py", "queue.py", os.path.join("concurrent", "futures", "thread.py"))
+
+
+def _consume(html):
+    """Run the build to completion; streamed pages are joined."""
+    if isinstance(html, Iterator):
+        html = "".join(html)
+    return str(html)
+
+# ==============================
+# Deterministic (cProfile)
+# ==============================
+def run_pstats(build, sort="cumulative", limit=60):
+    prof = cProfile.Profile()
+    start = time.perf_counter()
+    prof.enable()
+    try:
+        html = _consume(build())
+    finally:
+        prof.disable()
+    wall = time.perf_counter() - start
+
+    out = io.StringIO()
+    out.write(f"# wall {wall:.3f}s, {len(html.encode('utf-8'))} bytes\n")
+    stats = pstats.Stats(prof, stream=out)
+    stats.sort_stats(sort).print_stats(limit)
+    out.write("# Upstream (network) calls by caller\n")
+    stats.print_callers(NETWORK_FUNCS)
+    return out.getvalue()
+
+# ==============================
+# Sampling (collapsed stacks)
+# ==============================
+def _frame_name(code):
+    return f"{os.path.basename(code.co_filename)}:{code.co_name}"
+
+
+def _idle(frame):
+    return frame.f_code.co_filename.endswith(_IDLE_FILES)
+
+
+def _stack(frame, call):
+    """Root-first frame names; the upstream marker goes under the outermost transport frame."""
+    frames = []
+    while frame is not None:
+        frames.append(frame.f_code)
+        frame = frame.f_back
+    frames.reverse()
+
+    names = [_frame_name(c) for c in frames]
+    if call is not None:
+        at = next((i for i, c in enumerate(frames)
+                   if os.path.normcase(c.co_filename) == _UPSTREAM_FILE), len(frames) - 1)
+        names.insert(at + 1, f"[upstream] {call.template}")
+    return names
+
+
+class Sampler(threading.Thread):
+    """Samples the target thread plus busy worker-pool threads every interval."""
+
+    def __init__(self, target_ident, interval=INTERVAL):
+        super().__init__(name="profiler", daemon=True)
+        self.target = target_ident
+        self.interval = interval
+        self.counts = Counter()
+        self.samples = 0
+        self._stop_event = threading.Event()
+
+    def _threads(self):
+        names = {t.ident: t.name for t in threading.enumerate()}
+        frames = sys._current_frames()
+        for ident, frame in frames.items():
+            if ident == self.ident:
+                continue
+            if ident == self.target:
+                yield "build", ident, frame
+                continue
+            name = names.get(ident, "")
+            if name.startswith(WORKER_PREFIXES) and not _idle(frame):
+                yield re.sub(r"[_-]?\d+$", "", name), ident, frame
+
+    def run(self):
+        while not self._stop_event.wait(self.interval):
+            active = upstream.active()
+            for root, ident, frame in self._threads():
+                self.counts[";".join([root] + _stack(frame, active.get(ident)))] += 1
+            self.samples += 1
+
+    def stop(self):
+        self._stop_event.set()
+        self.join()
+
+
+def run_collapsed(build, interval=INTERVAL):
+    sampler = Sampler(threading.get_ident(), interval)
+    sampler.start()
+    try:
+        _consume(build())
+    finally:
+        sampler.stop()
+    return "".join(f"{stack} {n}\n" for stack, n in sorted(sampler.counts.items()))
+
+
+def run(build, fmt="pstats", sort="cumulative", limit=60, interval=INTERVAL):
+    """Profile build() (a zero-arg callable returning a page) and return the report text."""
+    if fmt == "collapsed":
+        return run_collapsed(build, interval)
+    return run_pstats(build, sort, limit)
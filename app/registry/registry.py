@@ -0,0 +1,195 @@
+# registry.py — one declaration per (mode, req_type) page
+#
+# Each Handler names its builder (module imported lazily on first use), the
+# filename fields it takes, how long a cached page stays fresh, whether it is
+# CPU- or network-bound, when the scheduler should rebuild it ahead of
+# users, and the output formats it can produce. The router dispatches
+# through get(), the Gradio UI lists req_types() and the prewarm scheduler
+# reads prewarm / hot. Builders report whether a page holds data through
+# succeeded() / failed() (see "Build outcome").
+
+from contextvars import ContextVar
+
+from app.lazyload.lazyload import lazy
+
+# ==============================
+# Vocabulary
+# ==============================
+COSTS = ("cpu", "network")
+# session: every minute in market hours   preopen: 09:00–09:08
+# eod: after the EOD archives are out      evening: after FII/DII publication
+PREWARM = ("session", "preopen", "eod", "evening")
+
+# builds in flight / waiting per handler, by cost class (overridable per handler)
+LIMITS = {"cpu": 2, "network": 6}
+QUEUES = {"cpu": 4, "network": 12}
+
+# what the UI puts in the name box per mode (and what prewarm uses for name-less pages)
+DEFAULT_NAMES = {"stock": "ITC", "index": "NIFTY 50", "screener": ""}
+
+MINUTE = 60
+HOUR = 60 * MINUTE
+DAY = 24 * HOUR
+
+_modules = {}
+
+
+class Handler:
+    """
+    params: FetchRequest fields passed to the builder, in order, after fixed
+    ttl:    seconds a cached page is served before a rebuild; None = until forced
+    hot:    names the scheduler prewarms (date-keyed pages get the trading date)
+    limit / queue: concurrent / waiting builds allowed (app/limits)
+    paged:  builder may ship paged tables, whose /table slices expire (app/tablewriter/paged)
+    """
+
+    def __init__(self, mode, req_type, module, builder, params=(), fixed=(), ttl=None,
+                 cost="network", prewarm=None, hot=("",), formats=("html",), default=False,
+                 limit=None, queue=None, paged=False):
+        assert cost in COSTS and (prewarm is None or prewarm in PREWARM)
+        self.mode = mode
+        self.req_type = req_type
+        self.module = module
+        self.builder = builder
+        self.params = tuple(params)
+        self.fixed = tuple(fixed)
+        self.ttl = ttl
+        self.cost = cost
+        self.prewarm = prewarm
+        self.hot = tuple(hot)
+        self.formats = tuple(formats)
+        self.default = default
+        self.limit = limit or LIMITS[cost]
+        self.queue = queue or QUEUES[cost]
+        self.paged = paged
+
+    @property
+    def key(self):
+        return (self.mode, self.req_type)
+
+    def build(self, req):
+        """Page body (str or chunk iterator) for a parsed filename."""
+        mod = _modules.get(self.module)
+        if mod is None:
+            mod = _modules.setdefault(self.module, lazy(self.module))
+        fn = getattr(mod, self.builder)
+        return fn(*self.fixed, *(getattr(req, p) for p in self.params))
+
+    def describe(self):
+        return {
+            "mode": self.mode, "req_type": self.req_type, "builder": f"{self.module}:{self.builder}",
+            "params": list(self.params), "ttl": self.ttl, "cost": self.cost, "prewarm": self.prewarm,
+            "hot": list(self.hot), "formats": list(self.formats), "limit": self.limit, "queue": self.queue,
+            "paged": self.paged,
+        }
+
+# ==============================
+# Handlers
+# ==============================
+_YF = "app.yohoofinance"
+_NS = "app.nse.nsepythonmodified"
+
+HANDLERS = [
+    # ---- stock ----
+    Handler("stock", "info", f"{_YF}.yahooinfo", "iter_info", ("name",), ttl=HOUR, cost="cpu", default=True),
+    Handler("stock", "intraday", f"{_YF}.stock", "fetch_intraday", ("name",), ttl=5 * MINUTE),
+    Handler("stock", "daily", f"{_YF}.daily", "fetch_daily", ("name", "end_date", "start_date", "suffix"),
+            ttl=HOUR, cost="cpu", formats=("svg", "js")),
+    Handler("stock", "nse_eq", "app.nse.eq_html", "build_eq_html", ("name",), ttl=5 * MINUTE),
+    Handler("stock", "qresult", f"{_YF}.stock", "fetch_qresult", ("name",), ttl=DAY),
+    Handler("stock", "result", f"{_YF}.stock", "fetch_result", ("name",), ttl=DAY),
+    Handler("stock", "balance", f"{_YF}.stock", "fetch_balance", ("name",), ttl=DAY),
+    Handler("stock", "cashflow", f"{_YF}.stock", "fetch_cashflow", ("name",), ttl=DAY),
+    Handler("stock", "dividend", f"{_YF}.stock", "fetch_dividend", ("name",), ttl=DAY),
+    Handler("stock", "split", f"{_YF}.stock", "fetch_split", ("name",), ttl=DAY),
+    Handler("stock", "other", f"{_YF}.stock", "fetch_other", ("name",), ttl=DAY),
+    Handler("stock", "stock_hist", _NS, "nse_stock_hist_html", ("start_date", "end_date", "name"),
+            ttl=DAY, cost="cpu", paged=True),
+    Handler("stock", "peers", f"{_YF}.correlation", "fetch_peers", ("name",), ttl=DAY, cost="cpu"),
+    Handler("stock", "watchlist", f"{_YF}.watchlist", "fetch_watchlist", ("name", "end_date", "start_date"),
+            ttl=5 * MINUTE, cost="cpu"),
+
+    # ---- index ----
+    Handler("index", "indices", "app.nse.indices_html", "iter_indices_html", ttl=MINUTE,
+            prewarm="session", default=True),
+    Handler("index", "open", "app.nse.index_live_html", "build_index_live_html", ("name",), ttl=MINUTE,
+            prewarm="session", hot=("NIFTY 50", "NIFTY BANK"), paged=True),
+    Handler("index", "preopen", "app.nse.preopen_html", "build_preopen_html", ("name",), ttl=5 * MINUTE,
+            prewarm="preopen", hot=("NIFTY", "FO")),
+    Handler("index", "fno", "app.nse.build_nse_fno", "nse_fno_html", ("end_date", "name"), cost="cpu",
+            prewarm="eod", hot=("NIFTY", "BANKNIFTY"), limit=1),
+    Handler("index", "fiidii", _NS, "nse_fiidii", ttl=HOUR, prewarm="evening"),
+    Handler("index", "events", _NS, "nse_events", ttl=DAY),
+    Handler("index", "index_highlow", _NS, "nse_highlow", ("end_date",), prewarm="eod"),
+    Handler("index", "stock_highlow", _NS, "stock_highlow", ("end_date",), prewarm="eod"),
+    Handler("index", "bhav", "app.nse.bhavcopy_html", "iter_bhavcopy_html", ("end_date",), cost="cpu",
+            prewarm="eod", limit=1, paged=True),
+    Handler("index", "largedeals", _NS, "nse_largedeals", ttl=HOUR),
+    Handler("index", "bulkdeals", _NS, "nse_bulkdeals", ttl=HOUR, cost="cpu", prewarm="eod", paged=True),
+    Handler("index", "blockdeals", _NS, "nse_blockdeals", ttl=HOUR, cost="cpu", prewarm="eod", paged=True),
+    Handler("index", "most_active", _NS, "nse_most_active", ttl=5 * MINUTE),
+    Handler("index", "index_history", _NS, "index_history", ("start_date", "end_date"), ("NIFTY",), ttl=DAY),
+    Handler("index", "hlargedeals", _NS, "nse_largedeals_historical", ("start_date", "end_date"), ttl=DAY,
+            cost="cpu", paged=True),
+    Handler("index", "pe_pb", _NS, "index_pe_pb_div", ("start_date", "end_date"), ("NIFTY",), ttl=DAY),
+    Handler("index", "total_returns", _NS, "index_total_returns", ("start_date", "end_date"), ("NIFTY",),
+            ttl=DAY),
+
+    # ---- screener ----
+    *(Handler("screener", screen, "app.screener.screener", "fetch_screener", fixed=(screen,), ttl=30 * MINUTE,
+              default=(screen == "from_low"))
+      for screen in ("from_low", "from_high", "volume", "delivery")),
+]
+
+_by_key = {h.key: h for h in HANDLERS}
+
+# ==============================
+# Lookups
+# ==============================
+def get(mode, req_type):
+    """Handler for (mode, req_type), or None."""
+    return _by_key.get((mode, req_type))
+
+
+def modes():
+    return list(dict.fromkeys(h.mode for h in HANDLERS))
+
+
+def req_types():
+    """mode -> req_type list, in declaration order (what the UI offers)."""
+    return {m: [h.req_type for h in HANDLERS if h.mode == m] for m in modes()}
+
+
+def defaults():
+    return {h.mode: h.req_type for h in HANDLERS if h.default}
+
+
+def prewarmed(policy):
+    return [h for h in HANDLERS if h.prewarm == policy]
+
+# ==============================
+# Build outcome
+# ==============================
+# Error templates call failed(); builders of pages cached until forced
+# (ttl=None) call succeeded() once they hold real data. A prewarm only
+# writes such a page on an explicit success, and never a failed one.
+_outcome = ContextVar("build_outcome", default=None)
+
+
+def succeeded():
+    if _outcome.get() is None:
+        _outcome.set(True)
+
+
+def failed():
+    _outcome.set(False)
+
+
+def tracked(fn, *args):
+    """(fn(*args), outcome): True / False as signalled during the call, None if nothing was."""
+    token = _outcome.set(None)
+    try:
+        result = fn(*args)
+        return result, _outcome.get()
+    finally:
+        _outcome.reset(token)
@@ -1,31 +1,35 @@
+from anyio import to_thread
 from fastapi import APIRouter, HTTPException, Query
-from fastapi.responses import FileResponse
+from fastapi.responses import FileResponse, PlainTextResponse, Response, StreamingResponse
+from collections.abc import Iterator
+from datetime import datetime as dt
 from pathlib import Path
 from pydantic import BaseModel
 import mimetypes
-
-import mimetypes
+import os
+import traceback
+import uuid
 
 # Absolute imports
 import app.common as common
 
-from app.nse import indices_html as indices
-from app.nse import index_live_html as live
-from app.nse import preopen_html as pre
-from app.nse import eq_html as eq
-from app.nse import bhavcopy_html as bhav
-from app.nse import build_nse_fno as fno
-from app.nse import nsepythonmodified as ns
-
-from app.yohoofinance import stock
-from app.yohoofinance import yahooinfo
-from app.yohoofinance import daily
-
-from app.screener import screener
+from app.lazyload import lazyload
+from app.registry import registry
+from app.limits import limits
+from app.static import assets
+from app.metrics import metrics
+from app.upstream import upstream
+from app.profiling import profiling
+from app.scheduler import scheduler
+from app.live import live
+from app.tablewriter import paged
 
 router = APIRouter()
 
-# Persistent storage
+# Admin routes are off unless ADMIN_TOKEN is set in the environment
+ADMIN_TOKEN = os.environ.get("ADMIN_TOKEN", "")
+
+# Persistent storage; full=true pages (no paged tables) are cached apart, under full/
 FILES_DIR = Path("/data/files")
 FILES_DIR.mkdir(parents=True, exist_ok=True)
 
@@ -63,77 +67,79 @@ def parse_filename(filename: str) -> FetchRequest:
         suffix=suffix
     )
 
+def build_filename(mode, req_type, name, end_date="", start_date="", suffix=""):
+    """Inverse of parse_filename; empty trailing fields are left out."""
+    filename = f"@{mode}@{req_type}"
+    if name:
+        filename += f"@{name}"
+    if end_date:
+        filename += f"@{end_date}"
+    if start_date:
+        filename += f"@{start_date}"
+    if suffix:
+        filename += f"@{suffix}"
+    return filename + ".html"
+
+# -------------------------------
+# Dispatch (see app/registry/registry.py)
+# -------------------------------
+def build(req: FetchRequest, full: bool = False):
+    """Page body (str or chunk iterator) for a parsed filename; full: no paged tables."""
+    handler = registry.get(req.mode, req.req_type.lower())
+    if handler is not None:
+        with paged.enabled(not full):
+            out = handler.build(req)
+        return paged.iter_enabled(not full, out) if isinstance(out, Iterator) else out
+    if req.mode in registry.modes():
+        registry.failed()
+        return common.wrap(f"<h3>Unhandled {req.mode} req_type: {req.req_type.lower()}</h3>")
+    raise HTTPException(400, "Invalid mode")
+
+
+def _expired(file_path: Path, handler, full: bool) -> bool:
+    """Cached page older than its handler's TTL."""
+    ttl = handler.ttl
+    if handler.paged and not full:
+        # its /table slices are pruned after STORE_TTL
+        ttl = min(ttl or paged.STORE_TTL, paged.STORE_TTL)
+    if ttl is None:
+        return False
+    return dt.now().timestamp() - file_path.stat().st_mtime > ttl
+
+# -------------------------------
+# Streaming builders
 # -------------------------------
-# Handlers remain the same
-# -------------------------------
-def handle_stock(req: FetchRequest):
-    t = req.req_type.lower()
-    if t == "info":
-        return yahooinfo.fetch_info(req.name)
-    if t == "intraday":
-        return stock.fetch_intraday(req.name)
-    if t == "daily":
-        return daily.fetch_daily(req.name, req.end_date, req.start_date)
-    if t == "nse_eq":
-        return eq.build_eq_html(req.name)
-    if t == "qresult":
-        return stock.fetch_qresult(req.name)
-    if t == "result":
-        return stock.fetch_result(req.name)
-    if t == "balance":
-        return stock.fetch_balance(req.name)
-    if t == "cashflow":
-        return stock.fetch_cashflow(req.name)
-    if t == "dividend":
-        return stock.fetch_dividend(req.name)
-    if t == "split":
-        return stock.fetch_split(req.name)
-    if t == "other":
-        return stock.fetch_other(req.name)
-    if t == "stock_hist":
-        return ns.nse_stock_hist(req.start_date, req.end_date, req.name).to_html()
-    return common.wrap(f"<h3>Unhandled stock req_type: {t}</h3>")
-
-def handle_index(req: FetchRequest):
-    t = req.req_type.lower()
-    if t == "indices":
-        return indices.build_indices_html()
-    if t == "open":
-        return live.build_index_live_html(req.name)
-    if t == "preopen":
-        return pre.build_preopen_html(req.name)
-    if t == "fno":
-        return fno.nse_fno_html(req.end_date, req.name)
-    if t == "fiidii":
-        return ns.nse_fiidii()
-    if t == "events":
-        return ns.nse_events()
-    if t == "index_highlow":
-        return ns.nse_highlow(req.end_date)
-    if t == "stock_highlow":
-        return ns.stock_highlow(req.end_date)
-    if t == "bhav":
-        return bhav.build_bhavcopy_html(req.end_date)
-    if t == "largedeals":
-        return ns.nse_largedeals()
-    if t == "bulkdeals":
-        return ns.nse_bulkdeals()
-    if t == "blockdeals":
-        return ns.nse_blockdeals()
-    if t == "most_active":
-        return ns.nse_most_active()
-    if t == "index_history":
-        return ns.index_history("NIFTY", req.start_date, req.end_date)
-    if t == "hlargedeals":
-        return ns.nse_largedeals_historical(req.start_date, req.end_date)
-    if t == "pe_pb":
-        return ns.index_pe_pb_div("NIFTY", req.start_date, req.end_date)
-    if t == "total_returns":
-        return ns.index_total_returns("NIFTY", req.start_date, req.end_date)
-    return common.wrap(f"<h3>Unhandled index req_type: {t}</h3>")
-
-def handle_screener(req: FetchRequest):
-    return screener.fetch_screener(req.req_type.lower())
+def _tee_to_file(chunks, file_path: Path, timer: metrics.RequestTimer):
+    """
+    Pass HTML chunks to the client while writing them to the cache file.
+    The file only appears once the page is complete; an aborted or failed
+    build leaves no partial cache entry.
+    """
+    tmp = file_path.with_name(f".{file_path.name}.{uuid.uuid4().hex}.part")
+    status = "aborted"
+    try:
+        with tmp.open("w", encoding="utf-8") as f:
+            while True:
+                # each chunk is built in a fresh threadpool context: re-activate the timer
+                with metrics.activate(timer), timer.stage("process"):
+                    chunk = next(chunks, None)
+                if chunk is None:
+                    break
+                with timer.stage("write"):
+                    f.write(chunk)
+                timer.bytes += len(chunk.encode("utf-8"))
+                yield chunk
+        status = "ok"
+    except Exception as e:
+        status = "error"
+        print(f"[{dt.now().strftime('%Y-%m-%d %H:%M:%S')}] Error streaming {file_path.name}: {e}")
+        yield common.html_error(f"Build failed: {e}<br><pre>{traceback.format_exc()}</pre>")
+    finally:
+        if status == "ok":
+            tmp.replace(file_path)
+        else:
+            tmp.unlink(missing_ok=True)
+        timer.finish(status)
 
 # -------------------------------
 # Health
@@ -142,41 +148,301 @@ def handle_screener(req: FetchRequest):
 @router.get("/api/health")
 def health():
     return {"status": "ok", "service": "backend alive"}
+
+@router.get("/api/startup")
+def startup_report():
+    return lazyload.report()
+
+@router.get("/api/prewarm")
+def prewarm_status():
+    return scheduler.status()
+
+@router.get("/api/handlers")
+def list_handlers():
+    return [h.describe() for h in registry.HANDLERS]
+
+# -------------------------------
+# Static assets (content-versioned URLs, cached forever)
+# -------------------------------
+@router.get("/static/{version}/{name}")
+def get_static(version: str, name: str):
+    path = assets.resolve(name)
+    if path is None:
+        raise HTTPException(404, "Asset not found")
+
+    media_type, _ = mimetypes.guess_type(path)
+    cache = assets.CACHE_CONTROL
+    if version != assets.version(name):
+        cache = "no-cache"      # stale page: serve current content, don't pin it
+    # pages are embedded by other origins (index.html on GitHub Pages)
+    headers = {"Cache-Control": cache, "Access-Control-Allow-Origin": "*"}
+
+    return FileResponse(path, media_type=media_type or "text/plain", headers=headers)
+
+# -------------------------------
+# Paged table slices (see app/tablewriter/paged.py)
+# -------------------------------
+@router.get("/table/{table_id}")
+def get_table(table_id: str, offset: int = 0, limit: int = paged.PAGE_ROWS,
+              sort: str = "", desc: bool = False, q: str = ""):
+    try:
+        total, html = paged.query(table_id, offset, limit, sort, desc, q)
+    except KeyError:
+        raise HTTPException(404, "Table expired")
+    return {"total": total, "offset": offset, "html": html}
+
+# -------------------------------
+# Live index updates (Server-Sent Events, see app/live/live.py)
+# -------------------------------
+@router.get("/live/index")
+async def live_index(name: str = Query("NIFTY 50")):
+    index = live.normalise(name)
+    try:
+        known = await live.known_indices()
+    except Exception as e:
+        raise HTTPException(503, f"Index list unavailable: {e}",
+                            headers={"Retry-After": str(limits.RETRY_AFTER)})
+    if index not in known:
+        raise HTTPException(404, f"Unknown index: {index}")
+    try:
+        f, q = live.subscribe(index)
+    except live.TooManyFeeds:
+        raise HTTPException(503, "Too many live indices, please retry shortly",
+                            headers={"Retry-After": str(limits.RETRY_AFTER)})
+    return StreamingResponse(live.events(f, q), media_type="text/event-stream",
+                             headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
+
+@router.get("/api/live")
+def live_stats():
+    return live.stats()
+
 # -------------------------------
 # FILE endpoint
 # -------------------------------
 @router.get("/file")
-def get_file(name: str, force: bool = Query(False)):
-    file_path = (FILES_DIR / name).resolve()
+async def get_file(name: str, force: bool = Query(False), full: bool = Query(False)):
+    """
+    Runs on the event loop: cache hits are served without a worker thread,
+    builds go through the handler's bulkhead (app/limits). Large tables are
+    paged unless full=true (script-less consumers: the Gradio pane, read_html).
+    """
+    try:
+        req = parse_filename(name)
+    except ValueError:
+        req = None
+    handler = _handler(req)
+    timer = metrics.RequestTimer(*_labels(req, handler))
+    if req is None or req.mode not in registry.modes():
+        # rejected before any cache lookup or gate: arbitrary names mint nothing
+        timer.cache = "none"
+        timer.finish("400")
+        raise HTTPException(400, "Invalid filename" if req is None else "Invalid mode")
 
-    if not str(file_path).startswith(str(FILES_DIR)):
-        raise HTTPException(403, "Invalid path")
-
-    if force or not file_path.exists():
+    with metrics.activate(timer):
         try:
-            req = parse_filename(name)
+            response = await _get_file(name, force, full, req, handler, timer)
+        except HTTPException as e:
+            timer.finish(str(e.status_code))
+            raise
         except Exception:
-            raise HTTPException(400, "Invalid filename")
-
-        if req.mode == "stock":
-            html = handle_stock(req)
-        elif req.mode == "index":
-            html = handle_index(req)
-        elif req.mode == "screener":
-            html = handle_screener(req)
-        else:
-            raise HTTPException(400, "Invalid mode")
+            timer.finish("error")
+            raise
 
-        file_path.write_text(str(html), encoding="utf-8")
+    if not isinstance(response, StreamingResponse):
+        timer.finish()
+    return response
 
-    if not file_path.exists():
-        raise HTTPException(404, "File not found")
 
-    media_type, _ = mimetypes.guess_type(file_path)
+def _cache_path(name: str, full: bool):
+    """Cache file for name, or None if name escapes its directory."""
+    base = FILES_DIR / "full" if full else FILES_DIR
+    if full:
+        base.mkdir(exist_ok=True)
+    path = (base / name).resolve()
+    return path if path.parent == base.resolve() else None
 
+
+def _file_response(file_path: Path, extra_headers=None):
+    media_type, _ = mimetypes.guess_type(file_path)
     return FileResponse(
         file_path,
         media_type=media_type or "application/octet-stream",
         filename=file_path.name,
+        headers={"Content-Disposition": f'inline; filename="{file_path.name}"', **(extra_headers or {})}
+    )
+
+
+def _build_page(req, full: bool, file_path: Path, timer: metrics.RequestTimer):
+    """Worker-thread part of a miss: build, and for non-streamed pages write the cache file."""
+    with timer.stage("process"):
+        html = build(req, full)
+    if isinstance(html, Iterator):
+        return html
+
+    data = str(html).encode("utf-8")
+    with timer.stage("write"):
+        _write_atomic(file_path, data)
+    timer.bytes = len(data)
+    return data
+
+
+def _write_atomic(file_path: Path, data: bytes):
+    tmp = file_path.with_name(f".{file_path.name}.{uuid.uuid4().hex}.part")
+    tmp.write_bytes(data)
+    tmp.replace(file_path)      # readers of the old file never see a half-written one
+
+
+async def rebuild(name: str, accept=None) -> bool:
+    """
+    Build a page into the cache outside any request (prewarm), through the
+    handler's bulkhead like a user build (limits.Overloaded if turned away).
+    The file is only replaced when the builder did not signal failure, when
+    a page cached until forced (ttl=None) signalled success, and when
+    accept(data) allows it, so a failed upstream never overwrites a good
+    page. Returns whether it was written.
+    """
+    req = parse_filename(name)
+    handler = _handler(req)
+    if handler is None:
+        raise ValueError(f"No handler for {name}")
+    file_path = _cache_path(name, False)
+    if file_path is None:
+        raise ValueError(f"Invalid path: {name}")
+    return await limits.run(_gate(handler), _rebuild_page, req, handler, file_path, accept)
+
+
+def _render(req):
+    html = build(req)
+    return "".join(html) if isinstance(html, Iterator) else html
+
+
+def _rebuild_page(req, handler, file_path: Path, accept) -> bool:
+    timer = metrics.RequestTimer(*handler.key)
+    timer.cache = "prewarm"
+    with metrics.activate(timer):
+        try:
+            with timer.stage("process"):
+                html, ok = registry.tracked(_render, req)
+            data = str(html).encode("utf-8")
+            if ok is False or (ok is None and handler.ttl is None) or (accept is not None and not accept(data)):
+                timer.finish("rejected")
+                return False
+            with timer.stage("write"):
+                _write_atomic(file_path, data)
+            timer.bytes = len(data)
+        except Exception:
+            timer.finish("error")
+            raise
+    timer.finish()
+    return True
+
+
+def _handler(req):
+    return registry.get(req.mode, req.req_type.lower()) if req else None
+
+
+def _labels(req, handler):
+    """Metric labels drawn from the registry, so arbitrary filenames can't add series."""
+    if handler is not None:
+        return handler.key
+    if req is not None and req.mode in registry.modes():
+        return req.mode, "other"
+    return "invalid", "invalid"
+
+
+def _gate(handler):
+    return limits.gate(handler.key, handler.cost, handler.limit, handler.queue)
+
+
+async def _get_file(name: str, force: bool, full: bool, req, handler, timer: metrics.RequestTimer):
+    file_path = _cache_path(name, full)
+
+    if file_path is None:
+        raise HTTPException(403, "Invalid path")
+
+    if handler is None:
+        # known mode, unknown req_type: a cheap stub, neither gated nor cached
+        timer.cache = "miss"
+        return Response(build(req), media_type="text/html; charset=utf-8")
+
+    if not (force or not file_path.exists() or _expired(file_path, handler, full)):
+        return _file_response(file_path)
+
+    timer.cache = "miss"
+    try:
+        held = await limits.hold(_gate(handler))
+    except limits.Overloaded:
+        return _shed(req, file_path, timer)
+    try:
+        result = await limits.call(held, _build_page, req, full, file_path, timer)
+    except BaseException:
+        held.release()
+        raise
+
+    if isinstance(result, Iterator):
+        # the slot stays held until the streamed body is done
+        return StreamingResponse(
+            limits.stream(held, _tee_to_file(result, file_path, timer)),
+            media_type="text/html; charset=utf-8",
+            headers={"Content-Disposition": f'inline; filename="{file_path.name}"'}
+        )
+    held.release()
+
+    # serve what was just built rather than re-reading a file a concurrent rebuild may replace
+    return Response(
+        result,
+        media_type="text/html; charset=utf-8",
         headers={"Content-Disposition": f'inline; filename="{file_path.name}"'}
-    )
\ No newline at end of file
+    )
+
+
+def _shed(req, file_path: Path, timer: metrics.RequestTimer):
+    """Bulkhead full: the last good page if there is one, else 503."""
+    labels = (req.mode, req.req_type.lower())
+    if file_path.exists():
+        limits.SHED.inc(labels + ("stale",))
+        timer.cache = "stale"
+        return _file_response(file_path, {"X-Cache": "stale"})
+    limits.SHED.inc(labels + ("503",))
+    raise HTTPException(503, "Server busy, please retry shortly",
+                        headers={"Retry-After": str(limits.RETRY_AFTER)})
+
+# -------------------------------
+# Metrics (Prometheus text format)
+# -------------------------------
+@router.get("/metrics")
+def get_metrics():
+    return PlainTextResponse(metrics.render(), media_type="text/plain; version=0.0.4; charset=utf-8")
+
+# Runs on the event loop, so it answers even when every worker thread is busy
+@router.get("/api/threadpool")
+async def get_threadpool():
+    limiter = to_thread.current_default_thread_limiter()
+    stats = limiter.statistics()
+    return {"total": limiter.total_tokens, "busy": stats.borrowed_tokens, "waiting": stats.tasks_waiting,
+            **limits.stats()}
+
+# -------------------------------
+# Upstream call ledger (see app/upstream/upstream.py)
+# -------------------------------
+@router.get("/api/upstream")
+def get_upstream():
+    return {"window_sec": upstream.REFETCH_WINDOW, "templates": upstream.summary()}
+
+# -------------------------------
+# Admin: profile one build (nothing is written to the page cache)
+# -------------------------------
+@router.get("/admin/profile")
+def profile_file(name: str, token: str = "", fmt: str = Query("pstats"),
+                 sort: str = Query("cumulative"), limit: int = 60, interval_ms: float = 5):
+    if not ADMIN_TOKEN or token != ADMIN_TOKEN:
+        raise HTTPException(403, "Forbidden")
+    if fmt not in profiling.FORMATS or sort not in profiling.SORTS:
+        raise HTTPException(400, f"fmt must be one of {profiling.FORMATS}, sort one of {profiling.SORTS}")
+    try:
+        req = parse_filename(name)
+    except ValueError as e:
+        raise HTTPException(400, str(e))
+
+    report = profiling.run(lambda: build(req), fmt, sort, max(1, limit), max(1.0, interval_ms) / 1000)
+    return PlainTextResponse(report)
@@ -0,0 +1,257 @@
+# scheduler.py — market-hours-aware prewarm of hot pages
+#
+# A daemon thread rebuilds the pages the registry marks with a prewarm
+# policy so users land on a warm cache: "session" pages every minute while
+# the market is open, "preopen" pages every minute of the 09:00–09:08
+# pre-open, and the once-a-day "eod" / "evening" pages after NSE publishes
+# them (retried until a build is accepted or the window closes). Weekends and
+# NSE trading holidays (ns.nse_holidays) are skipped, and outside the windows
+# the thread sleeps until the next one opens.
+#
+# Filenames are the ones the UI asks for: hot name (or the mode's default
+# name), today as end date and FY start as start date. JOBS are non-page
+# work of a policy (the correlation matrix); they also run once at start-up
+# so a restart doesn't leave them empty until the next window.
+
+import importlib
+import os
+import threading
+
+import anyio.lowlevel
+from anyio import from_thread
+from datetime import datetime as dt, time, timedelta, timezone
+
+from app.cache.cache import TTLCache
+from app.metrics import metrics
+from app.registry import registry
+
+# ==============================
+# Configuration
+# ==============================
+ENABLED = os.environ.get("PREWARM", "1") != "0"
+
+IST = timezone(timedelta(hours=5, minutes=30))   # fixed offset: no tzdata needed, India has no DST
+
+WINDOWS = {                                      # policy -> (opens, closes), IST
+    "preopen": (time(9, 0), time(9, 8)),
+    "session": (time(9, 15), time(15, 30)),
+    "eod":     (time(18, 30), time(23, 0)),      # bhavcopy / F&O / high-low archives
+    "evening": (time(19, 30), time(23, 0)),      # FII/DII provisional figures
+}
+EVERY_MINUTE = ("preopen", "session")
+RETRY = timedelta(minutes=20)                    # between attempts of a once-a-day page
+MIN_BYTES = 512                                  # smaller pages are error stubs, not data
+
+# policy -> "module:function" jobs (imported on first run), each returning True when done
+JOBS = {
+    "eod": ("app.yohoofinance.correlation:refresh",),
+}
+
+PREWARMS = metrics.Counter("dashboard_prewarm_total", "Scheduled page rebuilds",
+                           ("mode", "req_type", "outcome"))
+
+_holidays = TTLCache(maxsize=4, ttl=registry.DAY)
+
+
+def _log(msg):
+    print(f"[{dt.now().strftime('%Y-%m-%d %H:%M:%S')}] Prewarm: {msg}")
+
+
+def now_ist():
+    return dt.now(IST)
+
+# ==============================
+# Trading calendar
+# ==============================
+def holidays(year):
+    """NSE capital-market trading holidays for year; empty (all weekdays trade) if unavailable."""
+    days = _holidays.get(year)
+    if days is None:
+        try:
+            from app.nse import nsepythonmodified as ns
+            days = {dt.strptime(h["tradingDate"], "%d-%b-%Y").date()
+                    for h in ns.nse_holidays().get("CM", [])}
+            days = {d for d in days if d.year == year}
+            _holidays.set(year, days)
+        except Exception as e:
+            _log(f"holiday list unavailable ({e}); treating weekdays as trading days")
+            days = set()
+            _holidays.set(year, days, ttl=registry.HOUR)
+    return days
+
+
+def is_trading_day(day):
+    return day.weekday() < 5 and day not in holidays(day.year)
+
+
+def active(now):
+    """Policies whose window is open at now (IST datetime)."""
+    if not is_trading_day(now.date()):
+        return []
+    t = now.time()
+    return [p for p, (opens, closes) in WINDOWS.items() if opens <= t < closes]
+
+
+def last_eod(now):
+    """Latest trading day whose EOD window has opened at now (IST): the date EOD data is for."""
+    day = now.date()
+    if now.time() < WINDOWS["eod"][0]:
+        day -= timedelta(days=1)
+    for _ in range(15):
+        if is_trading_day(day):
+            return day
+        day -= timedelta(days=1)
+    return day
+
+
+def next_open(now):
+    """Start of the next window after now, skipping non-trading days."""
+    day, t = now.date(), now.time()
+    for _ in range(15):
+        if is_trading_day(day):
+            starts = sorted(opens for opens, _ in WINDOWS.values() if opens > t)
+            if starts:
+                return dt.combine(day, starts[0], IST)
+        day, t = day + timedelta(days=1), time.min
+    return now + timedelta(days=1)
+
+# ==============================
+# Jobs
+# ==============================
+def filenames(handler, day):
+    """What the UI requests for handler's hot names on day."""
+    from app.router.router import build_filename
+    fy = day.year if day.month >= 4 else day.year - 1
+    end, start = day.strftime("%d-%m-%Y"), f"01-04-{fy}"
+    for name in handler.hot:
+        yield build_filename(handler.mode, handler.req_type,
+                             name or registry.DEFAULT_NAMES.get(handler.mode, ""), end, start)
+
+
+def accept(data):
+    """
+    Only replace a cached page with something that looks like data; on top
+    of the builder's own outcome (registry.succeeded / failed, see router.rebuild).
+    """
+    return len(data) >= MIN_BYTES and b"<b>Error:</b>" not in data
+
+
+class Scheduler(threading.Thread):
+
+    def __init__(self, rebuild, token):
+        super().__init__(name="prewarm", daemon=True)
+        self.rebuild = rebuild       # async; run on the app's event loop (its bulkhead gates live there)
+        self.token = token
+        self._halt = threading.Event()
+        self._done = {}              # (policy, date) -> True once every page was accepted
+        self._retry_at = {}          # (policy, date) -> next attempt
+
+    def stop(self):
+        self._halt.set()
+
+    def run(self):
+        _log("started")
+        for policy in JOBS:
+            self.run_jobs(policy)
+        while not self._halt.is_set():
+            try:
+                wake = self.tick(now_ist())
+            except Exception as e:
+                _log(f"tick failed: {e}")
+                wake = now_ist() + timedelta(minutes=1)
+            self._halt.wait(max(1.0, (wake - now_ist()).total_seconds()))
+
+    def tick(self, now):
+        """Run what is due at now; return when to wake up next."""
+        due = []
+        for policy in active(now):
+            key = (policy, now.date())
+            if policy in EVERY_MINUTE:
+                due.append(policy)
+            elif not self._done.get(key) and now >= self._retry_at.get(key, now):
+                due.append(policy)
+
+        for policy in due:
+            ok = self.warm(policy, now.date())
+            if policy not in EVERY_MINUTE:
+                if ok:
+                    self._done[(policy, now.date())] = True
+                else:
+                    self._retry_at[(policy, now.date())] = now + RETRY
+
+        return self.wake_at(now_ist())
+
+    def wake_at(self, now):
+        pending = []
+        for policy in active(now):
+            key = (policy, now.date())
+            if policy in EVERY_MINUTE:
+                pending.append((now + timedelta(minutes=1)).replace(second=0, microsecond=0))
+            elif not self._done.get(key):
+                pending.append(self._retry_at.get(key, now))
+        return min(pending) if pending else next_open(now)
+
+    def warm(self, policy, day):
+        """Rebuild every hot page of policy; True if all were accepted."""
+        ok = True
+        for h in registry.prewarmed(policy):
+            for name in filenames(h, day):
+                try:
+                    written = from_thread.run(self.rebuild, name, accept, token=self.token)
+                except Exception as e:
+                    _log(f"{name} failed: {e}")
+                    written = False
+                PREWARMS.inc((h.mode, h.req_type, "written" if written else "rejected"))
+                ok = ok and written
+        return self.run_jobs(policy) and ok
+
+    def run_jobs(self, policy):
+        """Run policy's JOBS in this thread; True if all of them are done."""
+        ok = True
+        for job in JOBS.get(policy, ()):
+            module, func = job.split(":")
+            try:
+                done = bool(getattr(importlib.import_module(module), func)())
+            except Exception as e:
+                _log(f"{job} failed: {e}")
+                done = False
+            PREWARMS.inc(("job", job, "done" if done else "failed"))
+            ok = ok and done
+        return ok
+
+
+_scheduler = None
+
+
+def start():
+    """Start the prewarm thread once (no-op with PREWARM=0). Call from the app's event loop (lifespan)."""
+    global _scheduler
+    if not ENABLED or _scheduler is not None:
+        return None
+    from app.router.router import rebuild
+    _scheduler = Scheduler(rebuild, anyio.lowlevel.current_token())
+    _scheduler.start()
+    return _scheduler
+
+
+def running():
+    return _scheduler is not None and _scheduler.is_alive()
+
+
+def stop():
+    global _scheduler
+    if _scheduler is not None:
+        _scheduler.stop()
+        _scheduler = None
+
+
+def status():
+    now = now_ist()
+    return {
+        "enabled": ENABLED,
+        "running": running(),
+        "now_ist": now.strftime("%Y-%m-%d %H:%M:%S"),
+        "active": active(now),
+        "next_open": next_open(now).strftime("%Y-%m-%d %H:%M"),
+        "done_today": sorted(p for (p, d) in (_scheduler._done if _scheduler else {}) if d == now.date()),
+    }
@@ -1,7 +1,15 @@
+import re
 import requests
 import pandas as pd
-from bs4 import BeautifulSoup
+from lxml import html as lxml_html
 from typing import List, Tuple
+from concurrent.futures import ThreadPoolExecutor
+
+from app.cache.cache import TTLCache
+from app.static import assets
+from app.metrics import metrics
+from app.registry import registry
+from app.upstream import upstream
 
 
 # ===============================
@@ -15,100 +23,140 @@ SCREENER_MAP = {
     "magic_formula": "https://www.screener.in/screens/59/magic-formula/",
 }
 
+# ===============================
+# Cache configuration
+# ===============================
+TABLE_TTL = 30 * 60          # seconds a parsed screen is served without network
+MAX_PAGES = 10               # upper bound on paginated result pages per screen
+PAGE_WORKERS = 4
+
+_HEADERS = {"User-Agent": "Mozilla/5.0"}
+_PAGE_RE = re.compile(r"[?&]page=(\d+)")
+
+_session = requests.Session()
+
+# screen_name -> (headers, rows, typed DataFrame)
+_table_cache = TTLCache(maxsize=32, ttl=TABLE_TTL)
+
+# page url -> {"etag", "last_modified", "parsed"} for conditional re-fetches
+_validators = {}
+
 # ===============================
 # Public API
 # ===============================
 def fetch_screener(screen_name: str) -> str:
     """
     Returns a fully styled HTML table for a given screener name.
-    Uses disk persistence (HTML primary, CSV secondary).
+    Parsed tables are cached in memory for TABLE_TTL; after expiry pages are
+    re-validated with If-None-Match / If-Modified-Since.
     """
 
     url = SCREENER_MAP.get(screen_name)
     if not url:
         return _error_html(f"Invalid screener: {screen_name}")
 
-    cache_name = f"SCREENER_{screen_name.upper()}"
-
-
-    # 2️⃣ Fetch live
-    headers, rows = _fetch_table(url)
+    headers, rows, _ = get_screen_table(screen_name)
 
     if not headers or not rows:
         return _error_html("No data available")
 
-    # 3️⃣ Build outputs
-    html = _build_html(headers, rows)
-    csv_df = pd.DataFrame(rows, columns=headers)
+    return _build_html(headers, rows)
 
 
-    return html
+def get_screen_table(screen_name: str) -> Tuple[List[str], List[List[str]], pd.DataFrame]:
+    """(headers, rows, typed DataFrame) for a screen, all result pages merged."""
+    url = SCREENER_MAP[screen_name]
+    return _table_cache.get_or_load(screen_name, lambda: _fetch_screen(url))
 
 # ===============================
 # Internal helpers
 # ===============================
-def _fetch_table(url: str) -> Tuple[List[str], List[List[str]]]:
-    r = requests.get(
-        url,
-        headers={"User-Agent": "Mozilla/5.0"},
-        timeout=15
-    )
+def _fetch_screen(url: str) -> Tuple[List[str], List[List[str]], pd.DataFrame]:
+    headers, rows, last_page = _fetch_page(url)
+    if not headers:
+        return [], [], pd.DataFrame()
+
+    pages = range(2, min(last_page, MAX_PAGES) + 1)
+    if pages:
+        page_urls = [f"{url}?page={n}" for n in pages]
+        with ThreadPoolExecutor(max_workers=PAGE_WORKERS) as executor:
+            for _, more, _ in executor.map(_fetch_page, page_urls):
+                rows.extend(more)
+
+    return headers, rows, _typed_frame(headers, rows)
+
+
+@metrics.timed("fetch")
+def _fetch_page(url: str) -> Tuple[List[str], List[List[str]], int]:
+    """Fetch one result page, re-using the previous parse on 304 Not Modified."""
+    prev = _validators.get(url)
+    req_headers = dict(_HEADERS)
+    if prev:
+        if prev["etag"]:
+            req_headers["If-None-Match"] = prev["etag"]
+        if prev["last_modified"]:
+            req_headers["If-Modified-Since"] = prev["last_modified"]
+
+    r = upstream.get(_session, url, headers=req_headers, timeout=15)
+    if r.status_code == 304 and prev:
+        headers, rows, last_page = prev["parsed"]
+        return list(headers), [list(row) for row in rows], last_page
     r.raise_for_status()
 
-    soup = BeautifulSoup(r.text, "html.parser")
-    table = soup.find("table")
-    if not table:
-        return [], []
+    parsed = _parse_page(r.content)
+    _validators[url] = {
+        "etag": r.headers.get("ETag"),
+        "last_modified": r.headers.get("Last-Modified"),
+        "parsed": parsed,
+    }
+    headers, rows, last_page = parsed
+    return list(headers), [list(row) for row in rows], last_page
 
-    thead = table.find("thead")
-    header_row = thead.find("tr") if thead else table.find("tr")
-    headers = [th.get_text(strip=True) for th in header_row.find_all("th")]
+
+def _cell_text(el) -> str:
+    return "".join(s.strip() for s in el.itertext())
+
+
+def _parse_page(content: bytes) -> Tuple[List[str], List[List[str]], int]:
+    doc = lxml_html.fromstring(content)
+
+    last_page = 1
+    for href in doc.xpath("//a[contains(@href, 'page=')]/@href"):
+        m = _PAGE_RE.search(href)
+        if m:
+            last_page = max(last_page, int(m.group(1)))
+
+    tables = doc.xpath("//table")
+    if not tables:
+        return [], [], last_page
+    table = tables[0]
+
+    header_row = table.xpath("./thead/tr") or table.xpath(".//tr")
+    headers = [_cell_text(th) for th in header_row[0].xpath("./th")] if header_row else []
 
     rows = []
-    for tr in table.find_all("tr")[1:]:
-        cells = tr.find_all("td")
+    for tr in table.xpath(".//tr")[1:]:
+        cells = tr.xpath("./td")
         if cells:
-            rows.append([td.get_text(strip=True) for td in cells])
+            rows.append([_cell_text(td) for td in cells])
+
+    return headers, rows, last_page
 
-    return headers, rows
+
+def _typed_frame(headers: List[str], rows: List[List[str]]) -> pd.DataFrame:
+    """DataFrame with numeric columns coerced (commas stripped) and text kept as-is."""
+    width = len(headers)
+    df = pd.DataFrame([row[:width] + [""] * (width - len(row)) for row in rows], columns=headers)
+    for i in range(width):
+        raw = df.iloc[:, i].astype(str).str.replace(",", "", regex=False).str.strip()
+        num = pd.to_numeric(raw, errors="coerce")
+        if num.notna().sum() == (raw != "").sum():
+            df.isetitem(i, num)
+    return df
 
 
 def _build_html(headers: List[str], rows: List[List[str]]) -> str:
-    style = """
-    <style>
-        .screener-wrap {
-            width: 100%;
-            overflow-x: auto;
-            font-family: Arial, sans-serif;
-        }
-        table.screener {
-            border-collapse: collapse;
-            width: 100%;
-            min-width: 900px;
-            font-size: 13px;
-        }
-        table.screener th {
-            position: sticky;
-            top: 0;
-            background: #1e293b;
-            color: #ffffff;
-            padding: 8px;
-            border: 1px solid #334155;
-            white-space: nowrap;
-        }
-        table.screener td {
-            padding: 6px 8px;
-            border: 1px solid #e5e7eb;
-            white-space: nowrap;
-        }
-        table.screener tr:nth-child(even) {
-            background: #f8fafc;
-        }
-        table.screener tr:hover {
-            background: #e0f2fe;
-        }
-    </style>
-    """
+    style = assets.style_tag("screener.css")
 
     html = [style, "<div class='screener-wrap'>", "<table class='screener'>"]
 
@@ -128,6 +176,7 @@ def _build_html(headers: List[str], rows: List[List[str]]) -> str:
 
 
 def _error_html(msg: str) -> str:
+    registry.failed()
     return f"""
     <div style="
         color:#b91c1c;
@@ -0,0 +1,69 @@
+# assets.py — versioned static files (JS/CSS) shared by generated pages
+#
+# Pages reference assets by a content-hashed URL, so the browser may cache
+# them forever: a changed file gets a new URL. Pages are also injected into
+# other origins (index.html on GitHub Pages fetches /file cross-origin), so
+# asset and API URLs are built on PUBLIC_BASE_URL (or the hosting platform's
+# advertised origin), the API's absolute origin
+# as browsers reach it; unset, they stay root-relative (same-origin viewers).
+
+import hashlib
+import os
+from pathlib import Path
+
+STATIC_DIR = Path(__file__).resolve().parent
+CACHE_CONTROL = "public, max-age=31536000, immutable"
+
+
+def _public_base():
+    """PUBLIC_BASE_URL, else the origin the hosting platform advertises (Render, HF Spaces, Replit)."""
+    env = os.environ
+    if env.get("PUBLIC_BASE_URL"):
+        return env["PUBLIC_BASE_URL"]
+    if env.get("RENDER_EXTERNAL_URL"):
+        return env["RENDER_EXTERNAL_URL"]
+    if env.get("SPACE_HOST"):
+        return "https://" + env["SPACE_HOST"]
+    if env.get("REPLIT_DOMAINS"):
+        return "https://" + env["REPLIT_DOMAINS"].split(",")[0]
+    return ""
+
+
+PUBLIC_BASE_URL = _public_base().rstrip("/")
+
+_versions = {}
+
+
+def version(name):
+    """Short content hash of a static file (computed once per process)."""
+    v = _versions.get(name)
+    if v is None:
+        v = hashlib.sha1((STATIC_DIR / name).read_bytes()).hexdigest()[:10]
+        _versions[name] = v
+    return v
+
+
+def url(name):
+    return f"{PUBLIC_BASE_URL}/static/{version(name)}/{name}"
+
+
+def api_url(path):
+    """Absolute (or root-relative) URL of an API path such as /table/<id>."""
+    return PUBLIC_BASE_URL + path
+
+
+def resolve(name):
+    """Path of a servable asset, or None (no subdirectories, no .py files)."""
+    path = (STATIC_DIR / name).resolve()
+    if path.parent != STATIC_DIR or path.suffix not in (".js", ".css") or not path.is_file():
+        return None
+    return path
+
+
+def script_tag(name):
+    # data-api: where the script's own requests go (see api_url)
+    return f'<script src="{url(name)}" data-api="{PUBLIC_BASE_URL}"></script>'
+
+
+def style_tag(name):
+    return f'<link rel="stylesheet" href="{url(name)}">'
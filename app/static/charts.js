@@ -0,0 +1,208 @@
+// charts.js — client-side renderer for pages built with the "js" chart mode
+//
+// The page embeds one <script type="application/json" id="..."> with the
+// series encoded by app/svgchart/series.py, and <div class="sc-chart">
+// placeholders naming the chart kind. Layout mirrors svg_charts.py.
+(function () {
+  "use strict";
+
+  var MONTHS = ["Jan", "Feb", "Mar", "Apr", "May", "Jun", "Jul", "Aug", "Sep", "Oct", "Nov", "Dec"];
+  var UP = "#2ca02c", DOWN = "#d62728";
+
+  // ------------------------------------------------------------
+  // Decoding
+  // ------------------------------------------------------------
+  function decodeColumn(c, n) {
+    var bin = atob(c.d), bytes = new Uint8Array(bin.length);
+    for (var i = 0; i < bin.length; i++) bytes[i] = bin.charCodeAt(i);
+    var deltas = new Int32Array(bytes.buffer), out = new Float64Array(n), acc = 0;
+    for (i = 0; i < c.o; i++) out[i] = NaN;
+    for (i = 0; i < deltas.length; i++) {
+      acc += deltas[i];
+      out[c.o + i] = acc / c.s;
+    }
+    return out;
+  }
+
+  var frames = {};
+  function frame(id) {
+    if (!frames[id]) {
+      var raw = JSON.parse(document.getElementById(id).textContent), cols = {};
+      for (var k in raw.c) cols[k] = decodeColumn(raw.c[k], raw.n);
+      cols.n = raw.n;
+      frames[id] = cols;
+    }
+    return frames[id];
+  }
+
+  function tail(f, last) {
+    if (!last || last >= f.n) return f;
+    var out = {n: last};
+    for (var k in f) if (k !== "n") out[k] = f[k].subarray(f.n - last);
+    return out;
+  }
+
+  function dateStr(days) {
+    var d = new Date(days * 86400000);
+    var dd = d.getUTCDate();
+    return (dd < 10 ? "0" : "") + dd + "-" + MONTHS[d.getUTCMonth()] + "-" + d.getUTCFullYear();
+  }
+
+  // ------------------------------------------------------------
+  // SVG primitives
+  // ------------------------------------------------------------
+  function Svg(w, h) { this.w = w; this.h = h; this.e = []; }
+  Svg.prototype.line = function (x1, y1, x2, y2, stroke, w) {
+    this.e.push('<line x1="' + x1.toFixed(1) + '" y1="' + y1.toFixed(1) + '" x2="' + x2.toFixed(1) +
+      '" y2="' + y2.toFixed(1) + '" stroke="' + (stroke || "#333") + '" stroke-width="' + (w || 1) + '"/>');
+  };
+  Svg.prototype.text = function (x, y, t, size, color, anchor) {
+    this.e.push('<text x="' + x.toFixed(1) + '" y="' + y.toFixed(1) + '" fill="' + (color || "#111") +
+      '" font-size="' + (size || 11) + '" text-anchor="' + (anchor || "start") + '" font-family="Arial">' + t + '</text>');
+  };
+  Svg.prototype.path = function (d, fill, stroke) {
+    if (d) this.e.push('<path d="' + d + '" fill="' + (fill || "none") + '" stroke="' + (stroke || "none") + '" stroke-width="1"/>');
+  };
+  Svg.prototype.polyline = function (x, y, stroke) {
+    var pts = [];
+    for (var i = 0; i < y.length; i++) if (isFinite(y[i])) pts.push(x(i).toFixed(1) + "," + y[i].toFixed(1));
+    if (pts.length) this.e.push('<polyline fill="none" stroke="' + stroke + '" stroke-width="2" points="' + pts.join(" ") + '"/>');
+  };
+  Svg.prototype.render = function () {
+    return '<svg width="' + this.w + '" height="' + this.h + '" style="background:white;border:1px solid #ccc">' +
+      this.e.join("") + "</svg>";
+  };
+
+  function bar(x0, top, cw, height) {
+    return "M" + x0.toFixed(1) + " " + top.toFixed(1) + "h" + cw.toFixed(1) + "v" + height.toFixed(1) + "h" + (-cw).toFixed(1) + "Z";
+  }
+
+  function range(a) {
+    var lo = Infinity, hi = -Infinity;
+    for (var i = 0; i < a.length; i++) if (isFinite(a[i])) { if (a[i] < lo) lo = a[i]; if (a[i] > hi) hi = a[i]; }
+    return [lo, hi, hi !== lo ? hi - lo : 1];
+  }
+
+  function xLabels(svg, f, x, y) {
+    var interval = Math.max(1, Math.floor(f.n / 6));
+    for (var i = 0; i < f.n; i += interval) svg.text(x(i), y, dateStr(f.Date[i]), 11, "#111", "middle");
+  }
+
+  // ------------------------------------------------------------
+  // Charts
+  // ------------------------------------------------------------
+  function candle(f, title) {
+    var W = 1200, H = 520, PL = 70, PR = 30, PT = 40, PB = 120, VH = 100;
+    var PH = H - PT - PB - VH, VY = PT + PH;
+    var svg = new Svg(W, H);
+    svg.text(W / 2, 25, title, 16, "#111", "middle");
+
+    var hi = range(f.High), lo = range(f.Low);
+    var pmin = Math.min(hi[0], lo[0]), pmax = Math.max(hi[1], lo[1]), pr = pmax !== pmin ? pmax - pmin : 1;
+    var vmax = range(f.Volume)[1] || 1;
+    function yp(p) { return PT + (pmax - p) / pr * PH; }
+    function yv(v) { return VY + VH - v / vmax * VH; }
+
+    for (var i = 0; i < 6; i++) {
+      var gy = PT + i * PH / 5;
+      svg.line(PL, gy, W - PR, gy, "#eee");
+      svg.text(5, gy + 4, (pmax - i * (pmax - pmin) / 5).toFixed(2));
+    }
+    svg.line(PL, PT, PL, H - PB, "#444");
+    svg.line(PL, H - PB - VH, W - PR, H - PB - VH, "#444");
+
+    var step = (W - PL - PR) / f.n, cw = step * 0.6;
+    function x(j) { return PL + (j + 0.5) * step; }
+
+    svg.line(PL, yp(pmax), W - PR, yp(pmax), "#f00", 2);
+    svg.text(W - PR - 60, yp(pmax) - 2, "High", 11, "#f00");
+    svg.line(PL, yp(pmin), W - PR, yp(pmin), "#00f", 2);
+    svg.text(W - PR - 60, yp(pmin) - 2, "Low", 11, "#00f");
+
+    var d = {up: [], down: []}, v = {up: [], down: []};
+    for (i = 0; i < f.n; i++) {
+      var o = f.Open[i], c = f.Close[i], k = c >= o ? "up" : "down";
+      var top = yp(Math.max(o, c)), body = Math.max(Math.abs(yp(o) - yp(c)), 1), vy = yv(f.Volume[i]);
+      d[k].push("M" + x(i).toFixed(1) + " " + yp(f.High[i]).toFixed(1) + "V" + yp(f.Low[i]).toFixed(1) + bar(x(i) - cw / 2, top, cw, body));
+      v[k].push(bar(x(i) - cw / 2, vy, cw, VY + VH - vy));
+    }
+    svg.path(d.up.join(""), UP, UP); svg.path(v.up.join(""), UP);
+    svg.path(d.down.join(""), DOWN, DOWN); svg.path(v.down.join(""), DOWN);
+
+    xLabels(svg, f, x, H - PB + 20);
+    return svg.render();
+  }
+
+  function line(f, title) {
+    var W = 1200, H = 220, P = 50, svg = new Svg(W, H);
+    svg.text(W / 2, 20, title, 16, "#111", "middle");
+    var r = range(f.Close), step = (W - 2 * P) / f.n;
+    function x(i) { return P + i * step; }
+    var y = f.Close.map(function (v) { return P + (r[1] - v) / r[2] * (H - 2 * P); });
+    svg.polyline(x, y, "#1f77b4");
+    xLabels(svg, f, x, H - P + 15);
+    svg.line(P, H - P, W - P, H - P, "#444");
+    for (var i = 0; i < 6; i++) {
+      var gy = P + i * (H - 2 * P) / 5;
+      svg.line(P, gy, P - 5, gy, "#444");
+      svg.text(5, gy + 4, (r[1] - i * (r[1] - r[0]) / 5).toFixed(2));
+    }
+    return svg.render();
+  }
+
+  function rsi(f) {
+    var W = 1200, H = 180, P = 40, svg = new Svg(W, H);
+    svg.text(20, 20, "RSI (14)", 14, "#111");
+    var step = (W - 2 * P) / f.n;
+    function x(i) { return P + i * step; }
+    svg.polyline(x, f.RSI.map(function (v) { return H - P - v / 100 * (H - 2 * P); }), "#6a5acd");
+    var y50 = H - P - 0.5 * (H - 2 * P);
+    svg.line(P, y50, W - P, y50, "#ccc");
+    svg.text(W - 60, y50 - 5, "50");
+    xLabels(svg, f, x, H - P + 15);
+    svg.line(P, H - P, W - P, H - P, "#444");
+    return svg.render();
+  }
+
+  function macd(f) {
+    var W = 1200, H = 220, P = 40, svg = new Svg(W, H);
+    svg.text(20, 20, "MACD", 14, "#111");
+    var hist = f.MACD.map(function (v, i) { return v - f.MACD_SIGNAL[i]; });
+    var all = Array.prototype.concat.call([], Array.from(f.MACD), Array.from(f.MACD_SIGNAL), Array.from(hist));
+    var r = range(all), step = (W - 2 * P) / f.n, cw = step * 0.6;
+    function x(i) { return P + i * step; }
+    function y(v) { return H - P - (v - r[0]) / r[2] * (H - 2 * P); }
+    svg.polyline(x, f.MACD.map(y), UP);
+    svg.polyline(x, f.MACD_SIGNAL.map(y), DOWN);
+    var pos = [], neg = [], y0 = y(0);
+    for (var i = 0; i < f.n; i++) {
+      if (!isFinite(hist[i])) continue;
+      var yh = y(hist[i]);
+      (hist[i] >= 0 ? pos : neg).push(bar(x(i) - cw / 2, Math.min(y0, yh), cw, Math.abs(yh - y0)));
+    }
+    svg.path(pos.join(""), UP);
+    svg.path(neg.join(""), DOWN);
+    xLabels(svg, f, x, H - P + 15);
+    svg.line(P, H - P, W - P, H - P, "#444");
+    return svg.render();
+  }
+
+  var KINDS = {candle: candle, line: line, rsi: rsi, macd: macd};
+
+  function renderAll() {
+    var els = document.querySelectorAll(".sc-chart");
+    for (var i = 0; i < els.length; i++) {
+      var el = els[i], draw = KINDS[el.dataset.chart];
+      if (!draw) continue;
+      try {
+        var f = tail(frame(el.dataset.src), parseInt(el.dataset.last || "0", 10));
+        el.innerHTML = draw(f, el.dataset.title || "");
+      } catch (e) {
+        el.textContent = "Chart error: " + e.message;
+      }
+    }
+  }
+
+  if (document.readyState === "loading") document.addEventListener("DOMContentLoaded", renderAll);
+  else renderAll();
+})();
@@ -0,0 +1,90 @@
+document.querySelectorAll('.compact-table tbody td').forEach(td => {
+  const span = td.querySelector('span');
+  if (!span) return;
+  const val = parseFloat(span.textContent);
+  if (!isNaN(val)) {
+    td.style.textAlign = 'right';
+  }
+});
+
+// Live updates: pages with a [data-live-index] element subscribe to /live/index
+// (Server-Sent Events, app/live/live.py) and patch lastPrice / pChange /
+// totalTradedVolume in place, for every table row and index card they match.
+// The API origin comes from the script tag's data-api (app/static/assets.py),
+// so the page also works when index.html injects it from another origin.
+(function () {
+  "use strict";
+  var API = (document.currentScript && document.currentScript.dataset.api) || "";
+  var marker = document.querySelector("[data-live-index]");
+  var index = marker && marker.dataset.liveIndex;
+  if (!index || !window.EventSource) return;
+
+  var COLOR = {pChange: true};
+  var dot = document.querySelector(".nse-live-dot");
+  var stamp = document.querySelector(".nse-live-time");
+
+  function fmt(v) {            // same rules as fmt in app/tablewriter/colortable.py
+    if (v === null || v === undefined) return "—";
+    if (v === 0) return "0";
+    if (Math.abs(v) < 0.001) v = v > 0 ? 0.001 : -0.001;
+    var a = Math.abs(v);
+    if (a >= 1e7) return (v / 1e7).toFixed(2) + " Cr";
+    if (a >= 1e5) return Math.round(v).toLocaleString("en-US");
+    if (a >= 1) return v.toLocaleString("en-US", {minimumFractionDigits: 2, maximumFractionDigits: 2});
+    return v.toFixed(4);
+  }
+
+  function set(td, field, v) {
+    var text = fmt(v);
+    var span = td.querySelector("span");
+    var el = span || td;
+    if (el.textContent === text) return;
+    el.textContent = text;
+    if (COLOR[field] && span && !/top-/.test(span.className)) {
+      span.className = v > 0 ? "numeric-positive" : v < 0 ? "numeric-negative" : "";
+    }
+    td.classList.remove("live-flash");
+    void td.offsetWidth;       // restart the animation
+    td.classList.add("live-flash");
+  }
+
+  function cells() {           // symbol -> [{td, field}], rebuilt per event (paged tables swap rows)
+    var out = {};
+    document.querySelectorAll(".compact-table").forEach(function (tbl) {
+      var heads = Array.prototype.map.call(tbl.querySelectorAll("thead th"), function (th) { return th.textContent.trim(); });
+      var sym = heads.indexOf("symbol");
+      if (sym < 0) return;
+      tbl.querySelectorAll("tbody tr").forEach(function (tr) {
+        var tds = tr.children, key = tds[sym] && tds[sym].textContent.trim();
+        if (!key) return;
+        heads.forEach(function (h, i) { (out[key] = out[key] || []).push({td: tds[i], field: h}); });
+      });
+    });
+    return out;
+  }
+
+  function apply(rows) {
+    var map = cells();
+    Object.keys(rows).forEach(function (symbol) {
+      var row = rows[symbol];
+      (map[symbol] || []).forEach(function (c) { if (c.field in row) set(c.td, c.field, row[c.field]); });
+      if (symbol === index.toUpperCase()) {
+        document.querySelectorAll(".nse-card").forEach(function (card) {
+          var label = card.querySelector(".nse-card-label"), value = card.querySelector(".nse-card-value");
+          if (label && value && label.textContent.trim() in row) set(value, label.textContent.trim(), row[label.textContent.trim()]);
+        });
+      }
+    });
+    if (stamp) stamp.textContent = new Date().toLocaleTimeString();
+  }
+
+  var es = new EventSource(API + "/live/index?name=" + encodeURIComponent(index));
+  function on(msg) {
+    if (!document.contains(marker)) { es.close(); return; }   // page replaced (index.html)
+    apply(JSON.parse(msg.data));
+  }
+  es.addEventListener("snapshot", on);
+  es.addEventListener("update", on);
+  es.onopen = function () { if (dot) dot.classList.remove("live-off"); };
+  es.onerror = function () { if (dot) dot.classList.add("live-off"); };
+})();
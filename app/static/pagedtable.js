@@ -0,0 +1,74 @@
+// pagedtable.js — client for tables written by app/tablewriter/paged.py
+//
+// Each .paged-table holds the first page; prev/next, header clicks (sort)
+// and the filter box fetch slices from /table/<id> and swap the <tbody>.
+(function () {
+  "use strict";
+  if (window.__pagedTable) return;
+  window.__pagedTable = true;
+  var API = (document.currentScript && document.currentScript.dataset.api) || "";
+
+  function init(root) {
+    var st = {id: root.dataset.table, limit: +root.dataset.limit, total: +root.dataset.total,
+              offset: 0, sort: "", desc: false, q: "", seq: 0};
+    var info = root.querySelector(".paged-info");
+    var filter = root.querySelector(".paged-filter");
+
+    function table() { return root.querySelector("table"); }
+
+    function label() {
+      var end = Math.min(st.offset + st.limit, st.total);
+      info.textContent = st.total ? (st.offset + 1) + "–" + end + " of " + st.total : "No rows";
+    }
+
+    function load() {
+      var seq = ++st.seq;
+      var qs = "offset=" + st.offset + "&limit=" + st.limit + "&sort=" + encodeURIComponent(st.sort) +
+               "&desc=" + st.desc + "&q=" + encodeURIComponent(st.q);
+      info.textContent = "Loading…";
+      fetch(API + "/table/" + st.id + "?" + qs)
+        .then(function (r) { if (!r.ok) throw new Error("HTTP " + r.status); return r.json(); })
+        .then(function (res) {
+          if (seq !== st.seq) return;            // a newer request superseded this one
+          st.total = res.total;
+          var tpl = document.createElement("template");
+          tpl.innerHTML = res.html;
+          var body = tpl.content.querySelector("tbody"), cur = table().querySelector("tbody");
+          if (body && cur) cur.replaceWith(body);
+          label();
+        })
+        .catch(function (e) { if (seq === st.seq) info.textContent = "Reload page (" + e.message + ")"; });
+    }
+
+    root.addEventListener("click", function (ev) {
+      var act = ev.target.dataset && ev.target.dataset.act;
+      if (act === "prev" && st.offset > 0) { st.offset = Math.max(0, st.offset - st.limit); load(); }
+      if (act === "next" && st.offset + st.limit < st.total) { st.offset += st.limit; load(); }
+      var th = ev.target.closest("thead th");
+      if (th) {
+        var col = th.textContent.trim();
+        st.desc = st.sort === col ? !st.desc : true;
+        st.sort = col;
+        st.offset = 0;
+        load();
+      }
+    });
+
+    var timer;
+    filter.addEventListener("input", function () {
+      clearTimeout(timer);
+      timer = setTimeout(function () { st.q = filter.value; st.offset = 0; load(); }, 250);
+    });
+
+    var ths = table().querySelectorAll("thead th");
+    for (var i = 0; i < ths.length; i++) { ths[i].style.cursor = "pointer"; ths[i].title = "Sort"; }
+  }
+
+  function initAll() {
+    var roots = document.querySelectorAll(".paged-table");
+    for (var i = 0; i < roots.length; i++) init(roots[i]);
+  }
+
+  if (document.readyState === "loading") document.addEventListener("DOMContentLoaded", initAll);
+  else initAll();
+})();
@@ -0,0 +1,79 @@
+# downsample.py — keep chart output bounded by pixel width, not data length
+import numpy as np
+
+CANDLE_PX = 3     # narrowest candle (body + gap) worth drawing
+
+
+def lttb(y, n_out, x=None):
+    """
+    Indices of the n_out points kept by Largest-Triangle-Three-Buckets.
+    First and last points are always kept; NaNs are never preferred.
+    """
+    y = np.asarray(y, dtype=float)
+    n = len(y)
+    if n_out >= n or n_out < 3:
+        return np.arange(n)
+    x = np.arange(n, dtype=float) if x is None else np.asarray(x, dtype=float)
+
+    edges = np.linspace(1, n - 1, n_out - 1).astype(int)
+    out = np.empty(n_out, dtype=int)
+    out[0], out[-1] = 0, n - 1
+
+    a = 0
+    for i in range(n_out - 2):
+        lo, hi = edges[i], edges[i + 1]
+        nxt_hi = edges[i + 2] if i + 2 < len(edges) else n
+        nxt = y[hi:nxt_hi]
+        fin = np.isfinite(nxt)
+        avg_x = x[hi:nxt_hi].mean()
+        avg_y = nxt[fin].mean() if fin.any() else y[a]
+
+        bx, by = x[lo:hi], y[lo:hi]
+        area = np.abs((x[a] - avg_x) * (by - y[a]) - (x[a] - bx) * (avg_y - y[a]))
+        a = lo + int(np.argmax(np.nan_to_num(area, nan=-1.0)))
+        out[i + 1] = a
+    return out
+
+
+def _bucket_starts(n, n_out):
+    bucket = np.arange(n) * n_out // n
+    return np.flatnonzero(np.r_[True, bucket[1:] != bucket[:-1]])
+
+
+def ohlc_buckets(df, n_out):
+    """
+    Merge consecutive bars into at most n_out candles: first Open, max High,
+    min Low, last Close, summed Volume. Other columns keep the bucket's
+    first row (so DateStr / Date label the bucket start).
+    """
+    n = len(df)
+    if n <= n_out or n_out < 1:
+        return df
+
+    starts = _bucket_starts(n, n_out)
+    ends = np.r_[starts[1:], n] - 1
+
+    out = df.iloc[starts].copy()
+    out["High"] = np.maximum.reduceat(df["High"].to_numpy(dtype=float), starts)
+    out["Low"] = np.minimum.reduceat(df["Low"].to_numpy(dtype=float), starts)
+    out["Close"] = df["Close"].to_numpy()[ends]
+    if "Volume" in df.columns:
+        out["Volume"] = np.add.reduceat(np.nan_to_num(df["Volume"].to_numpy(dtype=float)), starts)
+    return out
+
+
+def extreme_indices(y, n_out):
+    """Per bucket, the index of the value furthest from zero (histogram bars)."""
+    y = np.asarray(y, dtype=float)
+    n = len(y)
+    if n <= n_out or n_out < 1:
+        return np.arange(n)
+    starts = _bucket_starts(n, n_out)
+    ends = np.r_[starts[1:], n]
+    mag = np.nan_to_num(np.abs(y), nan=-1.0)
+    return np.array([s + int(np.argmax(mag[s:e])) for s, e in zip(starts, ends)])
+
+
+def candle_budget(plot_width):
+    return max(int(plot_width // CANDLE_PX), 1)
+
@@ -0,0 +1,53 @@
+# series.py — compact column encoding for the client-side chart renderer
+#
+# Each column is scaled to integers, delta-encoded and shipped as base64
+# little-endian int32; static/charts.js decodes it back. Leading NaNs
+# (indicator warm-up) are sent as a count, interior NaNs are forward-filled.
+
+import base64
+import json
+import numpy as np
+
+SCALES = {
+    "Date": 1,            # days since epoch
+    "Open": 100, "High": 100, "Low": 100, "Close": 100,
+    "Volume": 1,
+    "RSI": 100,
+    "MACD": 10000, "MACD_SIGNAL": 10000,
+}
+INT32_MAX = 2**31 - 1
+
+
+def encode(values, scale):
+    v = np.asarray(values, dtype=float)
+    ok = np.isfinite(v)
+    lead = int(np.argmax(ok)) if ok.any() else len(v)
+    body = v[lead:]
+    if len(body):
+        idx = np.where(np.isfinite(body), np.arange(len(body)), 0)
+        body = body[np.maximum.accumulate(idx)]
+    d = np.diff(np.rint(body * scale).astype(np.int64), prepend=0)
+    while len(d) and np.abs(d).max() > INT32_MAX:   # e.g. very large volumes
+        scale /= 10
+        d = np.diff(np.rint(body * scale).astype(np.int64), prepend=0)
+    d = d.astype("<i4")
+    return {"s": scale, "o": lead, "d": base64.b64encode(d.tobytes()).decode("ascii")}
+
+
+def encode_frame(df, columns=None):
+    """{"n": rows, "c": {column: encoded}} for the columns present in df."""
+    out = {}
+    for col in columns or SCALES:
+        if col not in df.columns:
+            continue
+        if col == "Date":
+            vals = df[col].to_numpy(dtype="datetime64[D]").astype(np.int64)
+        else:
+            vals = df[col].to_numpy(dtype=float)
+        out[col] = encode(vals, SCALES.get(col, 100))
+    return {"n": len(df), "c": out}
+
+
+def payload(df, columns=None):
+    """JSON safe to embed in <script type="application/json">."""
+    return json.dumps(encode_frame(df, columns), separators=(",", ":")).replace("</", "<\\/")
@@ -1,5 +1,8 @@
 # svg_charts.py
-import math
+import numpy as np
+
+from app.metrics import metrics
+from app.svgchart.downsample import lttb, ohlc_buckets, extreme_indices, candle_budget
 
 class SVG:
     def __init__(self, width, height, bg="white"):
@@ -10,17 +13,25 @@ class SVG:
 
     def line(self, x1, y1, x2, y2, stroke="#333", w=1):
         self.e.append(
-            f'<line x1="{x1}" y1="{y1}" x2="{x2}" y2="{y2}" stroke="{stroke}" stroke-width="{w}"/>'
+            f'<line x1="{x1:.1f}" y1="{y1:.1f}" x2="{x2:.1f}" y2="{y2:.1f}" stroke="{stroke}" stroke-width="{w}"/>'
         )
 
     def rect(self, x, y, w, h, fill):
         self.e.append(
-            f'<rect x="{x}" y="{y}" width="{w}" height="{h}" fill="{fill}"/>'
+            f'<rect x="{x:.1f}" y="{y:.1f}" width="{w:.1f}" height="{h:.1f}" fill="{fill}"/>'
         )
 
+    def path(self, d, fill="none", stroke="none", w=1):
+        if d:
+            self.e.append(f'<path d="{d}" fill="{fill}" stroke="{stroke}" stroke-width="{w}"/>')
+
+    def polyline(self, points, stroke, w=2):
+        if points:
+            self.e.append(f'<polyline fill="none" stroke="{stroke}" stroke-width="{w}" points="{points}"/>')
+
     def text(self, x, y, t, size=11, color="#111", anchor="start"):
         self.e.append(
-            f'<text x="{x}" y="{y}" fill="{color}" font-size="{size}" '
+            f'<text x="{x:.1f}" y="{y:.1f}" fill="{color}" font-size="{size}" '
             f'text-anchor="{anchor}" font-family="Arial">{t}</text>'
         )
 
@@ -34,27 +45,61 @@ class SVG:
             "</svg>"
         )
 
+# -----------------------------------
+# Vector helpers
+# -----------------------------------
+def _col(df, name):
+    return df[name].to_numpy(dtype=float)
+
+def _d(fmt, *cols):
+    """One path/points string from per-bar coordinate arrays, fixed precision."""
+    return "".join(map(fmt.format, *(np.asarray(c).tolist() for c in cols)))
+
+def _points(x, y):
+    ok = np.isfinite(y)
+    return _d("{:.1f},{:.1f} ", x[ok], y[ok]).rstrip()
+
+def _bars(x0, top, cw, height, mask):
+    """Combined rectangle subpaths for the bars selected by mask."""
+    return _d(f"M{{:.1f}} {{:.1f}}h{cw:.1f}v{{:.1f}}h{-cw:.1f}Z", x0[mask], top[mask], height[mask])
+
+def _span(lo, hi):
+    return (hi - lo) if hi != lo else 1.0
+
+def _x_labels(svg, df, x, y):
+    n_labels = 6
+    dates = df["DateStr"].to_numpy()
+    interval = max(1, len(df) // n_labels)
+    for idx in range(0, len(df), interval):
+        svg.text(x[idx], y, dates[idx], 11, "#111", "middle")
+
 # -----------------------------------
 # Main Candlestick + Volume chart
 # -----------------------------------
+@metrics.timed("render")
 def candlestick_chart(df, title="Price & Volume"):
     W, H = 1200, 520
     PAD_L, PAD_R, PAD_T, PAD_B = 70, 30, 40, 120
     VOL_H = 100
     VOL_Y = PAD_T + (H-PAD_T-PAD_B-VOL_H)
+    PH = H-PAD_T-PAD_B-VOL_H
     svg = SVG(W,H)
     svg.text(W/2,25,title,16,"#111","middle")
 
-    prices = df["High"].tolist()+df["Low"].tolist()
-    pmin, pmax = min(prices), max(prices)
-    vmax = df["Volume"].max()
+    # Long histories: merge bars so each candle keeps a few pixels
+    df = ohlc_buckets(df, candle_budget(W-PAD_L-PAD_R))
 
-    def yp(p): return PAD_T + (pmax-p)/(pmax-pmin)*(H-PAD_T-PAD_B-VOL_H)
-    def yv(v): return VOL_Y + VOL_H - (v/vmax)*VOL_H
+    o, h, l, c, v = (_col(df, k) for k in ("Open", "High", "Low", "Close", "Volume"))
+    pmin, pmax = float(min(h.min(), l.min())), float(max(h.max(), l.max()))
+    prange = _span(pmin, pmax)
+    vmax = float(v.max()) or 1.0
+
+    def yp(p): return PAD_T + (pmax-p)/prange*PH
+    def yv(vol): return VOL_Y + VOL_H - (vol/vmax)*VOL_H
 
     # Draw horizontal price grid
     for i in range(6):
-        y = PAD_T + i*(H-PAD_T-PAD_B-VOL_H)/5
+        y = PAD_T + i*PH/5
         price = pmax - i*(pmax-pmin)/5
         svg.line(PAD_L, y, W-PAD_R, y, "#eee")
         svg.text(5, y+4, f"{price:.2f}")
@@ -63,70 +108,57 @@ def candlestick_chart(df, title="Price & Volume"):
     svg.line(PAD_L, PAD_T, PAD_L, H-PAD_B, "#444")
     svg.line(PAD_L, H-PAD_B-VOL_H, W-PAD_R, H-PAD_B-VOL_H, "#444")  # volume axis
 
-    step = (W-PAD_L-PAD_R)/len(df)
+    n = len(df)
+    step = (W-PAD_L-PAD_R)/n
     cw = step*0.6
 
     # Highest / Lowest lines
-    high = df["High"].max()
-    low = df["Low"].min()
-    svg.line(PAD_L, yp(high), W-PAD_R, yp(high), "#f00", 2)
-    svg.text(W-PAD_R-60, yp(high)-2,"High","#f00")
-    svg.line(PAD_L, yp(low), W-PAD_R, yp(low), "#00f", 2)
-    svg.text(W-PAD_R-60, yp(low)-2,"Low","#00f")
-
-    # Draw candles + volume
-    for i,r in enumerate(df.itertuples()):
-        x = PAD_L + i*step + step/2
-        o,h,l,c = r.Open,r.High,r.Low,r.Close
-        color = "#2ca02c" if c>=o else "#d62728"
-        # Wick
-        svg.line(x, yp(h), x, yp(l), color)
-        # Body
-        top = yp(max(o,c))
-        bh = max(abs(yp(o)-yp(c)),1)
-        svg.rect(x-cw/2, top, cw, bh, color)
-        # Volume
-        svg.rect(x-cw/2, yv(r.Volume), cw, VOL_Y+VOL_H-yv(r.Volume), color)
-        # Tooltip
-        svg.raw(f'<title>{r.DateStr} O:{o:.2f} H:{h:.2f} L:{l:.2f} C:{c:.2f} V:{int(r.Volume)}</title>')
+    svg.line(PAD_L, yp(pmax), W-PAD_R, yp(pmax), "#f00", 2)
+    svg.text(W-PAD_R-60, yp(pmax)-2,"High",color="#f00")
+    svg.line(PAD_L, yp(pmin), W-PAD_R, yp(pmin), "#00f", 2)
+    svg.text(W-PAD_R-60, yp(pmin)-2,"Low",color="#00f")
+
+    # Candles + volume: one combined path per colour
+    x = PAD_L + (np.arange(n) + 0.5)*step
+    x0 = x - cw/2
+    up = c >= o
+    y_hi, y_lo = yp(h), yp(l)
+    top = yp(np.maximum(o, c))
+    body = np.maximum(np.abs(yp(o)-yp(c)), 1)
+    vy = yv(v)
+    vh = VOL_Y + VOL_H - vy
+
+    for mask, color in ((up, "#2ca02c"), (~up, "#d62728")):
+        wicks = _d("M{:.1f} {:.1f}V{:.1f}", x[mask], y_hi[mask], y_lo[mask])
+        svg.path(wicks + _bars(x0, top, cw, body, mask), fill=color, stroke=color)
+        svg.path(_bars(x0, vy, cw, vh, mask), fill=color)
 
     # X-axis labels
-    n_labels = 6
-    interval = max(1,len(df)//n_labels)
-    for idx in range(0,len(df),interval):
-        r=df.iloc[idx]
-        x=PAD_L+idx*step+step/2
-        svg.text(x,H-PAD_B+20,r.DateStr,11,"#111","middle")
+    _x_labels(svg, df, x, H-PAD_B+20)
 
     return svg.render()
 
 # -----------------------------------
 # Line chart (for weekly/monthly)
 # -----------------------------------
+@metrics.timed("render")
 def line_chart(df,column="Close",title="Line Chart"):
     W,H=1200,220
     PAD=50
     svg=SVG(W,H)
     svg.text(W/2,20,title,16,"#111","middle")
 
-    vals=df[column]
-    ymin,ymax=min(vals),max(vals)
-    def y(v): return PAD + (ymax-v)/(ymax-ymin)*(H-2*PAD)
+    vals=_col(df, column)
+    ymin,ymax=float(np.nanmin(vals)),float(np.nanmax(vals))
+    yrange=_span(ymin, ymax)
     step=(W-2*PAD)/len(vals)
-
-    pts=[]
-    for i,v in enumerate(vals):
-        x=PAD+i*step
-        pts.append(f"{x},{y(v)}")
-    svg.raw(f'<polyline fill="none" stroke="#1f77b4" stroke-width="2" points="{" ".join(pts)}"/>')
+    x=PAD+np.arange(len(vals))*step
+    keep=lttb(vals, W-2*PAD)
+    y=PAD+(ymax-vals[keep])/yrange*(H-2*PAD)
+    svg.polyline(_points(x[keep], y), "#1f77b4")
 
     # X-axis
-    n_labels=6
-    interval=max(1,len(df)//n_labels)
-    for idx in range(0,len(df),interval):
-        r=df.iloc[idx]
-        x=PAD+idx*step
-        svg.text(x,H-PAD+15,r.DateStr,11,"#111","middle")
+    _x_labels(svg, df, x, H-PAD+15)
     svg.line(PAD,H-PAD,W-PAD,H-PAD,"#444")
 
     # Y-axis
@@ -141,20 +173,19 @@ def line_chart(df,column="Close",title="Line Chart"):
 # -----------------------------------
 # RSI Chart
 # -----------------------------------
+@metrics.timed("render")
 def rsi_chart(df):
     W,H=1200,180
     PAD=40
     svg=SVG(W,H)
     svg.text(20,20,"RSI (14)",14,"#111")
 
-    rsi=df["RSI"]
+    rsi=_col(df, "RSI")
     step=(W-2*PAD)/len(rsi)
-    pts=[]
-    for i,v in enumerate(rsi):
-        x=PAD+i*step
-        y=H-PAD-(v/100)*(H-2*PAD)
-        pts.append(f"{x},{y}")
-    svg.raw(f'<polyline fill="none" stroke="#6a5acd" stroke-width="2" points="{" ".join(pts)}"/>')
+    x=PAD+np.arange(len(rsi))*step
+    keep=lttb(rsi, W-2*PAD)
+    y=H-PAD-(rsi[keep]/100)*(H-2*PAD)
+    svg.polyline(_points(x[keep], y), "#6a5acd")
 
     # 50 line
     y50=H-PAD-(50/100)*(H-2*PAD)
@@ -162,12 +193,7 @@ def rsi_chart(df):
     svg.text(W-60,y50-5,"50")
 
     # X-axis labels
-    n_labels=6
-    interval=max(1,len(df)//n_labels)
-    for idx in range(0,len(df),interval):
-        r=df.iloc[idx]
-        x=PAD+idx*step
-        svg.text(x,H-PAD+15,r.DateStr,11,"#111","middle")
+    _x_labels(svg, df, x, H-PAD+15)
     svg.line(PAD,H-PAD,W-PAD,H-PAD,"#444")
 
     return svg.render()
@@ -175,45 +201,45 @@ def rsi_chart(df):
 # -----------------------------------
 # MACD chart with histogram
 # -----------------------------------
+@metrics.timed("render")
 def macd_chart(df):
     W,H=1200,220
     PAD=40
     svg=SVG(W,H)
     svg.text(20,20,"MACD",14,"#111")
 
-    macd=df["MACD"]
-    signal=df["MACD_SIGNAL"]
+    macd=_col(df, "MACD")
+    signal=_col(df, "MACD_SIGNAL")
     hist=macd-signal
 
-    vmin,vmax=min(list(macd)+list(signal)+list(hist)),max(list(macd)+list(signal)+list(hist))
-    def y(v): return H-PAD-(v-vmin)/(vmax-vmin)*(H-2*PAD)
+    allv=np.concatenate([macd, signal, hist])
+    vmin,vmax=float(np.nanmin(allv)),float(np.nanmax(allv))
+    vrange=_span(vmin, vmax)
+    def y(v): return H-PAD-(v-vmin)/vrange*(H-2*PAD)
     step=(W-2*PAD)/len(macd)
-
-    # MACD and signal lines
-    mpts,spts=[],[]
-    for i in range(len(macd)):
-        x=PAD+i*step
-        mpts.append(f"{x},{y(macd.iloc[i])}")
-        spts.append(f"{x},{y(signal.iloc[i])}")
-    svg.raw(f'<polyline fill="none" stroke="#2ca02c" stroke-width="2" points="{" ".join(mpts)}"/>')
-    svg.raw(f'<polyline fill="none" stroke="#d62728" stroke-width="2" points="{" ".join(spts)}"/>')
-
-    # Histogram
-    cw = step*0.6
-    for i,hv in enumerate(hist):
-        x=PAD+i*step
-        y0=y(0)
-        yv=y(hv)
-        color="#2ca02c" if hv>=0 else "#d62728"
-        svg.rect(x-cw/2,min(y0,yv),cw,abs(yv-y0),color)
+    x=PAD+np.arange(len(macd))*step
+
+    # MACD and signal lines (LTTB-thinned to the plot width)
+    for line, color in ((macd, "#2ca02c"), (signal, "#d62728")):
+        keep=lttb(line, W-2*PAD)
+        svg.polyline(_points(x[keep], y(line[keep])), color)
+
+    # Histogram: strongest bar per bucket, one combined path per colour
+    keep=extreme_indices(hist, candle_budget(W-2*PAD))
+    cw = (W-2*PAD)/len(keep)*0.6
+    hx=x[keep]
+    hv=hist[keep]
+    y0=y(0)
+    yh=y(hv)
+    top=np.minimum(y0, yh)
+    height=np.abs(yh-y0)
+    ok=np.isfinite(hv)
+    pos=ok & (hv>=0)
+    svg.path(_bars(hx-cw/2, top, cw, height, pos), fill="#2ca02c")
+    svg.path(_bars(hx-cw/2, top, cw, height, ok & ~pos), fill="#d62728")
 
     # X-axis
-    n_labels=6
-    interval=max(1,len(df)//n_labels)
-    for idx in range(0,len(df),interval):
-        r=df.iloc[idx]
-        x=PAD+idx*step
-        svg.text(x,H-PAD+15,r.DateStr,11,"#111","middle")
+    _x_labels(svg, df, x, H-PAD+15)
     svg.line(PAD,H-PAD,W-PAD,H-PAD,"#444")
 
     return svg.render()
@@ -0,0 +1,123 @@
+# colortable.py — the NSE live / pre-open pages' number-formatted tables
+#
+# Cells that read as plain decimals ("-12.5", "300") are shown compactly
+# (Cr / thousands separators / 4 decimals below 1); pChange-family columns
+# and the page's metric column are coloured by sign, and the top / bottom
+# TOP_N rows of the metric column are emphasised. Work is done a column at
+# a time: numeric columns are classified and bucketed with NumPy masks,
+# only object columns go through a (vectorised) regex.
+
+import re
+
+import numpy as np
+import pandas as pd
+
+from app.metrics import metrics
+from app.tablewriter import tablewriter as tw
+
+# Columns that get colored text (green/red) — all others render as plain numbers
+COLOR_COLS = {"pChange", "perChange365d", "perChange30d", "nearWKH", "nearWKL"}
+TOP_N = 3
+
+_NUMBER = r"-?\d+(\.\d+)?"
+# str(float) switches to exponent notation outside this range, which _NUMBER rejects
+_REPR_MIN, _REPR_MAX = 1e-4, 1e16
+
+# ==============================
+# Scalars (info cards)
+# ==============================
+def is_pure_number(s) -> bool:
+    try:
+        float(s)
+    except (ValueError, TypeError):
+        return False
+    return bool(re.fullmatch(_NUMBER, str(s).strip()))
+
+
+def fmt(val_str) -> str:
+    """Format a pure-numeric string for display."""
+    return format_numbers(np.array([float(val_str)]))[0]
+
+# ==============================
+# Columns
+# ==============================
+def numeric_mask(s: pd.Series):
+    """(mask of cells whose str() is a plain decimal, their float values)"""
+    dtype = s.dtype
+    if dtype == np.float64:
+        v = s.to_numpy()
+        a = np.abs(v)
+        return np.isfinite(v) & ((v == 0) | ((a >= _REPR_MIN) & (a < _REPR_MAX))), v
+    if dtype == np.int64:
+        return np.ones(len(s), dtype=bool), s.to_numpy(dtype=float)
+    text = s.astype(str)
+    mask = text.str.strip().str.fullmatch(_NUMBER).fillna(False).to_numpy(dtype=bool)
+    v = np.full(len(s), np.nan)
+    if mask.any():
+        v[mask] = text[mask].astype(float).to_numpy()
+    return mask, v
+
+
+def format_numbers(v):
+    """Display strings for an array of floats, bucketed by magnitude."""
+    v = np.where((v != 0) & (np.abs(v) < 0.001), np.copysign(0.001, v), v)
+    a = np.abs(v)
+    out = np.empty(len(v), dtype=object)
+    buckets = (
+        (v == 0, lambda x: "0"),
+        (a >= 1e7, lambda x: f"{x / 1e7:.2f} Cr"),
+        ((a >= 1e5) & (a < 1e7), "{:,.0f}".format),
+        ((a >= 1) & (a < 1e5), "{:,.2f}".format),
+        ((a > 0) & (a < 1), "{:.4f}".format),
+    )
+    for mask, f in buckets:
+        if mask.any():
+            out[mask] = [f(x) for x in v[mask].tolist()]
+    return out
+
+
+def _top_masks(df, metric_col, n=TOP_N):
+    """Row masks of the n largest / smallest values of metric_col."""
+    up = np.zeros(len(df), dtype=bool)
+    down = np.zeros(len(df), dtype=bool)
+    if metric_col and metric_col in df.columns:
+        col = pd.to_numeric(df[metric_col], errors="coerce").reset_index(drop=True).dropna()
+        up[col.nlargest(n).index.to_numpy()] = True
+        down[col.nsmallest(n).index.to_numpy()] = True
+    return up, down
+
+# ==============================
+# Table
+# ==============================
+@metrics.timed("render")
+def to_html(df: pd.DataFrame, metric_col: str | None = None, empty: str | None = None) -> str:
+    """
+    Convert DataFrame to a styled HTML table.
+    - pChange-family columns (and metric_col): colored plain text.
+    - All other numeric columns: plain formatted text, no color.
+    - Top / bottom TOP_N rows in metric_col get bold text.
+    - empty: returned instead of a table when df has no rows.
+    """
+    if empty is not None and (df is None or df.empty):
+        return empty
+
+    top_up, top_down = _top_masks(df, metric_col)
+    cells = {}
+    for j, col in enumerate(df.columns):
+        s = df.iloc[:, j]
+        mask, v = numeric_mask(s)
+        out = s.astype(str).to_numpy(dtype=object)
+        if mask.any():
+            text = format_numbers(v[mask])
+            if col in COLOR_COLS or col == metric_col:
+                cls = np.select(
+                    [top_up[mask], top_down[mask], v[mask] > 0, v[mask] < 0],
+                    ["top-up", "top-down", "numeric-positive", "numeric-negative"], "")
+                text = np.array([f'<span class="{c}">{t}</span>' if c else t
+                                 for c, t in zip(cls.tolist(), text.tolist())], dtype=object)
+            out[mask] = text
+        cells[j] = out
+
+    df_html = pd.DataFrame(cells)
+    df_html.columns = df.columns
+    return tw.to_html(df_html, index=False, escape=False, classes="compact-table")
@@ -0,0 +1,172 @@
+# paged.py — large tables shipped one page at a time
+#
+# On by default for /file (the router turns it on around the build): a
+# page embeds the first PAGE_ROWS rows plus static/pagedtable.js, and the
+# client fetches further slices (offset / sort / filter) from the /table
+# route. Requests with full=true get the whole table, which is what
+# script-less viewers (the Gradio HTML pane, its Table tab's read_html) need. The typed frame is kept in a TTL cache and
+# pickled through persist, so cached pages keep paging after a restart;
+# pickles older than STORE_TTL (or beyond MAX_STORED) are pruned.
+
+import hashlib
+import importlib
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from html import escape
+
+import numpy as np
+
+from app.cache.cache import TTLCache
+from app.persist import persist
+from app.static import assets
+from app.tablewriter import tablewriter as tw
+
+# ==============================
+# Configuration
+# ==============================
+PAGE_ROWS = 200
+MAX_LIMIT = 1000
+TABLE_TTL = 60 * 60
+STORE_TTL = 2 * 24 * 60 * 60  # pickled frames (and the cached pages using them) live this long
+MAX_STORED = 256
+PRUNE_EVERY = 60
+
+_tables = TTLCache(maxsize=64, ttl=TABLE_TTL)
+_enabled = ContextVar("paged_enabled", default=False)
+_pruned_at = 0.0
+
+# ==============================
+# Switch
+# ==============================
+@contextmanager
+def enabled(on=True):
+    token = _enabled.set(on)
+    try:
+        yield
+    finally:
+        _enabled.reset(token)
+
+
+def iter_enabled(on, chunks):
+    """Wrap a chunk iterator so each step is built with paging on / off."""
+    while True:
+        with enabled(on):
+            chunk = next(chunks, None)
+        if chunk is None:
+            return
+        yield chunk
+
+# ==============================
+# Store
+# ==============================
+def table_id(key):
+    return "tbl_" + hashlib.sha1(key.encode("utf-8")).hexdigest()[:16]
+
+
+def store(key, df, formatter=None, **opts):
+    """
+    Keep df for slicing. formatter is "module:function" taking a DataFrame
+    slice and returning a <table>; otherwise tablewriter with opts is used.
+    """
+    global _pruned_at
+    tid = table_id(key)
+    entry = {"df": df.reset_index(drop=True), "formatter": formatter, "opts": opts}
+    persist.save(tid, entry, "pkl", timestamped=False)
+    _tables.set(tid, entry)
+    if time.monotonic() - _pruned_at > PRUNE_EVERY:
+        _pruned_at = time.monotonic()
+        persist.prune("tbl_", "pkl", max_age=STORE_TTL, keep=MAX_STORED)
+    return tid
+
+
+def _load(tid):
+    entry = persist.load(f"{tid}.pkl", "pkl")
+    if not entry:
+        raise KeyError(tid)
+    return entry
+
+
+def get(tid):
+    """Stored table entry; KeyError if unknown or expired on disk too."""
+    if not tid.startswith("tbl_") or not tid[4:].isalnum():
+        raise KeyError(tid)
+    return _tables.get_or_load(tid, lambda: _load(tid))
+
+# ==============================
+# Slicing
+# ==============================
+def _order(entry, sort, desc):
+    orders = entry.setdefault("_orders", {})
+    key = (sort, desc)
+    if key not in orders:
+        df = entry["df"]
+        if sort in df.columns:
+            orders[key] = df[sort].reset_index(drop=True).sort_values(
+                ascending=not desc, kind="stable", na_position="last").index.to_numpy()
+        else:
+            orders[key] = np.arange(len(df))
+    return orders[key]
+
+
+def _search(entry):
+    """Lower-cased row text used by the filter box, built once per table."""
+    if "_search" not in entry:
+        df = entry["df"]
+        text = df.iloc[:, 0].astype(str).str.lower() if df.shape[1] else df.index.astype(str)
+        for j in range(1, df.shape[1]):
+            text = text + "\x1f" + df.iloc[:, j].astype(str).str.lower()
+        entry["_search"] = text.to_numpy()
+    return entry["_search"]
+
+
+def render(entry, df):
+    formatter = entry.get("formatter")
+    if formatter:
+        module, func = formatter.split(":")
+        return getattr(importlib.import_module(module), func)(df)
+    return tw.to_html(df, index=False, **entry.get("opts", {}))
+
+
+def query(tid, offset=0, limit=PAGE_ROWS, sort="", desc=False, q=""):
+    """(total matching rows, <table> html of the requested slice)"""
+    entry = get(tid)
+    df = entry["df"]
+    idx = _order(entry, sort, desc)
+    q = q.strip().lower()
+    if q:
+        hits = np.fromiter((q in s for s in _search(entry)), dtype=bool, count=len(df))
+        idx = idx[hits[idx]]
+    limit = max(1, min(int(limit), MAX_LIMIT))
+    offset = max(0, int(offset))
+    return len(idx), render(entry, df.iloc[idx[offset:offset + limit]])
+
+# ==============================
+# Page fragment
+# ==============================
+def iter_paged_html(df, key, formatter=None, page_rows=PAGE_ROWS, **opts):
+    """
+    The table's first page, with controls that fetch the rest. Small frames,
+    and every frame when paging is off (full=true), are written in full.
+    """
+    if len(df) <= page_rows or not _enabled.get():
+        if formatter:
+            yield render({"formatter": formatter}, df)
+        else:
+            yield from tw.iter_html(df, index=False, **opts)
+        return
+
+    tid = store(key, df, formatter, **opts)
+    yield (f'<div class="paged-table" data-table="{tid}" data-total="{len(df)}" data-limit="{page_rows}">'
+           f'<div class="paged-controls">'
+           f'<input class="paged-filter" type="search" placeholder="Filter rows…" aria-label="Filter {escape(key)}">'
+           f'<button type="button" data-act="prev">‹ Prev</button>'
+           f'<span class="paged-info">1–{page_rows} of {len(df)}</span>'
+           f'<button type="button" data-act="next">Next ›</button>'
+           f'</div>')
+    yield render({"formatter": formatter, "opts": opts}, df.iloc[:page_rows])
+    yield f'</div>{assets.script_tag("pagedtable.js")}'
+
+
+def paged_html(df, key, formatter=None, page_rows=PAGE_ROWS, **opts):
+    return "".join(iter_paged_html(df, key, formatter, page_rows, **opts))
@@ -0,0 +1,156 @@
+# tablewriter.py — fast DataFrame -> HTML <table> writer
+#
+# Cells are formatted a whole column at a time from the NumPy arrays (one
+# formatter per column, chosen by dtype), then joined row by row. Output
+# follows DataFrame.to_html's structure and number formatting closely
+# enough to be a drop-in replacement; iter_html yields the table in chunks
+# so it can be streamed.
+
+from html import escape as _escape
+from itertools import islice
+
+import numpy as np
+import pandas as pd
+
+from app.metrics import metrics
+
+CHUNK_ROWS = 500
+MAX_DECIMALS = 6
+
+# ==============================
+# Column formatters
+# ==============================
+def _float_format(v):
+    """
+    pandas' default for a float column: fixed point with the fewest decimals
+    (at least 1, at most MAX_DECIMALS) that keep every value, switching to
+    scientific notation when a nonzero value would round to zero, or when a
+    value above 1e6 makes the fixed-point text too wide.
+    """
+    finite = v[np.isfinite(v)]
+    a = np.abs(v)
+    with np.errstate(invalid="ignore"):
+        small = ((a < 10 ** -MAX_DECIMALS) & (a > 0)).any()
+        large = (a > 1e6).any()
+    if small:
+        return f"{{:.{MAX_DECIMALS}e}}".format
+    if not len(finite):
+        return "{:.1f}".format
+    # trailing zeros pandas trims off every value alike, leaving at least one decimal
+    full = [f"{x:.{MAX_DECIMALS}f}" for x in finite.tolist()]
+    zeros = min(MAX_DECIMALS - 1, min(len(x) - len(x.rstrip("0")) for x in full))
+    # pandas measures the width with a sign column (space when non-negative)
+    width = max(len(x) + (x[0] != "-") for x in full) - zeros
+    if large and width > MAX_DECIMALS + 6:
+        return f"{{:.{MAX_DECIMALS}e}}".format
+    return f"{{:.{MAX_DECIMALS - zeros}f}}".format
+
+
+def _format_floats(v, na_rep, float_format):
+    if float_format is not None:
+        out = [float_format(x) for x in v.tolist()]
+    else:
+        fmt = _float_format(v)
+        out = [fmt(x) for x in v.tolist()]
+    bad = ~np.isfinite(v)
+    if bad.any():
+        inf = np.isinf(v)
+        for i in np.flatnonzero(bad).tolist():
+            out[i] = ("inf" if v[i] > 0 else "-inf") if inf[i] else na_rep
+    return out
+
+
+def _format_datetimes(s):
+    """Dates, or date-times to the second; missing values are "NaT" whatever na_rep is, like pandas."""
+    na_rep = "NaT"
+    v = s.to_numpy(dtype="datetime64[ns]")
+    ok = ~np.isnat(v)
+    if not ok.any():
+        return [na_rep] * len(v)
+    days = v[ok].astype("datetime64[D]")
+    unit = "D" if (days == v[ok]).all() else "s"
+    out = np.full(len(v), na_rep, dtype=object)
+    out[ok] = np.datetime_as_string(v[ok], unit=unit)
+    if unit == "s":
+        out[ok] = [x.replace("T", " ") for x in out[ok].tolist()]
+    return out.tolist()
+
+
+def _format_objects(v, na_rep, escape):
+    out = []
+    for x in v.tolist():
+        if isinstance(x, float) and x != x:
+            out.append(na_rep)
+        else:
+            out.append(str(x))
+    if escape:
+        out = [_escape(x, quote=False) for x in out]
+    return out
+
+
+def format_column(s, na_rep="NaN", escape=True, float_format=None):
+    """List of cell strings for one Series."""
+    dtype = s.dtype
+    if pd.api.types.is_bool_dtype(dtype) and not isinstance(dtype, pd.api.extensions.ExtensionDtype):
+        return ["True" if x else "False" for x in s.to_numpy().tolist()]
+    if pd.api.types.is_integer_dtype(dtype):
+        if not s.hasnans:
+            return [str(x) for x in s.to_numpy(dtype=np.int64).tolist()]
+        # nullable Int64: pandas shows <NA> whatever na_rep is
+        na = _escape("<NA>", quote=False) if escape else "<NA>"
+        return [na if x is pd.NA else str(x) for x in s.to_numpy(dtype=object).tolist()]
+    if pd.api.types.is_float_dtype(dtype):
+        return _format_floats(s.to_numpy(dtype=float, na_value=np.nan), na_rep, float_format)
+    if pd.api.types.is_datetime64_any_dtype(dtype) and not isinstance(dtype, pd.DatetimeTZDtype):
+        return _format_datetimes(s)
+    return _format_objects(s.to_numpy(dtype=object), na_rep, escape)
+
+# ==============================
+# Table writer
+# ==============================
+def _label(x, escape):
+    return _escape(str(x), quote=False) if escape else str(x)
+
+
+def iter_html(df, index=True, classes=None, border=1, escape=True,
+              na_rep="NaN", float_format=None, chunk_rows=CHUNK_ROWS):
+    """Yield the HTML of df as a <table>, header first, then chunk_rows rows at a time."""
+    if isinstance(df.columns, pd.MultiIndex) or (index and isinstance(df.index, pd.MultiIndex)):
+        # Rare on our pages; keep pandas' spanning-header layout
+        yield df.to_html(index=index, classes=classes, border=border, escape=escape, na_rep=na_rep)
+        return
+
+    if isinstance(classes, (list, tuple)):
+        classes = " ".join(classes)
+    cls = "dataframe" + (f" {classes}" if classes else "")
+
+    head = "".join(f"<th>{_label(c, escape)}</th>" for c in df.columns)
+    if index:
+        head = "<th></th>" + head
+    attrs = f' border="{border}"' if border else ""
+    yield (f'<table{attrs} class="{cls}">\n'
+           f'<thead><tr style="text-align: right;">{head}</tr></thead>\n<tbody>\n')
+
+    with metrics.stage("render"):
+        cols = [format_column(df.iloc[:, j], na_rep, escape, float_format) for j in range(df.shape[1])]
+        idx = format_column(df.index.to_series(), na_rep, escape, float_format) if index else None
+    if index:
+        rows = ("<tr><th>" + i + "</th><td>" + "</td><td>".join(r) + "</td></tr>\n"
+                for i, r in zip(idx, zip(*cols)))
+        if not cols:
+            rows = ("<tr><th>" + i + "</th></tr>\n" for i in idx)
+    else:
+        rows = ("<tr><td>" + "</td><td>".join(r) + "</td></tr>\n" for r in zip(*cols))
+
+    while True:
+        with metrics.stage("render"):
+            chunk = "".join(islice(rows, chunk_rows))
+        if not chunk:
+            break
+        yield chunk
+    yield "</tbody>\n</table>"
+
+
+def to_html(df, **kwargs):
+    """Drop-in for DataFrame.to_html(...) for the options iter_html supports."""
+    return "".join(iter_html(df, **kwargs))
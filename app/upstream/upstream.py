@@ -0,0 +1,244 @@
+# upstream.py — instrumented transport for every external call
+#
+# NSE JSON/CSV fetches, niftyindices posts, archive CSVs, the screener
+# scraper and yfinance all go through here. Each call is recorded in a
+# ledger keyed by URL template (query values and digit runs masked):
+# count, latency percentiles, bytes, status codes, curl-fallback use and
+# how often the exact same resource was re-fetched within REFETCH_WINDOW.
+#
+# The network side is a swappable Backend, so the same call sites can run
+# against recorded fixtures (see set_backend).
+
+import re
+import subprocess
+import threading
+import time
+import urllib.error
+import urllib.request
+from collections import Counter, OrderedDict, deque
+from contextlib import contextmanager
+from io import BytesIO
+from urllib.parse import urlsplit, parse_qsl
+
+import pandas as pd
+import requests
+
+from app.metrics import metrics
+
+# ==============================
+# Configuration
+# ==============================
+RESERVOIR = 512               # latencies kept per template for percentiles
+REFETCH_WINDOW = 10 * 60      # same exact resource again within this = re-fetch
+MAX_SEEN = 4096
+
+# ==============================
+# Ledger
+# ==============================
+_CALLS = metrics.Counter("dashboard_upstream_calls_total", "Upstream calls",
+                         ("template", "status", "fallback"))
+_SECONDS = metrics.Histogram("dashboard_upstream_seconds", "Upstream call latency", ("template",))
+_BYTES = metrics.Counter("dashboard_upstream_bytes_total", "Upstream payload bytes", ("template",))
+_REFETCH = metrics.Counter("dashboard_upstream_refetch_total",
+                           "Calls repeating the same resource within the re-fetch window", ("template",))
+
+
+class _Entry:
+    def __init__(self):
+        self.count = 0
+        self.errors = 0
+        self.fallbacks = 0
+        self.refetches = 0
+        self.bytes = 0
+        self.status = Counter()
+        self.latency = deque(maxlen=RESERVOIR)
+
+
+_ledger = {}
+_seen = OrderedDict()          # exact resource -> last call time
+_active = {}                   # thread ident -> Call in flight (read by the sampling profiler)
+_lock = threading.Lock()
+
+
+def template(url):
+    """'https://www.nseindia.com/api/quote-equity?symbol=ITC' -> 'www.nseindia.com/api/quote-equity?symbol=*'"""
+    if "://" not in url:
+        return url
+    parts = urlsplit(url)
+    path = re.sub(r"\d+", "{n}", parts.path)
+    query = "&".join(f"{k}=*" for k, _ in parse_qsl(parts.query, keep_blank_values=True))
+    return parts.netloc + path + (f"?{query}" if query else "")
+
+
+class Call:
+    """One upstream call; the caller fills in status / bytes / fallback."""
+
+    def __init__(self, resource, tmpl=None, fallback=False):
+        self.resource = resource
+        self.template = tmpl or template(resource)
+        self.status = None
+        self.bytes = 0
+        self.fallback = fallback
+
+
+def _record(call, seconds, failed):
+    status = str(call.status) if call.status is not None else ("error" if failed else "ok")
+    now = time.monotonic()
+    with _lock:
+        e = _ledger.setdefault(call.template, _Entry())
+        e.count += 1
+        e.errors += failed
+        e.fallbacks += call.fallback
+        e.bytes += call.bytes
+        e.status[status] += 1
+        e.latency.append(seconds)
+        last = _seen.pop(call.resource, None)
+        refetch = last is not None and now - last < REFETCH_WINDOW
+        e.refetches += refetch
+        _seen[call.resource] = now
+        while len(_seen) > MAX_SEEN:
+            _seen.popitem(last=False)
+
+    _CALLS.inc((call.template, status, "curl" if call.fallback else "direct"))
+    _SECONDS.observe((call.template,), seconds)
+    if call.bytes:
+        _BYTES.inc((call.template,), call.bytes)
+    if refetch:
+        _REFETCH.inc((call.template,))
+
+
+@contextmanager
+def record(resource, tmpl=None, fallback=False):
+    """Time and ledger a call made by the caller (e.g. the curl fallback)."""
+    call = Call(resource, tmpl, fallback)
+    ident = threading.get_ident()
+    outer = _active.get(ident)
+    _active[ident] = call
+    start = time.perf_counter()
+    failed = True
+    try:
+        with metrics.stage("fetch"):
+            yield call
+        failed = False
+    finally:
+        if outer is None:
+            _active.pop(ident, None)
+        else:
+            _active[ident] = outer
+        _record(call, time.perf_counter() - start, failed)
+
+
+def active():
+    """Snapshot of calls in flight: thread ident -> Call."""
+    return dict(_active)
+
+
+def _pct(sorted_vals, q):
+    if not sorted_vals:
+        return None
+    i = min(len(sorted_vals) - 1, int(round(q * (len(sorted_vals) - 1))))
+    return round(sorted_vals[i] * 1000, 1)
+
+
+def summary():
+    """Per-template ledger, slowest p90 first (latencies in ms)."""
+    with _lock:
+        items = [(k, e, sorted(e.latency)) for k, e in _ledger.items()]
+    rows = []
+    for k, e, lat in items:
+        rows.append({
+            "template": k,
+            "calls": e.count,
+            "errors": e.errors,
+            "fallbacks": e.fallbacks,
+            "refetches": e.refetches,
+            "bytes": e.bytes,
+            "status": dict(e.status),
+            "p50_ms": _pct(lat, 0.5),
+            "p90_ms": _pct(lat, 0.9),
+            "p99_ms": _pct(lat, 0.99),
+        })
+    return sorted(rows, key=lambda r: r["p90_ms"] or 0, reverse=True)
+
+
+def reset():
+    with _lock:
+        _ledger.clear()
+        _seen.clear()
+
+# ==============================
+# Backends
+# ==============================
+class LiveBackend:
+    """Real network: requests sessions, urllib for archive files, shell curl, yfinance calls as given."""
+
+    def request(self, session, method, url, **kwargs):
+        return (session or requests).request(method, url, **kwargs)
+
+    def fetch_bytes(self, url):
+        with urllib.request.urlopen(url, timeout=30) as r:
+            return r.status, r.read()
+
+    def curl(self, url, args=""):
+        return subprocess.run(f'curl -s {args} "{url}"', shell=True, capture_output=True).stdout
+
+    def yahoo(self, name, fn, args, kwargs):
+        return fn(*args, **kwargs)
+
+
+_backend = LiveBackend()
+
+
+def set_backend(backend):
+    """Swap the network side (e.g. a fixture replayer); returns the previous backend."""
+    global _backend
+    prev, _backend = _backend, backend
+    return prev
+
+
+def get_backend():
+    return _backend
+
+# ==============================
+# Transport
+# ==============================
+def request(session, method, url, **kwargs):
+    with record(url) as call:
+        r = _backend.request(session, method, url, **kwargs)
+        call.status = r.status_code
+        call.bytes = len(r.content or b"")
+    return r
+
+
+def get(session, url, **kwargs):
+    return request(session, "GET", url, **kwargs)
+
+
+def post(session, url, **kwargs):
+    return request(session, "POST", url, **kwargs)
+
+
+def read_csv(url, **kwargs):
+    """pd.read_csv for a remote file, with the download ledgered separately from parsing."""
+    with record(url) as call:
+        try:
+            call.status, data = _backend.fetch_bytes(url)
+        except urllib.error.HTTPError as e:
+            call.status = e.code
+            raise
+        call.bytes = len(data)
+    return pd.read_csv(BytesIO(data), **kwargs)
+
+
+def curl(url, args=""):
+    """Shell curl fallback for hosts that reject the requests session; returns bytes."""
+    with record(url, fallback=True) as call:
+        data = _backend.curl(url, args)
+        call.bytes = len(data)
+    return data
+
+
+def yahoo(name, fn, *args, **kwargs):
+    """Run a yfinance call (download / Ticker attribute) under the ledger as 'yahoo:<name>'."""
+    with record(f"yahoo:{name}:{args!r}:{sorted(kwargs.items())!r}", tmpl=f"yahoo:{name}"):
+        return _backend.yahoo(name, fn, args, kwargs)
@@ -0,0 +1,45 @@
+# benchmark.py — process-wide cache of benchmark index histories (^NSEI etc.)
+#
+# Every stock page compares against the same index, so its daily history is
+# read once per TTL and shared. Concurrent misses wait on one load
+# (single-flight); bars come from the local OHLCV store, which only asks
+# Yahoo for bars after its last stored date.
+
+import pandas as pd
+from datetime import datetime as dt
+
+from app.cache.cache import TTLCache
+from app.persist import ohlcv
+
+# ==============================
+# Configuration
+# ==============================
+NIFTY = "^NSEI"
+BENCHMARK_TTL = 15 * 60
+
+_cache = TTLCache(maxsize=16, ttl=BENCHMARK_TTL)
+
+# ==============================
+# Helpers
+# ==============================
+def _load(symbol, period):
+    start = ohlcv.period_start(period)
+    return ohlcv.history(symbol, start=start)
+
+# ==============================
+# Public API
+# ==============================
+def index_history(symbol=NIFTY, period="1y"):
+    """
+    Daily OHLCV history for a benchmark index (DatetimeIndex named "Date").
+    Callers get their own copy and may mutate it.
+    """
+    key = (symbol, period)
+    try:
+        df = _cache.get_or_load(key, lambda: _load(symbol, period))
+    except Exception as e:
+        print(f"[{dt.now().strftime('%Y-%m-%d %H:%M:%S')}] Benchmark fetch failed for {symbol}: {e}")
+        df = _cache.peek(key)
+        if df is None:
+            return pd.DataFrame()
+    return df.copy()
@@ -0,0 +1,285 @@
+# correlation.py — cross-sectional beta / correlation / relative-strength matrix
+#
+# One matrix per trading day (IST, the last session whose EOD data is out)
+# over the constituents of MATRIX_INDICES, built from closes in the local
+# OHLCV store (topped up with batched downloads). The prewarm scheduler
+# builds it, at start-up and in the eod window (scheduler.JOBS); page
+# requests only read it, so lookups by symbol are dict/array reads and no
+# viewer starts a ~150-ticker build.
+
+import threading
+import time
+import traceback
+import numpy as np
+import pandas as pd
+from datetime import datetime as dt
+
+from app.common import wrap_html, make_table, html_error
+from app.nse import nsepythonmodified as ns
+from app.persist import ohlcv
+from app.scheduler import scheduler
+
+# ==============================
+# Configuration
+# ==============================
+MATRIX_INDICES = ["NIFTY 50", "NIFTY NEXT 50", "NIFTY BANK", "NIFTY IT"]
+BENCHMARK = "^NSEI"
+LOOKBACK = "1y"
+MIN_OBS = 20          # minimum aligned return rows for a symbol to enter the matrix
+TOP_PEERS = 10
+RETRY_SEC = 15 * 60   # after a failed build, the peers page (PREWARM=0) doesn't retry for this long
+BUILD_WAIT = 60       # seconds the peers page waits for a build the scheduler has under way
+
+_lock = threading.Lock()
+_build_lock = threading.Lock()   # one build at a time
+_matrix = None        # latest CorrelationMatrix (possibly a previous trading day's)
+_retry_at = 0.0       # monotonic time before which the peers page starts no build
+
+# ==============================
+# Matrix
+# ==============================
+class CorrelationMatrix:
+    """
+    Vectorized stock×stock correlation plus per-stock beta / correlation /
+    relative strength / volatility against the benchmark.
+    """
+
+    def __init__(self, day, closes: pd.DataFrame, index_close: pd.Series, sectors: dict):
+        self.day = day
+        self.sectors = sectors
+
+        # no filling: a missing close leaves its returns missing, and every
+        # statistic below uses only the rows where both of its series exist
+        closes = closes.reindex(index_close.index)
+        enough = closes.notna().sum() > MIN_OBS
+        closes = closes.loc[:, enough]
+
+        self.symbols = list(closes.columns)
+        self.pos = {s: i for i, s in enumerate(self.symbols)}
+
+        px = closes.to_numpy(dtype=float)                     # T x N
+        ix = index_close.to_numpy(dtype=float)                # T
+        with np.errstate(divide="ignore", invalid="ignore"):
+            R = px[1:] / px[:-1] - 1.0
+            r = ix[1:] / ix[:-1] - 1.0
+        R[~np.isfinite(R)] = np.nan
+        r[~np.isfinite(r)] = np.nan
+
+        # vs benchmark: pairwise-complete rows per stock
+        M = ~np.isnan(R) & ~np.isnan(r)[:, None]
+        n = M.sum(axis=0)
+        X = np.where(M, R, 0.0)
+        Y = np.where(M, r[:, None], 0.0)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            Xc = np.where(M, X - X.sum(axis=0) / n, 0.0)
+            Yc = np.where(M, Y - Y.sum(axis=0) / n, 0.0)
+            cov_idx = (Xc * Yc).sum(axis=0) / (n - 1)
+            var_x = (Xc ** 2).sum(axis=0) / (n - 1)
+            var_y = (Yc ** 2).sum(axis=0) / (n - 1)
+            ok = (n >= MIN_OBS) & (var_y > 0)
+            self.beta = np.where(ok, cov_idx / var_y, np.nan)
+            self.corr_idx = np.where(ok & (var_x > 0), cov_idx / np.sqrt(var_x * var_y), np.nan)
+
+        # stock x stock: pairwise-complete moments from mask products
+        Mf = (~np.isnan(R)).astype(float)
+        X = np.nan_to_num(R, nan=0.0)
+        n = Mf.T @ Mf
+        Sx = X.T @ Mf                                         # [i, j] = sum of x_i where both present
+        Sxx = (X ** 2).T @ Mf
+        with np.errstate(divide="ignore", invalid="ignore"):
+            cov = (X.T @ X - Sx * Sx.T / n) / (n - 1)
+            vx = (Sxx - Sx ** 2 / n) / (n - 1)
+            corr = cov / np.sqrt(vx * vx.T)
+        corr[(n < MIN_OBS) | ~np.isfinite(corr)] = np.nan
+        self.corr = corr
+
+        first = closes.bfill().iloc[0].to_numpy(dtype=float) if len(closes) else np.array([])
+        last = closes.ffill().iloc[-1].to_numpy(dtype=float) if len(closes) else np.array([])
+        self.change = (last / first - 1.0) * 100
+        self.index_change = (ix[-1] / ix[0] - 1.0) * 100
+        with np.errstate(invalid="ignore"):
+            self.vol = np.nanstd(R, axis=0, ddof=1) * np.sqrt(252) * 100
+            self.index_vol = np.nanstd(r, ddof=1) * np.sqrt(252) * 100
+
+        # Top peers per row, precomputed so queries are O(1)
+        ranked = np.nan_to_num(self.corr, nan=-np.inf)
+        np.fill_diagonal(ranked, -np.inf)
+        k = min(TOP_PEERS, max(len(self.symbols) - 1, 0))
+        if k:
+            part = np.argpartition(-ranked, k - 1, axis=1)[:, :k]
+            order = np.take_along_axis(ranked, part, axis=1).argsort(axis=1)[:, ::-1]
+            self.peers = np.take_along_axis(part, order, axis=1)
+        else:
+            self.peers = np.empty((len(self.symbols), 0), dtype=int)
+
+    def metrics(self, symbol):
+        """Same keys as yahooinfo.calculate_index_correlation, or {} if unknown."""
+        i = self.pos.get(symbol.upper())
+        if i is None:
+            return {}
+        m = {}
+        if not np.isnan(self.beta[i]):
+            m["beta"] = round(float(self.beta[i]), 2)
+        if not np.isnan(self.corr_idx[i]):
+            m["correlation"] = round(float(self.corr_idx[i]) * 100, 1)
+        m["stock_change"] = round(float(self.change[i]), 2)
+        m["index_change"] = round(float(self.index_change), 2)
+        m["relative_strength"] = round(float(self.change[i] - self.index_change), 2)
+        m["outperformance"] = "Outperforming" if m["relative_strength"] > 0 else "Underperforming"
+        m["stock_volatility"] = round(float(self.vol[i]), 2)
+        m["index_volatility"] = round(float(self.index_vol), 2)
+        m["volatility_premium"] = round(float(self.vol[i] - self.index_vol), 2)
+        return m
+
+    def peer_frame(self, symbols):
+        rows = []
+        for s in symbols:
+            i = self.pos[s]
+            rows.append({
+                "Symbol": s,
+                "Sector": self.sectors.get(s, "-"),
+                "Beta": round(float(self.beta[i]), 2),
+                "Corr vs Nifty %": round(float(self.corr_idx[i]) * 100, 1),
+                "Change %": round(float(self.change[i]), 2),
+                "RS vs Nifty %": round(float(self.change[i] - self.index_change), 2),
+                "Volatility %": round(float(self.vol[i]), 2),
+            })
+        return pd.DataFrame(rows)
+
+    def top_peers(self, symbol):
+        i = self.pos.get(symbol.upper())
+        if i is None:
+            return pd.DataFrame()
+        idx = self.peers[i]
+        df = self.peer_frame([self.symbols[j] for j in idx])
+        df.insert(1, "Corr with stock %", np.round(self.corr[i, idx] * 100, 1))
+        return df
+
+    def sector_peers(self, symbol):
+        sector = self.sectors.get(symbol.upper())
+        if not sector:
+            return pd.DataFrame()
+        same = [s for s in self.symbols if self.sectors.get(s) == sector]
+        return self.peer_frame(same).sort_values("RS vs Nifty %", ascending=False)
+
+# ==============================
+# Build / refresh
+# ==============================
+def _constituents():
+    """symbol -> industry for the union of MATRIX_INDICES constituents."""
+    sectors = {}
+    for name in MATRIX_INDICES:
+        try:
+            df = ns.nse_index_live(name)["data"]
+        except Exception as e:
+            print(f"[{dt.now().strftime('%Y-%m-%d %H:%M:%S')}] constituents failed for {name}: {e}")
+            continue
+        if df.empty or "symbol" not in df.columns:
+            continue
+        industry_col = next((c for c in df.columns if c.startswith("industry")), None)
+        for _, row in df.iloc[1:].iterrows():
+            sym = str(row["symbol"]).upper()
+            sectors.setdefault(sym, str(row[industry_col]) if industry_col else "-")
+    return sectors
+
+
+def _closes(symbols):
+    """Close matrix (date × symbol, plus BENCHMARK) from the local OHLCV store."""
+    tickers = [s + ".NS" for s in symbols] + [BENCHMARK]
+    ohlcv.top_up_many(tickers, start=ohlcv.period_start(LOOKBACK))
+    df = ohlcv.closes(tickers, start=ohlcv.period_start(LOOKBACK))
+    return df.rename(columns=lambda c: c[:-3] if c.endswith(".NS") else c)
+
+
+def trading_day():
+    """Date the current matrix is for: the last session whose EOD data is out (IST)."""
+    return scheduler.last_eod(scheduler.now_ist())
+
+
+def build_matrix(day=None):
+    day = day or trading_day()
+    sectors = _constituents()
+    if not sectors:
+        raise RuntimeError("No index constituents available")
+    closes = _closes(sorted(sectors))
+    if BENCHMARK not in closes.columns:
+        raise RuntimeError(f"No {BENCHMARK} history available")
+    index_close = closes[BENCHMARK].dropna()
+    stocks = closes.drop(columns=[BENCHMARK])
+    return CorrelationMatrix(day, stocks, index_close, sectors)
+
+
+def refresh():
+    """
+    Build the matrix for the current trading day unless it exists; True if
+    it does afterwards. Run by the prewarm scheduler, not by page requests.
+    """
+    global _matrix, _retry_at
+    day = trading_day()
+    with _build_lock:
+        if _matrix is not None and _matrix.day == day:
+            return True
+        try:
+            m = build_matrix(day)
+        except Exception as e:
+            print(f"[{dt.now().strftime('%Y-%m-%d %H:%M:%S')}] Error building correlation matrix: {e}")
+            _retry_at = time.monotonic() + RETRY_SEC
+            return False
+        with _lock:
+            _matrix = m
+        return True
+
+
+def get_matrix():
+    """Latest matrix, or None before the first build; never builds."""
+    with _lock:
+        return _matrix
+
+
+def lookup(symbol):
+    """O(1) metrics for symbol from the latest matrix; {} if not available yet."""
+    m = get_matrix()
+    return m.metrics(symbol) if m is not None else {}
+
+# ==============================
+# Peer / sector view
+# ==============================
+def fetch_peers(symbol):
+    try:
+        m = get_matrix()
+        if m is None and scheduler.running():
+            # the scheduler's first build may be under way: wait for it, don't start another
+            if _build_lock.acquire(timeout=BUILD_WAIT):
+                _build_lock.release()
+            m = get_matrix()
+        elif m is None and time.monotonic() >= _retry_at:
+            # no prewarm scheduler (PREWARM=0) to build it: this page does
+            refresh()
+            m = get_matrix()
+        if m is None:
+            return wrap_html(html_error("Correlation matrix not available yet, please retry shortly"))
+
+        symbol = symbol.upper()
+        metrics = m.metrics(symbol)
+        if not metrics:
+            return wrap_html(f"<h1>{symbol} is not in {', '.join(MATRIX_INDICES)}</h1>")
+
+        summary = m.peer_frame([symbol])
+        top = m.top_peers(symbol)
+        sector = m.sector_peers(symbol)
+
+        html = wrap_html(
+            f"<div style='background:#f0f9ff;border:1px solid #0ea5e9;border-radius:10px;padding:15px;margin-bottom:20px;'>"
+            f"<div style='font-weight:600;color:#0c4a6e;'>🔗 {symbol} Peers &amp; Sector</div>"
+            f"<div style='font-size:12px;color:#64748b;margin-top:5px;'>"
+            f"{LOOKBACK} daily returns vs Nifty 50 · {len(m.symbols)} constituents · as of {m.day:%d %b %Y}</div>"
+            f"</div>{make_table(summary)}"
+            f"<h2 style='margin-top:20px;'>Most Correlated Peers</h2>{make_table(top)}"
+            f"<h2 style='margin-top:20px;'>Sector: {m.sectors.get(symbol, '-')}</h2>{make_table(sector)}",
+            title=f"{symbol} Peers"
+        )
+        return html
+
+    except Exception as e:
+        print(f"[{dt.now().strftime('%Y-%m-%d %H:%M:%S')}] Error fetch_peers: {e}")
+        return wrap_html(html_error(f"Peers Error: {e}<br><pre>{traceback.format_exc()}</pre>"))
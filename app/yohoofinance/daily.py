@@ -1,9 +1,12 @@
 # daily.py
-import yfinance as yf
 import pandas as pd
 from datetime import datetime as dt
 import traceback
+from html import escape
 
+from app.persist import ohlcv
+from app.static import assets
+from app.svgchart import series
 from app.svgchart.svg_charts import (
     candlestick_chart,
     line_chart,
@@ -11,13 +14,66 @@ from app.svgchart.svg_charts import (
     macd_chart,
 )
 
-
-def fetch_daily(symbol,date_end,date_start):
+CHART_MODES = ("svg", "js")
+
+
+def _svg_charts(symbol, df, view):
+    return (
+        candlestick_chart(view,f"{symbol} – Price & Volume"),
+        rsi_chart(view),
+        macd_chart(view),
+        line_chart(df.tail(52),column="Close",title="Weekly Trend (Last 52 Weeks)"),
+        line_chart(df.tail(12),column="Close",title="Monthly Trend (Last 12 Months)"),
+    )
+
+
+def _js_charts(symbol, view):
+    """Placeholders drawn in the browser by static/charts.js from one encoded series block."""
+    src = "daily-series"
+    def div(kind, title="", last=0):
+        return f'<div class="sc-chart" data-chart="{kind}" data-src="{src}" data-title="{escape(title)}" data-last="{last}"></div>'
+    data = f'<script type="application/json" id="{src}">{series.payload(view)}</script>{assets.script_tag("charts.js")}'
+    return (
+        data + div("candle", f"{symbol} – Price & Volume"),
+        div("rsi"),
+        div("macd"),
+        div("line", "Weekly Trend (Last 52 Weeks)", 52),
+        div("line", "Monthly Trend (Last 12 Months)", 12),
+    )
+
+
+def add_indicators(df):
+    """DateStr plus the MA / RSI / MACD / ATR / volatility columns the charts and cards use."""
+    df["DateStr"]=df["Date"].dt.strftime("%d-%b-%Y")
+    df["MA20"]=df["Close"].rolling(20).mean()
+    df["MA50"]=df["Close"].rolling(50).mean()
+    delta=df["Close"].diff()
+    gain=delta.clip(lower=0).rolling(14).mean()
+    loss=-delta.clip(upper=0).rolling(14).mean()
+    rs=gain/loss
+    df["RSI"]=100-(100/(1+rs))
+    ema12=df["Close"].ewm(span=12).mean()
+    ema26=df["Close"].ewm(span=26).mean()
+    df["MACD"]=ema12-ema26
+    df["MACD_SIGNAL"]=df["MACD"].ewm(span=9).mean()
+    df["ATR"] = df["High"] - df["Low"]  # Simple ATR daily
+    df["Volatility"]=df["Close"].pct_change().rolling(14).std()*100
+    return df
+
+
+def fetch_daily(symbol,date_end,date_start,chart_mode="svg"):
+    """
+    Daily dashboard. chart_mode="js" ships the series compactly encoded and
+    lets the browser draw the charts instead of inlining server-rendered SVG.
+    """
+    chart_mode=(chart_mode or "").lower()
+    if chart_mode not in CHART_MODES:
+        chart_mode="svg"
     try:
         start=dt.strptime(date_start,"%d-%m-%Y").strftime("%Y-%m-%d")
         end=dt.strptime(date_end,"%d-%m-%Y").strftime("%Y-%m-%d")
 
-        df=yf.download(symbol+".NS",start=start,end=end)
+        df=ohlcv.history(symbol+".NS",start,end)
         if df.empty:
             return f"<h3>No data for {symbol}</h3>"
 
@@ -31,22 +87,7 @@ def fetch_daily(symbol,date_end,date_start):
         if df.empty:
             return f"<h3>No valid numeric data for {symbol}</h3>"
 
-        df["DateStr"]=df["Date"].dt.strftime("%d-%b-%Y")
-
-        # Indicators
-        df["MA20"]=df["Close"].rolling(20).mean()
-        df["MA50"]=df["Close"].rolling(50).mean()
-        delta=df["Close"].diff()
-        gain=delta.clip(lower=0).rolling(14).mean()
-        loss=-delta.clip(upper=0).rolling(14).mean()
-        rs=gain/loss
-        df["RSI"]=100-(100/(1+rs))
-        ema12=df["Close"].ewm(span=12).mean()
-        ema26=df["Close"].ewm(span=26).mean()
-        df["MACD"]=ema12-ema26
-        df["MACD_SIGNAL"]=df["MACD"].ewm(span=9).mean()
-        df["ATR"] = df["High"] - df["Low"]  # Simple ATR daily
-        df["Volatility"]=df["Close"].pct_change().rolling(14).std()*100
+        df=add_indicators(df)
 
         view=df.tail(120)
         if view.empty:
@@ -88,11 +129,10 @@ def fetch_daily(symbol,date_end,date_start):
             cards_html+=f'<div style="display:inline-block;border:1px solid #ccc;padding:10px;margin:5px;border-radius:5px;background:#f9f9f9;"><b>{k}</b><br>{v}</div>'
 
         # ----------------- Charts -----------------
-        chart_main = candlestick_chart(view,f"{symbol} – Price & Volume")
-        chart_rsi = rsi_chart(view)
-        chart_macd = macd_chart(view)
-        chart_weekly = line_chart(df.tail(52),column="Close",title="Weekly Trend (Last 52 Weeks)")
-        chart_monthly = line_chart(df.tail(12),column="Close",title="Monthly Trend (Last 12 Months)")
+        if chart_mode=="js":
+            chart_main,chart_rsi,chart_macd,chart_weekly,chart_monthly=_js_charts(symbol,view)
+        else:
+            chart_main,chart_rsi,chart_macd,chart_weekly,chart_monthly=_svg_charts(symbol,df,view)
 
         html=f"""
 <div style="font-family:Arial;background:white;color:#111;padding:10px">
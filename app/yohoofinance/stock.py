@@ -8,48 +8,82 @@ from datetime import datetime as dt
 from concurrent.futures import ThreadPoolExecutor, as_completed
 
 from app.common import *
+from app.cache.cache import TTLCache
+from app.upstream import upstream
+from app.persist import ohlcv
+from app.yohoofinance import benchmark
+from app.yohoofinance import watchlist
 
-# Cache for ticker objects to avoid repeated API calls
-_ticker_cache = {}
+# ================================================================
+#                    PER-SYMBOL PAYLOAD CACHE
+# ================================================================
+
+# Seconds each Yahoo payload stays fresh; statements change rarely, quotes often
+FIELD_TTLS = {
+    "info": 5 * 60,
+    "quarterly_financials": 6 * 3600,
+    "financials": 24 * 3600,
+    "balance_sheet": 24 * 3600,
+    "cashflow": 24 * 3600,
+    "dividends": 6 * 3600,
+    "splits": 24 * 3600,
+    "actions": 6 * 3600,
+    "calendar": 6 * 3600,
+    "recommendations": 6 * 3600,
+    "earnings": 24 * 3600,
+}
+
+# (SYMBOL, field) -> payload, bounded LRU with per-field TTL
+_payload_cache = TTLCache(maxsize=1024, ttl=5 * 60)
 
 def get_ticker(symbol):
-    """Get cached ticker object"""
-    key = symbol.upper()
-    if key not in _ticker_cache:
-        _ticker_cache[key] = yf.Ticker(symbol + ".NS")
-    return _ticker_cache[key]
+    """Uncached ticker object; use get_field() for payloads"""
+    return yf.Ticker(symbol + ".NS")
+
+def get_field(symbol, field):
+    """Cached Yahoo payload (ticker attribute) for symbol"""
+    key = (symbol.upper(), field)
+    return _payload_cache.get_or_load(
+        key,
+        lambda: upstream.yahoo(f"Ticker.{field}", getattr, get_ticker(symbol), field),
+        ttl=FIELD_TTLS.get(field),
+    )
 
 def yfinfo(symbol):
-    return get_ticker(symbol).info
+    return get_field(symbol, "info")
 
 
 def qresult(symbol):
-    return yf.Ticker(symbol + ".NS").quarterly_financials
+    return get_field(symbol, "quarterly_financials")
 
 
 def result(symbol):
-    return yf.Ticker(symbol + ".NS").financials
+    return get_field(symbol, "financials")
 
 
 def balance(symbol):
-    return get_ticker(symbol).balance_sheet
+    return get_field(symbol, "balance_sheet")
 
 
 def cashflow(symbol):
-    return get_ticker(symbol).cashflow
+    return get_field(symbol, "cashflow")
 
 
 def dividend(symbol):
-    return get_ticker(symbol).dividends.to_frame("Dividend")
+    return get_field(symbol, "dividends").to_frame("Dividend")
 
 
 def split(symbol):
-    return get_ticker(symbol).splits.to_frame("Split")
+    return get_field(symbol, "splits").to_frame("Split")
 
 
 def intraday(symbol):
+    df = watchlist.cached_intraday(symbol)
+    if df is not None:
+        return df.round(2)
     print(f"[{dt.now().strftime('%Y-%m-%d %H:%M:%S')}] yf called for {symbol}")
-    return yf.download(symbol + ".NS", period="1d", interval="5m", progress=False).round(2)
+    df = upstream.yahoo("download", yf.download, symbol + ".NS", period="1d", interval="5m", progress=False)
+    return df.round(2)
 
 
 
@@ -193,15 +227,13 @@ def fetch_daily(symbol, period="1y"):
     try:
         # Fetch stock and index concurrently
         def fetch_stock_data():
-            ticker = get_ticker(symbol)
-            hist = ticker.history(period=period, interval="1d")
-            info = ticker.info
+            hist = ohlcv.history(symbol + ".NS", start=ohlcv.period_start(period))
+            info = yfinfo(symbol)
             return hist, info
         
         def fetch_index_data():
             try:
-                nifty = yf.Ticker("^NSEI")
-                return nifty.history(period=period, interval="1d")
+                return benchmark.index_history(benchmark.NIFTY, period=period)
             except:
                 return pd.DataFrame()
         
@@ -729,8 +761,7 @@ def fetch_other(symbol):
     key = f"other_{symbol}"
 
     try:
-        ticker = get_ticker(symbol)
-        df = ticker.earnings
+        df = get_field(symbol, "earnings")
 
         if df is None or df.empty:
             return wrap_html(f"<h1>No earnings data for {symbol}</h1>")
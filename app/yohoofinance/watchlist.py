@@ -0,0 +1,131 @@
+# watchlist.py — one yf.download for many symbols, split into per-symbol frames
+#
+# A watchlist page downloads intraday bars for every symbol in a single
+# upstream call, split per symbol into a shared cache, and tops up the local
+# OHLCV store for all of them with one batched daily download. The daily /
+# intraday pages for those symbols are then served without another Yahoo
+# request while the entries are fresh.
+
+import traceback
+import pandas as pd
+import yfinance as yf
+from datetime import datetime as dt
+
+from app.common import wrap_html, make_table, html_error
+from app.cache.cache import TTLCache
+from app.persist import ohlcv
+from app.upstream import upstream
+
+# ==============================
+# Configuration
+# ==============================
+INTRADAY = {"period": "1d", "interval": "5m"}
+BATCH_TTLS = {"intraday": 5 * 60}
+MAX_SYMBOLS = 100
+
+# (SYMBOL, kind, params) -> single-level OHLCV DataFrame
+_frames = TTLCache(maxsize=2048, ttl=5 * 60)
+
+# ==============================
+# Batch download / cache
+# ==============================
+def _key(symbol, kind, params):
+    return (symbol.upper(), kind, tuple(sorted(params.items())))
+
+
+def parse_symbols(names):
+    """'ITC, tcs;INFY' -> ['ITC', 'TCS', 'INFY'] (order kept, de-duplicated)"""
+    out = []
+    for s in names.replace(";", ",").split(","):
+        s = s.strip().upper()
+        if s and s not in out:
+            out.append(s)
+    return out[:MAX_SYMBOLS]
+
+
+def prefetch(symbols, kind, **params):
+    """Download all symbols in one call and cache each symbol's frame."""
+    tickers = [s + ".NS" for s in symbols]
+    raw = upstream.yahoo("download", yf.download, tickers, group_by="ticker", progress=False, threads=True, **params)
+
+    frames = {}
+    for s, t in zip(symbols, tickers):
+        if isinstance(raw.columns, pd.MultiIndex):
+            if t not in raw.columns.get_level_values(0):
+                continue
+            df = raw[t]
+        else:
+            df = raw
+        df = df.dropna(how="all")
+        if df.empty:
+            continue
+        frames[s] = df
+        _frames.set(_key(s, kind, params), df, ttl=BATCH_TTLS.get(kind))
+    return frames
+
+
+def cached(symbol, kind, **params):
+    """Copy of a batch-downloaded frame for symbol, or None if not cached."""
+    df = _frames.get(_key(symbol, kind, params))
+    return None if df is None else df.copy()
+
+
+def cached_intraday(symbol):
+    return cached(symbol, "intraday", **INTRADAY)
+
+# ==============================
+# Watchlist page
+# ==============================
+def _summary_row(symbol, intra, daily):
+    row = {"Symbol": symbol}
+    if intra is not None and not intra.empty:
+        last = float(intra["Close"].iloc[-1])
+        first_open = float(intra["Open"].iloc[0])
+        row["Last"] = round(last, 2)
+        row["Day Chg %"] = round((last / first_open - 1) * 100, 2) if first_open else "-"
+        row["Day High"] = round(float(intra["High"].max()), 2)
+        row["Day Low"] = round(float(intra["Low"].min()), 2)
+        row["Volume"] = int(intra["Volume"].sum())
+    if daily is not None and not daily.empty:
+        first = float(daily["Close"].iloc[0])
+        last = float(daily["Close"].iloc[-1])
+        row["Period Chg %"] = round((last / first - 1) * 100, 2) if first else "-"
+        row["Period High"] = round(float(daily["High"].max()), 2)
+        row["Period Low"] = round(float(daily["Low"].min()), 2)
+    return row
+
+
+def fetch_watchlist(names, date_end="", date_start=""):
+    """
+    Summary for a comma-separated list of symbols, from one intraday and
+    (when dates are given, DD-MM-YYYY) one daily batch download.
+    """
+    try:
+        symbols = parse_symbols(names)
+        if not symbols:
+            return wrap_html("<h1>No symbols in watchlist</h1>")
+
+        intra = prefetch(symbols, "intraday", **INTRADAY)
+
+        daily = {}
+        if date_end and date_start:
+            start = dt.strptime(date_start, "%d-%m-%Y").strftime("%Y-%m-%d")
+            end = dt.strptime(date_end, "%d-%m-%Y").strftime("%Y-%m-%d")
+            ohlcv.top_up_many([s + ".NS" for s in symbols], start)
+            for s in symbols:
+                daily[s] = ohlcv.history(s + ".NS", start, end, refresh=False)
+
+        df = pd.DataFrame([_summary_row(s, intra.get(s), daily.get(s)) for s in symbols])
+
+        html = wrap_html(
+            f"<div style='background:#eff6ff;border:1px solid #2563eb;border-radius:10px;padding:15px;margin-bottom:20px;'>"
+            f"<div style='font-weight:600;color:#1e40af;'>👀 Watchlist · {len(symbols)} symbols</div>"
+            f"<div style='font-size:12px;color:#64748b;margin-top:5px;'>Intraday and daily pages for these symbols are now served from cache</div>"
+            f"</div>{make_table(df)}",
+            title="Watchlist"
+        )
+        return html
+
+    except Exception as e:
+        print(f"[{dt.now().strftime('%Y-%m-%d %H:%M:%S')}] Error fetch_watchlist: {e}")
+        return wrap_html(html_error(f"Watchlist Error: {e}<br><pre>{traceback.format_exc()}</pre>"))
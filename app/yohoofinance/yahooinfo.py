@@ -1,12 +1,20 @@
 # ==============================
 # Imports
 # ==============================
-import yfinance as yf
 import pandas as pd
 import numpy as np
 import traceback
+import time
 from datetime import datetime, timezone, timedelta
 from concurrent.futures import ThreadPoolExecutor, as_completed
+from concurrent.futures import TimeoutError as FuturesTimeout
+
+from app.persist import ohlcv
+from app.metrics import metrics
+from app.svgchart.downsample import ohlc_buckets, candle_budget
+from app.yohoofinance import benchmark
+from app.yohoofinance import stock
+from app.yohoofinance import correlation
 # ==============================
 # Icons & Styling
 # ==============================
@@ -313,70 +321,85 @@ def is_simple_value(v):
 # ==============================
 # Data Fetching
 # ==============================
+# Per-resource deadlines (seconds from submission); a late resource is rendered as missing
+SUBFETCH_TIMEOUTS = {
+    "info": 15,
+    "hist": 15,
+    "index_hist": 10,
+    "actions": 8,
+    "calendar": 8,
+    "recommendations": 8,
+}
+
+# One bounded pool for all Yahoo sub-fetches of the info page
+_executor = ThreadPoolExecutor(max_workers=12, thread_name_prefix="yfinfo")
+
+def _clean_hist(df, cols):
+    if df is None or df.empty:
+        return pd.DataFrame()
+    if isinstance(df.columns, pd.MultiIndex):
+        df.columns = df.columns.get_level_values(0)
+    df = df.reset_index()
+    for c in cols:
+        if c in df.columns:
+            df[c] = pd.to_numeric(df[c], errors="coerce")
+    return df.dropna(subset=["Date", "Open", "High", "Low", "Close"])
+
+def _as_frame(v):
+    return v if isinstance(v, pd.DataFrame) else pd.DataFrame()
+
 def yfinfo(symbol):
-    try:
-        # Fetch stock and index concurrently
-        def fetch_stock():
-            t = yf.Ticker(symbol + ".NS")
-            info = t.info
-            df = t.history(period="1y", interval="1d")
-            if isinstance(df.columns, pd.MultiIndex):
-                df.columns = df.columns.get_level_values(0)
-            df = df.reset_index()
-            for c in ["Open", "High", "Low", "Close", "Volume"]:
-                if c in df.columns:
-                    df[c] = pd.to_numeric(df[c], errors="coerce")
-            df = df.dropna(subset=["Date", "Open", "High", "Low", "Close"])
-            return info, df
-        
-        def fetch_index():
+    """
+    Fetch every Yahoo sub-resource of the info page concurrently.
+    Resources that fail or miss their deadline come back empty and are
+    listed under info["__missing__"]; the page renders whatever arrived.
+    """
+    fetchers = {
+        "info": lambda: stock.yfinfo(symbol),
+        "hist": lambda: ohlcv.history(symbol + ".NS", start=ohlcv.period_start("1y")),
+        "index_hist": lambda: benchmark.index_history(benchmark.NIFTY, period="1y"),
+        "actions": lambda: stock.get_field(symbol, "actions"),
+        "calendar": lambda: stock.get_field(symbol, "calendar"),
+        "recommendations": lambda: stock.get_field(symbol, "recommendations"),
+    }
+
+    started = time.monotonic()
+    futures = {name: _executor.submit(fn) for name, fn in fetchers.items()}
+
+    results, missing = {}, {}
+    with metrics.stage("fetch"):
+        for name, fut in futures.items():
+            remaining = started + SUBFETCH_TIMEOUTS[name] - time.monotonic()
             try:
-                t = yf.Ticker("^NSEI")
-                df = t.history(period="1y", interval="1d")
-                if isinstance(df.columns, pd.MultiIndex):
-                    df.columns = df.columns.get_level_values(0)
-                df = df.reset_index()
-                for c in ["Open", "High", "Low", "Close"]:
-                    if c in df.columns:
-                        df[c] = pd.to_numeric(df[c], errors="coerce")
-                df = df.dropna(subset=["Date", "Open", "High", "Low", "Close"])
-                return df
-            except:
-                return pd.DataFrame()
-        
-        # Concurrent fetch
-        with ThreadPoolExecutor(max_workers=2) as executor:
-            stock_future = executor.submit(fetch_stock)
-            index_future = executor.submit(fetch_index)
-            (info, hist), index_hist = stock_future.result(), index_future.result()
-        
-        # Fetch other data
-        t = yf.Ticker(symbol + ".NS")
-        try:
-            actions = t.actions if hasattr(t, 'actions') else pd.DataFrame()
-            if not isinstance(actions, pd.DataFrame):
-                actions = pd.DataFrame()
-        except:
-            actions = pd.DataFrame()
-        
-        try:
-            calendar = t.calendar if hasattr(t, 'calendar') else pd.DataFrame()
-            if not isinstance(calendar, pd.DataFrame):
-                calendar = pd.DataFrame()
-        except:
-            calendar = pd.DataFrame()
-        
-        try:
-            recommendations = t.recommendations if hasattr(t, 'recommendations') else pd.DataFrame()
-            if not isinstance(recommendations, pd.DataFrame):
-                recommendations = pd.DataFrame()
-        except:
-            recommendations = pd.DataFrame()
-        
-        return (info if isinstance(info, dict) else {}), hist, index_hist, actions, calendar, recommendations
-        
+                results[name] = fut.result(timeout=max(remaining, 0))
+            except FuturesTimeout:
+                missing[name] = "timeout"
+            except Exception as e:
+                missing[name] = str(e)
+
+    info = results.get("info")
+    info = dict(info) if isinstance(info, dict) else {}
+    try:
+        hist = _clean_hist(results.get("hist"), ["Open", "High", "Low", "Close", "Volume"])
+        index_hist = _clean_hist(results.get("index_hist"), ["Open", "High", "Low", "Close"])
     except Exception as e:
-        return {"__error__": str(e)}, pd.DataFrame(), pd.DataFrame(), pd.DataFrame(), pd.DataFrame(), pd.DataFrame()        
+        return {"__error__": str(e)}, pd.DataFrame(), pd.DataFrame(), pd.DataFrame(), pd.DataFrame(), pd.DataFrame()
+
+    if not info and hist.empty:
+        reason = missing.get("info") or missing.get("hist") or "no data"
+        return {"__error__": reason}, pd.DataFrame(), pd.DataFrame(), pd.DataFrame(), pd.DataFrame(), pd.DataFrame()
+
+    if missing:
+        info["__missing__"] = missing
+
+    return (
+        info,
+        hist,
+        index_hist,
+        _as_frame(results.get("actions")),
+        _as_frame(results.get("calendar")),
+        _as_frame(results.get("recommendations")),
+    )
 # ==============================
 # Formatting
 # ==============================
@@ -1458,11 +1481,14 @@ def generate_mini_candlestick(df, width=300, height=150):
             print(f"DEBUG generate_mini_candlestick: missing columns, have {df.columns.tolist()}")
             return ""
         
-        n = len(df)
         margin = 20
         chart_w = width - 2 * margin
         chart_h = height - 2 * margin
         
+        # Merge bars so the candle count never exceeds what the width can show
+        df = ohlc_buckets(df, candle_budget(chart_w))
+        n = len(df)
+        
         # Price scale
         min_price = float(df['Low'].min())
         max_price = float(df['High'].max())
@@ -1618,8 +1644,11 @@ def build_combined_trend_section(info, stock_hist, index_hist):
         stock_insights = calculate_insights(stock_view, "stock")
         index_insights = calculate_insights(index_view, "index") if not index_view.empty else {}
         
-        # Correlation
-        correlation_metrics = calculate_index_correlation(stock_hist, index_hist)
+        # Correlation (precomputed daily matrix first, per-request fallback)
+        symbol = str(info.get("symbol", "")).upper().removesuffix(".NS")
+        correlation_metrics = correlation.lookup(symbol) if symbol else {}
+        if not correlation_metrics:
+            correlation_metrics = calculate_index_correlation(stock_hist, index_hist)
         
         # Layout
         charts_row = f"""
@@ -1786,12 +1815,21 @@ def build_correlation_card(metrics):
 # Main Function (FIXED)
 # ==============================
 def fetch_info(symbol):
+    return "".join(iter_info(symbol))
+
+
+def iter_info(symbol):
+    """
+    fetch_info's page as a generator: the header goes out as soon as the
+    Yahoo data is in, then each section as it is formatted.
+    """
     try:
         # Fetch all data including index
         info, hist, index_hist, actions, calendar, recommendations = yfinfo(symbol)
         
         if "__error__" in info:
-            return f'<div style="color:#dc2626;padding:20px;">Error: {info["__error__"]}</div>'
+            yield f'<div style="color:#dc2626;padding:20px;">Error: {info["__error__"]}</div>'
+            return
         
         # Group data
         groups = group_info(info)
@@ -1835,55 +1873,59 @@ def fetch_info(symbol):
         </div>
         """
         
-        parts = [header]
+        yield header
+        
+        # Sub-resources that failed or timed out
+        missing = info.get("__missing__")
+        if missing:
+            names = ", ".join(f"{k} ({v})" for k, v in missing.items())
+            yield f'<div style="color:#92400e;background:#fffbeb;border:1px solid #fcd34d;border-radius:8px;padding:10px;margin-bottom:16px;font-size:12px;">⚠️ Partial data — unavailable: {names}</div>'
         
         # ADDED: Combined Stock + Index Trend Section
         combined_trend = build_combined_trend_section(info, hist, index_hist)
         if combined_trend:
-            parts.append(combined_trend)
+            yield combined_trend
         
         # Price/Volume with all metrics
-        parts.append(build_price_volume_section(info, hist))
+        yield build_price_volume_section(info, hist)
         
         # Events
         events = process_events(info, actions, calendar)
         if events:
-            parts.append(build_events_section(events))
+            yield build_events_section(events)
         
         # Fundamentals
         if groups["fundamental"]:
-            parts.append(build_fundamentals_section(groups["fundamental"]))
+            yield build_fundamentals_section(groups["fundamental"])
         
         # Dividends
         if groups["dividends"] or info.get("dividendYield"):
-            parts.append(build_dividend_section(groups["dividends"], info))
+            yield build_dividend_section(groups["dividends"], info)
         
         # Splits
         if groups["splits"] or info.get("lastSplitFactor"):
-            parts.append(build_split_section(groups["splits"], info))
+            yield build_split_section(groups["splits"], info)
         
         # Ownership
         if groups["ownership"]:
-            parts.append(build_ownership_section(groups["ownership"]))
+            yield build_ownership_section(groups["ownership"])
         
         # Analyst
         if groups["analyst"]:
-            parts.append(build_analyst_section(groups["analyst"], recommendations))
+            yield build_analyst_section(groups["analyst"], recommendations)
         
         # Risk
         if groups["risk"]:
-            parts.append(build_risk_section(groups["risk"]))
+            yield build_risk_section(groups["risk"])
         
         # Profile & Management
         if groups["profile"] or groups["management"]:
-            parts.append(build_profile_section(groups["profile"], groups["management"].get("companyOfficers")))
+            yield build_profile_section(groups["profile"], groups["management"].get("companyOfficers"))
         
         # Any remaining long text
         for k, v in groups.get("long_text", {}).items():
             if k not in groups["profile"]:
-                parts.append(html_card(SHORT_NAMES.get(k, k[:20]), format_value(k, v)))
-        
-        return "".join(parts)
+                yield html_card(SHORT_NAMES.get(k, k[:20]), format_value(k, v))
         
     except Exception as e:
-        return f'<div style="color:#dc2626;padding:20px;background:#fef2f2;border-radius:8px;"><strong>Error:</strong><br><pre>{traceback.format_exc()}</pre></div>'
+        yield f'<div style="color:#dc2626;padding:20px;background:#fef2f2;border-radius:8px;"><strong>Error:</strong><br><pre>{traceback.format_exc()}</pre></div>'